@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+音频接入 - 下载原始音频流并一次性解码为 16kHz 单声道 PCM
+不再经过 MP3 重编码，解码结果直接交给 model.transcribe
+"""
+
+import os
+import shutil
+import subprocess
+import tempfile
+
+from cancellation import Cancelled
+
+SAMPLE_RATE = 16000
+# 每次从 ffmpeg 管道读取的字节数（int16，约 16 秒音频）
+READ_CHUNK_BYTES = SAMPLE_RATE * 2 * 16
+# 解码失败时错误信息最多保留的字节数（取 stderr 末尾）
+ERROR_TAIL_BYTES = 4096
+
+
+def has_ffmpeg():
+    return shutil.which("ffmpeg") is not None
+
+
+def download_native_audio(url, temp_dir, cookie_file="", extra_opts=None):
+    """下载 bestaudio 原始流（不做转码），返回本地文件路径"""
+    import yt_dlp
+    ydl_opts = {
+        'outtmpl': os.path.join(temp_dir, 'audio.%(ext)s'),
+        'format': 'bestaudio/best',
+        # 带 list= 参数的视频链接只下载该视频；播放列表由 url_ingest 展开
+        'noplaylist': True,
+        'quiet': True,
+        'no_warnings': True,
+        'noprogress': True,
+    }
+    if cookie_file and os.path.isfile(cookie_file):
+        ydl_opts['cookiefile'] = cookie_file
+    if extra_opts:
+        ydl_opts.update(extra_opts)
+
+    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        info = ydl.extract_info(url, download=True)
+        return ydl.prepare_filename(info)
+
+
+def probe_url(url, cookie_file=""):
+    """只解析链接元数据（不解析格式、不下载），用于获取提取器与视频ID"""
+    import yt_dlp
+    ydl_opts = {'quiet': True, 'no_warnings': True, 'skip_download': True}
+    if cookie_file and os.path.isfile(cookie_file):
+        ydl_opts['cookiefile'] = cookie_file
+    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        return ydl.extract_info(url, download=False, process=False)
+
+
+def _ffmpeg_command(source, sample_rate, start=0.0, duration=None):
+    cmd = ["ffmpeg", "-nostdin", "-hide_banner", "-loglevel", "error"]
+    if start > 0:
+        # 放在 -i 之前：按关键帧快速定位，不解码前面的内容
+        cmd += ["-ss", f"{start:.3f}"]
+    cmd += ["-i", source]
+    if duration is not None:
+        cmd += ["-t", f"{duration:.3f}"]
+    cmd += ["-vn", "-ac", "1", "-ar", str(sample_rate), "-f", "s16le", "-acodec", "pcm_s16le", "-"]
+    return cmd
+
+
+def iter_pcm_chunks(source, sample_rate=SAMPLE_RATE, start=0.0, duration=None, cancel=None):
+    """
+    流式解码，逐块产出 int16 单声道 PCM（numpy 数组）
+    cancel 为 CancelToken 时，取消会立即结束 ffmpeg 子进程并抛出 Cancelled
+    """
+    import numpy as np
+    # stderr 写入临时文件而非管道：损坏的流可能产生大量错误输出，管道写满后 ffmpeg 会阻塞，解码随之卡死
+    errors = tempfile.TemporaryFile()
+    process = subprocess.Popen(
+        _ffmpeg_command(source, sample_rate, start, duration),
+        stdout=subprocess.PIPE, stderr=errors,
+    )
+    unregister = cancel.on_cancel(process.kill) if cancel is not None else None
+    try:
+        pending = b""
+        while True:
+            if cancel is not None and cancel():
+                raise Cancelled()
+            data = process.stdout.read(READ_CHUNK_BYTES)
+            if not data:
+                break
+            data = pending + data
+            usable = len(data) - len(data) % 2
+            pending = data[usable:]
+            if usable:
+                yield np.frombuffer(data[:usable], dtype=np.int16)
+        process.wait()
+        if cancel is not None and cancel.cancelled:
+            raise Cancelled()
+        if process.returncode != 0:
+            errors.seek(max(0, errors.seek(0, os.SEEK_END) - ERROR_TAIL_BYTES))
+            error = errors.read().decode('utf-8', errors='replace').strip()
+            raise RuntimeError(f"ffmpeg 解码失败: {error or process.returncode}")
+    finally:
+        if unregister:
+            unregister()
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        process.stdout.close()
+        errors.close()
+
+
+def decode_audio(source, sample_rate=SAMPLE_RATE, start=0.0, duration=None, cancel=None):
+    """解码为 float32 PCM（-1~1），可直接传给 model.transcribe"""
+    import numpy as np
+    if not has_ffmpeg():
+        # 没有 ffmpeg 时退回 faster-whisper 自带的 PyAV 解码
+        from faster_whisper.audio import decode_audio as av_decode
+        audio = av_decode(source, sampling_rate=sample_rate)
+        first = int(start * sample_rate)
+        last = None if duration is None else first + int(duration * sample_rate)
+        return audio[first:last]
+
+    chunks = list(iter_pcm_chunks(source, sample_rate, start, duration, cancel))
+    if not chunks:
+        return np.zeros(0, dtype=np.float32)
+    pcm = np.concatenate(chunks)
+    audio = np.empty(len(pcm), dtype=np.float32)
+    np.multiply(pcm, 1.0 / 32768.0, out=audio, casting='unsafe')
+    return audio
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+解码音频存储 - 16kHz 单声道 int16 PCM 原样写入缓存目录，之后以内存映射方式读取
+- 同一输入再次处理时不再调用 ffmpeg
+- 按时间区间切片不复制数据，只有送入模型的部分才转换为 float32，长音频的常驻内存有上限
+- 支持只重新转录某个区间、导出某个区间试听
+用法：
+    python audio_store.py lecture.mp4 --start 600 --end 660
+    python audio_store.py lecture.mp4 --start 600 --end 660 --preview clip.wav
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+import wave
+from pathlib import Path
+
+from audio_ingest import SAMPLE_RATE, iter_pcm_chunks
+from transcript_cache import InUse, cache_root, evict_lru
+
+STORE_VERSION = 1
+DEFAULT_MAX_BYTES = 10 * 1024**3
+
+
+class AudioView:
+    """int16 内存映射上的只读视图：切片时才转换为 float32，且只转换切出的部分"""
+
+    def __init__(self, pcm, fingerprint=None):
+        self.pcm = pcm
+        # 只有覆盖完整音频的视图才带内容指纹（供转录缓存使用）
+        self.fingerprint = fingerprint
+
+    def __len__(self):
+        return len(self.pcm)
+
+    def __getitem__(self, key):
+        import numpy as np
+        if not isinstance(key, slice):
+            raise TypeError("AudioView 只支持切片")
+        part = self.pcm[key]
+        audio = np.empty(len(part), dtype=np.float32)
+        np.multiply(part, 1.0 / 32768.0, out=audio, casting='unsafe')
+        return audio
+
+
+class StoredAudio:
+    def __init__(self, path, header):
+        self.path = path
+        self.sample_rate = header["sample_rate"]
+        self.samples = header["samples"]
+        self.fingerprint = header["fingerprint"]
+        self._pcm = None
+
+    @property
+    def duration(self):
+        return self.samples / self.sample_rate
+
+    @property
+    def pcm(self):
+        """整个文件的 int16 内存映射（按需分页读入，不占用匿名内存）"""
+        if self._pcm is None:
+            import numpy as np
+            self._pcm = np.memmap(self.path, dtype='<i2', mode='r', shape=(self.samples,)) \
+                if self.samples else np.zeros(0, dtype=np.int16)
+        return self._pcm
+
+    def _range(self, start, end):
+        first = min(self.samples, max(0, int(start * self.sample_rate)))
+        last = self.samples if end is None else min(self.samples, max(first, int(end * self.sample_rate)))
+        return first, last
+
+    def view(self, start=0.0, end=None):
+        """[start, end) 秒的零拷贝视图"""
+        first, last = self._range(start, end)
+        whole = first == 0 and last == self.samples
+        return AudioView(self.pcm[first:last], self.fingerprint if whole else None)
+
+    def write_wav(self, path, start=0.0, end=None):
+        """把区间导出为 WAV（试听用）"""
+        first, last = self._range(start, end)
+        with wave.open(str(path), 'wb') as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(self.sample_rate)
+            f.writeframes(memoryview(self.pcm[first:last]).cast("B"))
+        return str(path)
+
+
+class AudioStore:
+    """
+    按输入身份（链接的视频ID或本地文件的 路径+大小+修改时间）保存解码结果，超出上限按 LRU 淘汰
+    正在使用的条目（pinned）不会被淘汰
+    """
+
+    def __init__(self, root=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = Path(root) if root else cache_root() / "audio"
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._in_use = InUse()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def _paths(self, key):
+        digest = hashlib.sha256(f"{STORE_VERSION}:{key}".encode('utf-8')).hexdigest()
+        base = self.root / digest[:2] / digest
+        return base.with_suffix(".pcm"), base.with_suffix(".json")
+
+    def contains(self, key):
+        return self._paths(key)[1].exists()
+
+    def pinned(self, key):
+        """在 with 块内该条目不会被淘汰（可以在条目写入之前获取）"""
+        return self._in_use.hold(self._paths(key)[0].stem)
+
+    def get(self, key):
+        pcm_path, header_path = self._paths(key)
+        try:
+            with open(header_path, 'r', encoding='utf-8') as f:
+                header = json.load(f)
+            if header.get("version") != STORE_VERSION or os.path.getsize(pcm_path) != header["samples"] * 2:
+                raise ValueError("音频存储条目不完整")
+            now = time.time()
+            os.utime(pcm_path, (now, now))
+            os.utime(header_path, (now, now))
+        except (OSError, ValueError, KeyError):
+            with self._lock:
+                self.stats["misses"] += 1
+            return None
+        with self._lock:
+            self.stats["hits"] += 1
+        return StoredAudio(pcm_path, header)
+
+    def ingest(self, key, source, cancel=None):
+        """流式解码 source 并直接写入存储（内存中只有当前一块），同时计算内容指纹"""
+        pcm_path, header_path = self._paths(key)
+        pcm_path.parent.mkdir(parents=True, exist_ok=True)
+        partial = pcm_path.with_name(f"{pcm_path.name}.{os.getpid()}.{threading.get_ident()}.part")
+        digest = hashlib.sha256()
+        samples = 0
+        try:
+            with open(partial, 'wb') as f:
+                for chunk in iter_pcm_chunks(source, SAMPLE_RATE, cancel=cancel):
+                    digest.update(chunk)
+                    f.write(chunk)
+                    samples += len(chunk)
+            os.replace(partial, pcm_path)
+        except BaseException:
+            try:
+                os.remove(partial)
+            except OSError:
+                pass
+            raise
+        header = {"version": STORE_VERSION, "sample_rate": SAMPLE_RATE, "samples": samples,
+                  "fingerprint": "pcm16:" + digest.hexdigest()}
+        tmp = header_path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(header, f)
+        os.replace(tmp, header_path)
+        with self.pinned(key):
+            self.evict()
+        return StoredAudio(pcm_path, header)
+
+    def evict(self):
+        with self._lock:
+            entries = []
+            for header_path in self.root.glob("*/*.json"):
+                pcm_path = header_path.with_suffix(".pcm")
+                try:
+                    st = pcm_path.stat()
+                except OSError:
+                    continue
+                # 先删头文件，之后的 get() 即视为未命中
+                entries.append((st.st_mtime, st.st_size, pcm_path.stem, [header_path, pcm_path]))
+            self.stats["evictions"] += evict_lru(entries, self.max_bytes, self._in_use)
+
+    def describe(self):
+        s = self.stats
+        return f"音频存储: 命中 {s['hits']} | 新解码 {s['misses']} | 淘汰 {s['evictions']}"
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_audio_store(root=None, max_bytes=None):
+    """进程级单例；首次调用时可指定目录与容量上限"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = AudioStore(root, max_bytes or DEFAULT_MAX_BYTES)
+        return _store
+
+
+def main(argv=None):
+    from transcriber_engine import TranscribeOptions, TranscriptionEngine
+    parser = argparse.ArgumentParser(description="从音频存储中重新转录/导出某个区间")
+    parser.add_argument("source", help="本地文件或链接（首次使用时会解码并写入存储）")
+    parser.add_argument("--start", type=float, required=True, help="区间起点（秒）")
+    parser.add_argument("--end", type=float, required=True, help="区间终点（秒）")
+    parser.add_argument("--preview", default="", help="只把区间导出为 WAV，不转录")
+    parser.add_argument("--model", default="small")
+    parser.add_argument("--language", default="auto")
+    parser.add_argument("--cookies", default="")
+    args = parser.parse_args(argv)
+
+    engine = TranscriptionEngine(TranscribeOptions(model_size=args.model, language=args.language,
+                                                   cookie_file=args.cookies))
+    if args.preview:
+        print(f"🔊 已导出: {engine.preview_region(args.source, args.start, args.end, args.preview)}")
+        return
+    for seg in engine.transcribe_region(args.source, args.start, args.end):
+        print(f"[{seg.start:.2f}s -> {seg.end:.2f}s] {seg.text.strip()}")
+
+
+if __name__ == "__main__":
+    main()
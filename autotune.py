@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+自动调优 - 探测硬件（核心数、指令集、内存/显存），用一段真实音频（没有时用合成音频）做短时校准，
+选出满足目标实时率（RTF = 用时 / 音频时长）的 计算精度 × cpu_threads × 模型 × 批大小
+并发任务数不在调优范围内，由 --workers 决定
+结果保存在缓存目录中，之后启动直接使用
+用法：
+    python autotune.py --target-rtf 0.5 --sample lecture.mp4
+"""
+
+import argparse
+import json
+import os
+import platform
+from datetime import datetime
+
+from audio_ingest import SAMPLE_RATE
+from hardware import cpu_flags, get_gpu_info, physical_cores, total_ram_bytes
+from model_cache import estimate_model_bytes
+
+PROFILE_VERSION = 2
+# 按准确度从低到高排列
+MODEL_LADDER = ("tiny", "base", "small", "medium", "large-v3")
+DEFAULT_TARGET_RTF = 0.5
+CALIBRATION_SECONDS = 30
+# 真实音频短于此长度时改用合成音频
+MIN_SAMPLE_SECONDS = 10
+# 校准最多尝试的模型数
+MAX_MODEL_STEPS = 3
+
+
+def probe_machine():
+    """硬件概况，同时作为判断保存的配置是否仍适用于本机的依据"""
+    gpu = get_gpu_info()
+    flags = cpu_flags()
+    machine = {
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "logical_cores": os.cpu_count() or 1,
+        "physical_cores": physical_cores(),
+        "cpu_flags": {k: v for k, v in flags.items() if k != "known"},
+        "ram_gb": round(total_ram_bytes() / 1024**3, 1),
+        "gpu": gpu["name"] if gpu else None,
+        "vram_gb": round(gpu["vram"], 1) if gpu else 0.0,
+    }
+    try:
+        import ctranslate2
+        machine["supported_compute_types"] = sorted(ctranslate2.get_supported_compute_types("cpu"))
+    except Exception:
+        machine["supported_compute_types"] = None
+    return machine
+
+
+def _machine_key(machine):
+    return [machine["logical_cores"], machine["gpu"], round(machine["ram_gb"])]
+
+
+def candidate_compute_types(machine, device):
+    if device == "cuda":
+        return ["float16", "int8_float16"] if machine["vram_gb"] >= 4 else ["int8_float16"]
+    supported = machine.get("supported_compute_types")
+    types = []
+    if supported is None or "int8" in supported:
+        # 没有 AVX2/NEON 时 int8 内核反而更慢，只作为候选之一参与测量
+        types.append("int8")
+    types.append("float32")
+    return types
+
+
+def candidate_threads(machine, device):
+    """每个模型实例的线程数候选"""
+    cores = machine["physical_cores"]
+    if device == "cuda":
+        return [min(4, cores)]
+    return sorted({cores, max(1, cores // 2), max(1, min(4, cores))})
+
+
+def models_that_fit(machine, device, compute_type):
+    budget = machine["vram_gb"] * 0.8 if device == "cuda" else machine["ram_gb"] * 0.5
+    return [m for m in MODEL_LADDER if estimate_model_bytes(m, compute_type) / 1024**3 <= budget]
+
+
+def starting_model(machine, device, fitting):
+    """首个校准的模型：按硬件档次估计，避免一上来就下载/测量过大的模型"""
+    if device == "cuda":
+        guess = "large-v3" if machine["vram_gb"] >= 8 else "medium" if machine["vram_gb"] >= 4 else "small"
+    else:
+        guess = "small" if machine["physical_cores"] >= 8 else "base"
+    while guess not in fitting and MODEL_LADDER.index(guess) > 0:
+        guess = MODEL_LADDER[MODEL_LADDER.index(guess) - 1]
+    return guess if guess in fitting else fitting[0]
+
+
+def calibration_clips(sample=None, log=None):
+    """
+    返回 (clips, 是否为真实音频)：有真实音频时截取开头 CALIBRATION_SECONDS 秒
+    合成的谐波信号几乎解码不出文字，测得的 RTF 明显偏乐观，只在没有真实音频时使用
+    """
+    import benchmark
+    if sample and os.path.isfile(sample):
+        from audio_ingest import decode_audio
+        try:
+            audio = decode_audio(sample, duration=CALIBRATION_SECONDS)
+            if len(audio) >= MIN_SAMPLE_SECONDS * SAMPLE_RATE:
+                return [(os.path.basename(sample), audio)], True
+        except Exception as e:
+            if log:
+                log(f"读取校准音频失败，改用合成音频: {e}", "WARNING")
+    return benchmark.load_clips((CALIBRATION_SECONDS,)), False
+
+
+def _choose(results, target_rtf):
+    """满足目标的配置中取最快的；都不满足时返回最快的一个"""
+    from benchmark import select_best
+    return select_best(results, max_rtf=target_rtf), select_best(results)
+
+
+def calibrate(target_rtf=DEFAULT_TARGET_RTF, device=None, language="en", log=None, cancel=None, sample=None):
+    """
+    从估计的模型开始：达标则尝试更大的模型，不达标则换更小的模型，最多测 MAX_MODEL_STEPS 个
+    sample 为用于校准的真实音频/视频文件；返回配置字典（见 apply_profile）
+    """
+    import benchmark
+    log = log or (lambda message, level="INFO": print(message, flush=True))
+    machine = probe_machine()
+    device = device or ("cuda" if machine["gpu"] else "cpu")
+    compute_types = candidate_compute_types(machine, device)
+    threads = candidate_threads(machine, device)
+    batch_sizes = [1, 8] if device == "cuda" else [1, 4]
+    fitting = models_that_fit(machine, device, compute_types[-1]) or ["tiny"]
+    log(f"🔍 硬件: {machine['physical_cores']} 物理核心 / {machine['logical_cores']} 线程"
+        f" | AVX2 {'✓' if machine['cpu_flags']['avx2'] else '✗'}"
+        f" | AVX-512 {'✓' if machine['cpu_flags']['avx512'] else '✗'}"
+        f" | 内存 {machine['ram_gb']}GB" + (f" | {machine['gpu']} {machine['vram_gb']}GB" if machine["gpu"] else ""),
+        "INFO")
+
+    clips, real = calibration_clips(sample, log)
+    if real:
+        log(f"🎧 校准音频: {clips[0][0]}（前 {len(clips[0][1]) / SAMPLE_RATE:.0f} 秒）", "INFO")
+    else:
+        log("⚠️ 没有真实音频，使用合成音频校准：合成信号解码出的文字很少，实际 RTF 通常更高"
+            "（可用 --sample 指定一段真实录音）", "WARNING")
+    model = starting_model(machine, device, fitting)
+    tried, best, fastest = {}, None, None
+    for _ in range(MAX_MODEL_STEPS):
+        if cancel is not None and cancel():
+            break
+        log(f"🧪 校准 {model}: 精度 {compute_types} × 线程 {threads} × 批大小 {batch_sizes}", "INFO")
+        results = benchmark.run_sweep([model], compute_types, [5], threads, batch_sizes, clips,
+                                      device=device, language=language, log=log)
+        tried[model], fastest = _choose(results, target_rtf)
+        index = MODEL_LADDER.index(model)
+        if tried[model]:
+            best = tried[model]
+            bigger = [m for m in fitting if MODEL_LADDER.index(m) > index and m not in tried]
+            if not bigger:
+                break
+            model = bigger[0]
+        else:
+            if best:
+                break
+            smaller = [m for m in fitting if MODEL_LADDER.index(m) < index and m not in tried]
+            if not smaller:
+                break
+            model = smaller[-1]
+
+    chosen = best or fastest
+    if not chosen:
+        raise RuntimeError("校准没有得到任何结果")
+    profile = {
+        "version": PROFILE_VERSION,
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "machine_key": _machine_key(machine),
+        "machine": machine,
+        "target_rtf": target_rtf,
+        "met_target": best is not None,
+        "device": device,
+        "model_size": chosen["model"],
+        "compute_type": chosen["compute_type"],
+        "cpu_threads": chosen["cpu_threads"],
+        "batch_size": chosen["batch_size"],
+        "beam_size": chosen["beam_size"],
+        "rtf": chosen["rtf"],
+        "calibration_audio": clips[0][0] if real else None,
+    }
+    log(f"✅ 调优结果: {describe(profile)}", "SUCCESS" if best else "WARNING")
+    return profile
+
+
+def profile_path():
+    from transcript_cache import cache_root
+    return cache_root() / "autotune.json"
+
+
+def save_profile(profile):
+    path = profile_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(profile, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+    return path
+
+
+def load_profile():
+    """读取已保存的配置；硬件变化或格式不符时返回 None"""
+    try:
+        with open(profile_path(), 'r', encoding='utf-8') as f:
+            profile = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if profile.get("version") != PROFILE_VERSION:
+        return None
+    if profile.get("machine_key") != _machine_key(probe_machine()):
+        return None
+    return profile
+
+
+def apply_profile(options, profile, include_model=True):
+    """把调优结果写入 TranscribeOptions；include_model=False 时保留用户选择的模型与批大小"""
+    if include_model:
+        options.model_size = profile["model_size"]
+        options.batch_size = profile["batch_size"]
+    # 设备单独指定：有显卡的机器上，CPU float32 配置也必须留在 CPU 上
+    options.device = profile["device"]
+    options.compute_mode = profile["compute_type"]
+    options.cpu_threads = profile["cpu_threads"]
+    options.beam_size = profile["beam_size"]
+    return options
+
+
+def describe(profile):
+    return (f"{profile['model_size']} / {profile['device']} {profile['compute_type']}"
+            f" | 线程 {profile['cpu_threads']} | 批大小 {profile['batch_size']}"
+            f" | RTF {profile['rtf']:.3f}（目标 {profile['target_rtf']}"
+            + ("" if profile.get("calibration_audio") else "，合成音频校准") + "）")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="硬件自动调优")
+    parser.add_argument("--target-rtf", type=float, default=DEFAULT_TARGET_RTF,
+                        help="目标实时率：用时 / 音频时长，越小越快")
+    parser.add_argument("--device", default=None, choices=["cpu", "cuda"])
+    parser.add_argument("--language", default="en")
+    parser.add_argument("--sample", default="", help="用于校准的真实音频/视频文件（强烈建议，合成音频测得的 RTF 偏乐观）")
+    parser.add_argument("--show", action="store_true", help="只显示已保存的配置")
+    args = parser.parse_args(argv)
+
+    if args.show:
+        profile = load_profile()
+        print(describe(profile) if profile else "尚未调优（或硬件已变化）")
+        return
+    profile = calibrate(args.target_rtf, args.device, args.language, sample=args.sample or None)
+    print(f"💾 已保存到: {save_profile(profile)}")
+
+
+if __name__ == "__main__":
+    main()
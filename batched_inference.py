@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+批量推理 - 每次前向计算解码多个 VAD 片段（基于 faster-whisper 的 BatchedInferencePipeline）
+"auto" 根据可用内存/显存确定上限，再用一段合成音频快速试探出吞吐最高的批大小
+需要 faster-whisper >= 1.1；旧版本自动退回逐段转录
+"""
+
+import threading
+import time
+
+from hardware import available_ram_bytes, available_vram_bytes
+
+BATCH_CHOICES = (1, 2, 4, 8, 16)
+# 每增加一个批内样本额外需要的内存（MB，float32 基准），来自编码器/解码器激活值的粗略估计
+PER_ITEM_MB = {
+    "tiny": 60,
+    "base": 90,
+    "small": 200,
+    "medium": 450,
+    "large-v1": 800,
+    "large-v2": 800,
+    "large-v3": 800,
+}
+# 试探用的音频长度（秒）
+PROBE_SECONDS = 60
+# 更大的批至少要快这么多才值得
+MIN_GAIN = 1.05
+
+_probe_results = {}
+# 正在试探的 (模型, 设备, 精度)；锁只保护这两个字典，试探本身在锁外进行
+_probing = set()
+_probe_lock = threading.Lock()
+
+
+def batched_supported():
+    try:
+        from faster_whisper import BatchedInferencePipeline  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def batched_pipeline(model):
+    from faster_whisper import BatchedInferencePipeline
+    return BatchedInferencePipeline(model=model)
+
+
+def memory_limited_batch_size(model_size, device, compute_type):
+    """按可用内存/显存估算的批大小上限"""
+    per_item = PER_ITEM_MB.get(model_size, PER_ITEM_MB["large-v3"]) * 1024**2
+    if compute_type in ("float16", "int8_float16", "bfloat16"):
+        per_item //= 2
+    free = available_vram_bytes() if device == "cuda" else available_ram_bytes()
+    # 只使用空闲内存的一半，给其他任务留出余量
+    limit = max(1, int(free * 0.5 // per_item))
+    return max(b for b in BATCH_CHOICES if b <= limit) if limit >= 1 else 1
+
+
+def probe_batch_size(model, limit, language="en", log=None):
+    """
+    在合成音频上依次尝试更大的批，吞吐不再明显提升时停止
+    与实际转录一样启用 VAD（批量推理只在启用 VAD 时使用），测得的吞吐才与真实调用一致
+    """
+    from benchmark import synthetic_clip
+    audio = synthetic_clip(PROBE_SECONDS, seed=42)
+    pipeline = batched_pipeline(model)
+    best_size, best_speed = 1, 0.0
+    for size in (b for b in BATCH_CHOICES if b <= limit):
+        started = time.perf_counter()
+        try:
+            segments, _ = pipeline.transcribe(audio, batch_size=size, beam_size=1, language=language,
+                                              vad_filter=True)
+            for _ in segments:
+                pass
+        except Exception as e:
+            if log:
+                log(f"批大小 {size} 试探失败: {e}", "WARNING")
+            break
+        speed = PROBE_SECONDS / (time.perf_counter() - started)
+        if log:
+            log(f"🔍 批大小 {size}: {speed:.1f}x 实时", "INFO")
+        if speed < best_speed * MIN_GAIN:
+            break
+        best_size, best_speed = size, speed
+    return best_size, best_speed
+
+
+def resolve_batch_size(setting, model, model_size, device, compute_type, log=None):
+    """
+    setting 为 0 表示 auto；结果按 模型×设备×精度 在进程内缓存
+    同一组合正在被其他任务试探时不等待，本任务先逐段转录（并发试探会互相干扰测量结果）
+    """
+    if not batched_supported():
+        if log:
+            log("当前 faster-whisper 不支持批量推理（需要 1.1 及以上），改为逐段转录", "WARNING")
+        return 1
+    if setting and setting > 0:
+        return setting
+    key = (model_size, device, compute_type)
+    with _probe_lock:
+        if key in _probe_results:
+            return _probe_results[key]
+        if key in _probing:
+            return 1
+        _probing.add(key)
+    try:
+        limit = memory_limited_batch_size(model_size, device, compute_type)
+        if log:
+            log(f"🔍 自动选择批大小（内存上限 {limit}）...", "INFO")
+        size, speed = probe_batch_size(model, limit, log=log)
+        if log:
+            log(f"✅ 批大小: {size}（试探吞吐 {speed:.1f}x 实时）", "SUCCESS")
+        with _probe_lock:
+            _probe_results[key] = size
+        return size
+    finally:
+        with _probe_lock:
+            _probing.discard(key)
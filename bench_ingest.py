@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+音频接入基准测试 - 对比旧流程（转码 192kbps MP3 后再解码）与新流程（原始流直接解码为 PCM）
+用法：
+    python bench_ingest.py video.mp4
+    python bench_ingest.py https://www.bilibili.com/video/BV... --cookies cookies.txt
+"""
+
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+
+from audio_ingest import decode_audio, download_native_audio
+from transcriber_engine import is_url
+
+
+def _dir_size(path):
+    return sum(os.path.getsize(os.path.join(root, name))
+               for root, _, files in os.walk(path) for name in files)
+
+
+def legacy_ingest(source, temp_dir, cookie_file=""):
+    """旧流程：yt-dlp 下载后转码 MP3，再由 faster-whisper（PyAV）解码；本地文件直接交给 PyAV"""
+    from faster_whisper.audio import decode_audio as av_decode
+    started = time.perf_counter()
+    if is_url(source):
+        import yt_dlp
+        ydl_opts = {
+            'outtmpl': os.path.join(temp_dir, 'audio.%(ext)s'),
+            'format': 'bestaudio/best',
+            'postprocessors': [{
+                'key': 'FFmpegExtractAudio',
+                'preferredcodec': 'mp3',
+                'preferredquality': '192',
+            }],
+            'quiet': True,
+            'no_warnings': True,
+            'noprogress': True,
+        }
+        if cookie_file:
+            ydl_opts['cookiefile'] = cookie_file
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            info = ydl.extract_info(source, download=True)
+            mp3_path = os.path.splitext(ydl.prepare_filename(info))[0] + ".mp3"
+    else:
+        mp3_path = source
+    fetched = time.perf_counter()
+    audio = av_decode(mp3_path)
+    return {
+        "fetch_s": fetched - started,
+        "decode_s": time.perf_counter() - fetched,
+        "total_s": time.perf_counter() - started,
+        "temp_bytes": _dir_size(temp_dir),
+        "samples": len(audio),
+    }
+
+
+def direct_ingest(source, temp_dir, cookie_file=""):
+    """新流程：下载原始音频流（本地文件直接读取），ffmpeg 一次解码为 16kHz PCM"""
+    started = time.perf_counter()
+    path = download_native_audio(source, temp_dir, cookie_file) if is_url(source) else source
+    fetched = time.perf_counter()
+    audio = decode_audio(path)
+    return {
+        "fetch_s": fetched - started,
+        "decode_s": time.perf_counter() - fetched,
+        "total_s": time.perf_counter() - started,
+        "temp_bytes": _dir_size(temp_dir),
+        "samples": len(audio),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="音频接入基准测试")
+    parser.add_argument("source", help="本地音视频文件或在线链接")
+    parser.add_argument("--cookies", default="")
+    parser.add_argument("--output", default="", help="结果写入 JSON 文件")
+    args = parser.parse_args()
+
+    results = {}
+    for name, func in [("legacy_mp3", legacy_ingest), ("direct_pcm", direct_ingest)]:
+        temp_dir = tempfile.mkdtemp()
+        try:
+            results[name] = func(args.source, temp_dir, args.cookies)
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+        r = results[name]
+        print(f"{name:>10}: 获取 {r['fetch_s']:.2f}s | 解码 {r['decode_s']:.2f}s | 合计 {r['total_s']:.2f}s"
+              f" | 临时文件 {r['temp_bytes'] / 1024**2:.1f}MB | 采样点 {r['samples']}")
+
+    legacy, direct = results["legacy_mp3"], results["direct_pcm"]
+    print(f"\n耗时节省: {legacy['total_s'] - direct['total_s']:.2f}s"
+          f"（{(1 - direct['total_s'] / legacy['total_s']) * 100 if legacy['total_s'] else 0:.0f}%）")
+    print(f"磁盘节省: {(legacy['temp_bytes'] - direct['temp_bytes']) / 1024**2:.1f}MB")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+启动耗时基准测试 - 在全新子进程中测量旧版启动方式（顶层导入 torch、逐个导入依赖）与当前延迟导入方式
+报告启动耗时、内存峰值，以及 -X importtime 中耗时最高的模块
+用法：
+    python bench_startup.py --repeat 5
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# 子进程最后打印内存峰值（KB，macOS 为字节）
+_REPORT_RSS = (
+    "import resource, sys; peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss;"
+    "print('RSS', peak // 1024 if sys.platform == 'darwin' else peak)"
+)
+
+SCENARIOS = {
+    # 旧版：模块顶层 import torch 检测显卡，main() 再 __import__ 每个依赖，其余与当前相同
+    "旧版 GUI 启动": (
+        "import torch; torch.cuda.is_available();"
+        "import faster_whisper, yt_dlp, working_transcriber_gpu"
+    ),
+    "当前 GUI 启动": (
+        "import working_transcriber_gpu;"
+        "from importlib.util import find_spec; from hardware import get_gpu_info;"
+        "get_gpu_info(); find_spec('faster_whisper'); find_spec('yt_dlp')"
+    ),
+    "命令行启动": "import transcribe_cli",
+}
+
+
+def run_scenario(code, repeat):
+    """返回 (最快耗时秒, 内存峰值MB)；依赖缺失时返回 None"""
+    best, rss = None, 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        proc = subprocess.run([sys.executable, "-c", code + ";" + _REPORT_RSS],
+                              cwd=HERE, capture_output=True, text=True)
+        elapsed = time.perf_counter() - started
+        if proc.returncode != 0:
+            print(f"  ⚠️ 运行失败: {proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else proc.returncode}")
+            return None
+        best = elapsed if best is None else min(best, elapsed)
+        for line in proc.stdout.splitlines():
+            if line.startswith("RSS "):
+                rss = int(line.split()[1]) / 1024
+    return best, rss
+
+
+def import_times(code, top=12):
+    """解析 -X importtime 输出，返回累计耗时最高的模块 [(模块, 毫秒), ...]（父模块包含子模块耗时）"""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                          cwd=HERE, capture_output=True, text=True)
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) == 3:
+            rows.append((parts[2].rstrip(), int(parts[1]) / 1000))
+    return sorted(((name.strip(), ms) for name, ms in rows), key=lambda r: r[1], reverse=True)[:top]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="启动耗时基准测试")
+    parser.add_argument("--repeat", type=int, default=3, help="每个场景运行次数（取最快一次）")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for name, code in SCENARIOS.items():
+        print(f"▶ {name}")
+        results[name] = run_scenario(code, args.repeat)
+        if results[name]:
+            elapsed, rss = results[name]
+            print(f"  耗时 {elapsed * 1000:.0f} ms | 内存峰值 {rss:.0f} MB")
+
+    legacy, current = results["旧版 GUI 启动"], results["当前 GUI 启动"]
+    if legacy and current:
+        print(f"\n🚀 启动加速 {legacy[0] / current[0]:.1f}x，内存减少 {legacy[1] - current[1]:.0f} MB")
+
+    print("\n当前 GUI 启动中导入最慢的模块：")
+    for module, ms in import_times(SCENARIOS["当前 GUI 启动"]):
+        print(f"  {ms:8.1f} ms  {module}")
+
+
+if __name__ == "__main__":
+    main()
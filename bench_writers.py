@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+输出格式基准测试 - 校验新时间戳格式化与旧版 _format_time 输出逐字一致，并对比速度
+用法：
+    python bench_writers.py
+"""
+
+import random
+import timeit
+
+from transcript_writers import format_timestamp
+
+
+def legacy_format_time(seconds):
+    """旧版 GPUTranscriber._format_time，原样保留用于对照"""
+    h = int(seconds // 3600)
+    m = int((seconds % 3600) // 60)
+    s = int(seconds % 60)
+    ms = int((seconds - int(seconds)) * 1000)
+    return f"{h:02d}:{m:02d}:{s:02d},{ms:03d}"
+
+
+def verify(samples=1_000_000):
+    rng = random.Random(0)
+    values = [0.0, 0.001, 0.999, 1.001, 59.999, 60.0, 3599.999, 3600.0, 36000.5]
+    # faster-whisper 的时间戳为 0.02 秒粒度的浮点数，重点覆盖
+    values += [round(i * 0.02, 2) for i in range(200_000)]
+    values += [rng.uniform(0, 36000) for _ in range(samples)]
+    mismatches = [v for v in values if format_timestamp(v) != legacy_format_time(v)]
+    print(f"校验 {len(values)} 个时间戳，不一致 {len(mismatches)} 个")
+    for v in mismatches[:10]:
+        print(f"  {v!r}: 新 {format_timestamp(v)} / 旧 {legacy_format_time(v)}")
+    return not mismatches
+
+
+def benchmark(number=200_000):
+    legacy = timeit.timeit("f(12345.678)", globals={"f": legacy_format_time}, number=number)
+    current = timeit.timeit("f(12345.678)", globals={"f": format_timestamp}, number=number)
+    print(f"旧版: {legacy / number * 1e9:.0f} ns/次 | 新版: {current / number * 1e9:.0f} ns/次"
+          f" | 加速 {legacy / current:.2f}x")
+
+
+if __name__ == "__main__":
+    ok = verify()
+    benchmark()
+    raise SystemExit(0 if ok else 1)
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+转录性能基准测试 - 可复现的参数扫描（CPU/GPU 均可运行）
+扫描 模型大小 × 计算精度 × beam_size × cpu_threads × 批大小，
+在固定的合成音频（或指定目录中的音频）上测量实时率、tokens/s、内存峰值与模型加载时间
+用法：
+    python benchmark.py --models tiny,small --compute-types float32,int8 --output bench.json
+"""
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import subprocess
+import time
+from datetime import datetime
+
+from audio_ingest import SAMPLE_RATE, decode_audio
+from hardware import PeakRssSampler, current_rss_bytes, total_ram_bytes
+
+DEFAULT_CLIP_SECONDS = (30, 120)
+
+
+def synthetic_clip(seconds, seed=0):
+    """
+    生成确定性的类语音信号：带共振峰的谐波“元音”、音节包络与停顿
+    不依赖任何外部文件，保证不同机器/版本之间可对比
+    """
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    n = int(seconds * SAMPLE_RATE)
+    t = np.arange(n, dtype=np.float32) / SAMPLE_RATE
+    audio = np.zeros(n, dtype=np.float32)
+
+    pos = 0
+    while pos < n:
+        # 一个“词”：0.2~0.6 秒，之后 0.05~0.8 秒停顿
+        length = int(rng.uniform(0.2, 0.6) * SAMPLE_RATE)
+        end = min(n, pos + length)
+        f0 = rng.uniform(100, 220)
+        seg_t = t[pos:end]
+        voice = np.zeros(end - pos, dtype=np.float32)
+        for formant, weight in ((rng.uniform(300, 900), 1.0), (rng.uniform(900, 2500), 0.5)):
+            harmonic = max(1, round(formant / f0))
+            voice += weight * np.sin(2 * np.pi * f0 * harmonic * seg_t)
+        envelope = np.sin(np.linspace(0, np.pi, end - pos, dtype=np.float32))
+        audio[pos:end] = 0.3 * voice * envelope
+        pos = end + int(rng.uniform(0.05, 0.8) * SAMPLE_RATE)
+
+    audio += 0.005 * rng.standard_normal(n).astype(np.float32)
+    return audio
+
+
+def load_clips(clip_seconds=DEFAULT_CLIP_SECONDS, clips_dir=None):
+    """返回 [(名称, PCM数组), ...]；指定目录时使用其中的音频"""
+    if clips_dir:
+        clips = []
+        for name in sorted(os.listdir(clips_dir)):
+            path = os.path.join(clips_dir, name)
+            if os.path.isfile(path):
+                clips.append((name, decode_audio(path)))
+        return clips
+    return [(f"synthetic_{s}s", synthetic_clip(s, seed=i)) for i, s in enumerate(clip_seconds)]
+
+
+def machine_info():
+    from hardware import get_gpu_info
+    info = {
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "ram_gb": round(total_ram_bytes() / 1024**3, 1),
+        "gpu": get_gpu_info(),
+    }
+    for module in ("faster_whisper", "ctranslate2"):
+        try:
+            info[module] = __import__(module).__version__
+        except Exception:
+            info[module] = None
+    try:
+        info["git_commit"] = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5,
+        ).stdout.strip() or None
+    except Exception:
+        info["git_commit"] = None
+    return info
+
+
+def _transcribe_clip(model, audio, beam_size, batch_size, language):
+    """转录一段音频，返回 (片段数, token 数)"""
+    if batch_size > 1:
+        from batched_inference import batched_pipeline
+        segments, _ = batched_pipeline(model).transcribe(
+            audio, beam_size=beam_size, batch_size=batch_size, language=language)
+    else:
+        segments, _ = model.transcribe(audio, beam_size=beam_size, language=language)
+    count = tokens = 0
+    for seg in segments:
+        count += 1
+        tokens += len(seg.tokens)
+    return count, tokens
+
+
+def run_sweep(models, compute_types, beam_sizes, cpu_threads, batch_sizes, clips,
+              device="cpu", language="en", repeat=1, log=None):
+    """执行参数扫描，返回结果列表；每个模型/精度/线程组合只加载一次模型"""
+    from faster_whisper import WhisperModel
+    log = log or (lambda message, level="INFO": print(message, flush=True))
+    audio_seconds = sum(len(audio) for _, audio in clips) / SAMPLE_RATE
+    results = []
+
+    for model_size, compute_type, threads in itertools.product(models, compute_types, cpu_threads):
+        rss_before = current_rss_bytes()
+        started = time.perf_counter()
+        try:
+            model = WhisperModel(model_size, device=device, compute_type=compute_type, cpu_threads=threads)
+        except Exception as e:
+            log(f"跳过 {model_size}/{compute_type}: {e}", "WARNING")
+            continue
+        load_time = time.perf_counter() - started
+        model_rss = current_rss_bytes() - rss_before
+        # 预热一次，避免首次推理的初始化开销计入结果
+        _transcribe_clip(model, clips[0][1][:SAMPLE_RATE * 5], 1, 1, language)
+
+        for beam_size, batch_size in itertools.product(beam_sizes, batch_sizes):
+            config = {
+                "model": model_size, "device": device, "compute_type": compute_type,
+                "beam_size": beam_size, "cpu_threads": threads, "batch_size": batch_size,
+            }
+            try:
+                walls = []
+                with PeakRssSampler() as sampler:
+                    for _ in range(repeat):
+                        segments = tokens = 0
+                        started = time.perf_counter()
+                        for _, audio in clips:
+                            s, t = _transcribe_clip(model, audio, beam_size, batch_size, language)
+                            segments += s
+                            tokens += t
+                        walls.append(time.perf_counter() - started)
+            except Exception as e:
+                log(f"跳过 {config}: {e}", "WARNING")
+                continue
+            wall = min(walls)
+            result = dict(config)
+            result.update({
+                "audio_seconds": round(audio_seconds, 2),
+                "wall_seconds": round(wall, 3),
+                "rtf": round(wall / audio_seconds, 4),
+                "speed": round(audio_seconds / wall, 2),
+                "tokens": tokens,
+                "tokens_per_second": round(tokens / wall, 1),
+                "segments": segments,
+                "load_seconds": round(load_time, 2),
+                "model_rss_mb": round(model_rss / 1024**2, 1),
+                "peak_rss_mb": round(sampler.peak / 1024**2, 1),
+            })
+            results.append(result)
+            log(f"🧪 {model_size}/{compute_type} beam={beam_size} threads={threads} batch={batch_size}: "
+                f"RTF {result['rtf']:.3f}（{result['speed']:.1f}x 实时）| {result['tokens_per_second']} tokens/s"
+                f" | 峰值内存 {result['peak_rss_mb']:.0f}MB | 加载 {load_time:.1f}s", "INFO")
+        del model
+    return results
+
+
+def select_best(results, model=None, max_rtf=None):
+    """选出实时率最低（最快）的配置；可限定模型或要求 RTF 不超过目标值"""
+    candidates = [r for r in results if model is None or r["model"] == model]
+    if max_rtf is not None:
+        candidates = [r for r in candidates if r["rtf"] <= max_rtf]
+    return min(candidates, key=lambda r: r["rtf"]) if candidates else None
+
+
+def save_report(path, results, clips, machine):
+    report = {
+        "version": 1,
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "machine": machine,
+        "clips": [{"name": name, "seconds": round(len(audio) / SAMPLE_RATE, 2)} for name, audio in clips],
+        "results": results,
+        "best": select_best(results),
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    return report
+
+
+def _csv(value, cast=str):
+    return [cast(v) for v in value.split(",") if v]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="转录性能基准测试")
+    parser.add_argument("--models", default="tiny,base", help="逗号分隔的模型大小")
+    parser.add_argument("--compute-types", default="", help="逗号分隔；默认 CPU: float32,int8 / GPU: float16,int8_float16")
+    parser.add_argument("--beam-sizes", default="1,5")
+    parser.add_argument("--cpu-threads", default="", help="逗号分隔；默认 核心数/2,核心数")
+    parser.add_argument("--batch-sizes", default="1")
+    parser.add_argument("--clip-seconds", default=",".join(str(s) for s in DEFAULT_CLIP_SECONDS),
+                        help="合成音频的长度（秒），逗号分隔")
+    parser.add_argument("--clips-dir", default="", help="使用目录中的真实音频代替合成音频")
+    parser.add_argument("--device", default="auto", choices=["auto", "cpu", "cuda"])
+    parser.add_argument("--language", default="en")
+    parser.add_argument("--repeat", type=int, default=1, help="每个配置重复次数（取最快一次）")
+    parser.add_argument("--output", default=f"benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    args = parser.parse_args(argv)
+
+    machine = machine_info()
+    device = args.device
+    if device == "auto":
+        device = "cuda" if machine["gpu"] else "cpu"
+    cores = os.cpu_count() or 1
+    compute_types = _csv(args.compute_types) or (["float16", "int8_float16"] if device == "cuda" else ["float32", "int8"])
+    cpu_threads = _csv(args.cpu_threads, int) or sorted({max(1, cores // 2), cores})
+
+    clips = load_clips(_csv(args.clip_seconds, float), args.clips_dir or None)
+    results = run_sweep(_csv(args.models), compute_types, _csv(args.beam_sizes, int), cpu_threads,
+                        _csv(args.batch_sizes, int), clips, device=device, language=args.language,
+                        repeat=args.repeat)
+    report = save_report(args.output, results, clips, machine)
+    best = report["best"]
+    if best:
+        print(f"\n🏆 最快配置: {best['model']}/{best['compute_type']} beam={best['beam_size']}"
+              f" threads={best['cpu_threads']} batch={best['batch_size']} → RTF {best['rtf']:.3f}")
+    print(f"💾 结果已保存到: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
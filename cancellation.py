@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+协作式取消与暂停 - 一个 CancelToken 贯穿下载、解码、模型加载与转录
+取消后：yt-dlp 在下一次进度回调时中止，ffmpeg 子进程被立即结束，
+等待中的模型加载被放弃（加载完成后仍留在模型缓存中），转录在当前片段结束后停止
+"""
+
+import threading
+
+
+class Cancelled(Exception):
+    """任务已被取消"""
+
+
+class CancelToken:
+    """
+    可直接当作 should_stop 回调使用：token() 返回是否已取消；
+    处于暂停状态时 token() 会阻塞到继续或取消为止，因此暂停点与检查点相同
+    poll 为可选的外部取消条件（例如进程间共享的取消标记），每次检查时一并查询
+    """
+
+    def __init__(self, poll=None):
+        self._poll = poll
+        self._cancelled = threading.Event()
+        self._running = threading.Event()
+        self._running.set()
+        self._lock = threading.Lock()
+        self._callbacks = []
+
+    @classmethod
+    def wrap(cls, should_stop):
+        """把普通的 should_stop 回调包装为 CancelToken（已是 CancelToken 时原样返回）"""
+        if isinstance(should_stop, CancelToken):
+            return should_stop
+        return cls(poll=should_stop)
+
+    @property
+    def cancelled(self):
+        if not self._cancelled.is_set() and self._poll is not None and self._poll():
+            self.cancel()
+        return self._cancelled.is_set()
+
+    @property
+    def paused(self):
+        return not self._running.is_set()
+
+    def cancel(self):
+        with self._lock:
+            if self._cancelled.is_set():
+                return
+            self._cancelled.set()
+            callbacks, self._callbacks = self._callbacks, []
+        # 唤醒暂停中的线程，让它们看到取消
+        self._running.set()
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                pass
+
+    def pause(self):
+        if not self._cancelled.is_set():
+            self._running.clear()
+
+    def resume(self):
+        self._running.set()
+
+    def on_cancel(self, callback):
+        """注册取消时立即执行的清理动作（如结束子进程），返回用于注销的函数"""
+        with self._lock:
+            if not self._cancelled.is_set():
+                self._callbacks.append(callback)
+                return lambda: self._remove(callback)
+        callback()
+        return lambda: None
+
+    def _remove(self, callback):
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    def wait_if_paused(self, poll_interval=0.2):
+        while not self._running.wait(poll_interval):
+            if self.cancelled:
+                return
+
+    def check(self):
+        """暂停时阻塞；已取消时抛出 Cancelled"""
+        self.wait_if_paused()
+        if self.cancelled:
+            raise Cancelled()
+
+    def __call__(self):
+        self.wait_if_paused()
+        return self.cancelled
+
+
+def ytdlp_progress_hook(token):
+    """yt-dlp 进度回调：每收到一块数据检查一次，暂停时挂起下载，取消时抛出异常中止下载"""
+    def hook(status):
+        token.check()
+    return hook
+
+
+def run_cancellable(fn, token, poll_interval=0.1):
+    """
+    在后台线程执行不可中断的调用（如模型加载），取消时立即放弃等待并抛出 Cancelled
+    被放弃的调用仍会在后台完成，结果不会丢失（例如进入模型缓存）
+    """
+    outcome = {}
+    done = threading.Event()
+
+    def worker():
+        try:
+            outcome["value"] = fn()
+        except BaseException as e:
+            outcome["error"] = e
+        finally:
+            done.set()
+
+    threading.Thread(target=worker, daemon=True).start()
+    while not done.wait(poll_interval):
+        if token.cancelled:
+            raise Cancelled()
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome["value"]
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+断点续转 - 转录片段实时追加写入日志（append-only journal）
+停止或崩溃后再次运行同一输入时，从最后完成的时间点定位音频继续转录
+"""
+
+import json
+import os
+import time
+
+from transcript_cache import cache_root
+from transcriber_engine import TranscriptSegment
+
+# 至少每隔多少秒执行一次 fsync
+FSYNC_INTERVAL = 2.0
+
+
+def file_fingerprint(path):
+    """本地文件的身份标识（无需解码即可得到，用于在解码前找到续转日志）"""
+    st = os.stat(path)
+    return f"file:{os.path.abspath(path)}:{st.st_size}:{st.st_mtime_ns}"
+
+
+class SegmentJournal:
+    """
+    每行一个 JSON：首行为 header，其余每行一个片段
+    写入中途崩溃时最后一行可能不完整，读取时忽略即可
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+        self._last_sync = 0.0
+
+    @classmethod
+    def for_key(cls, key):
+        directory = cache_root() / "journals"
+        directory.mkdir(parents=True, exist_ok=True)
+        return cls(directory / f"{key}.jsonl")
+
+    def load(self):
+        """扫描日志，返回 (header, 已完成片段数, 最后完成的时间点)；日志不存在时返回 (None, 0, 0.0)"""
+        header = None
+        count = 0
+        last_end = 0.0
+        for record in self._records():
+            if header is None:
+                header = record
+            else:
+                count += 1
+                last_end = record["e"]
+        return header, count, last_end
+
+    def _records(self):
+        try:
+            f = open(self.path, 'r', encoding='utf-8')
+        except OSError:
+            return
+        with f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    # 崩溃时写了一半的末行
+                    return
+
+    def iter_segments(self, limit=None):
+        """逐个读取已完成的片段，不整体载入内存"""
+        records = self._records()
+        next(records, None)
+        for index, record in enumerate(records):
+            if limit is not None and index >= limit:
+                return
+            yield TranscriptSegment(record["s"], record["e"], record["t"], record.get("w"))
+
+    def open(self, header, restored=0):
+        """开始写入；保留前 restored 个已完成片段，并去掉可能不完整的末行"""
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(header, ensure_ascii=False) + "\n")
+            for seg in self.iter_segments(restored):
+                f.write(self._encode(seg))
+        os.replace(tmp_path, self.path)
+        self._file = open(self.path, 'a', encoding='utf-8')
+
+    @staticmethod
+    def _encode(seg):
+        record = {"s": seg.start, "e": seg.end, "t": seg.text}
+        if seg.words:
+            record["w"] = seg.words
+        return json.dumps(record, ensure_ascii=False) + "\n"
+
+    def append(self, seg):
+        self._file.write(self._encode(seg))
+        self._file.flush()
+        now = time.monotonic()
+        if now - self._last_sync >= FSYNC_INTERVAL:
+            os.fsync(self._file.fileno())
+            self._last_sync = now
+
+    def close(self):
+        if self._file:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+            self._file = None
+
+    def discard(self):
+        """转录完成后删除日志"""
+        self.close()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+硬件信息 - 内存、显卡、进程占用等与平台相关的探测
+显卡探测不依赖 torch：依次尝试 pynvml、nvidia-smi、ctranslate2
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import threading
+
+_gpu_info = None
+_gpu_lock = threading.Lock()
+
+
+def _windows_memory_status():
+    import ctypes
+
+    class MEMORYSTATUSEX(ctypes.Structure):
+        _fields_ = [
+            ("dwLength", ctypes.c_ulong),
+            ("dwMemoryLoad", ctypes.c_ulong),
+            ("ullTotalPhys", ctypes.c_ulonglong),
+            ("ullAvailPhys", ctypes.c_ulonglong),
+            ("ullTotalPageFile", ctypes.c_ulonglong),
+            ("ullAvailPageFile", ctypes.c_ulonglong),
+            ("ullTotalVirtual", ctypes.c_ulonglong),
+            ("ullAvailVirtual", ctypes.c_ulonglong),
+            ("ullAvailExtendedVirtual", ctypes.c_ulonglong),
+        ]
+
+    status = MEMORYSTATUSEX()
+    status.dwLength = ctypes.sizeof(MEMORYSTATUSEX)
+    ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status))
+    return status
+
+
+def total_ram_bytes():
+    try:
+        return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+    except (AttributeError, ValueError, OSError):
+        pass
+    if sys.platform == "win32":
+        try:
+            return int(_windows_memory_status().ullTotalPhys)
+        except Exception:
+            pass
+    return 8 * 1024**3
+
+
+def physical_cores():
+    """物理核心数（超线程对 CTranslate2 推理帮助不大）"""
+    try:
+        import psutil
+        cores = psutil.cpu_count(logical=False)
+        if cores:
+            return cores
+    except ImportError:
+        pass
+    try:
+        with open("/proc/cpuinfo", 'r') as f:
+            pairs = set()
+            physical_id = core_id = None
+            for line in f:
+                if line.startswith("physical id"):
+                    physical_id = line.split(":")[1].strip()
+                elif line.startswith("core id"):
+                    core_id = line.split(":")[1].strip()
+                    pairs.add((physical_id, core_id))
+            if pairs:
+                return len(pairs)
+    except OSError:
+        pass
+    return os.cpu_count() or 1
+
+
+def cpu_flags():
+    """CPU 指令集支持情况：avx / avx2 / avx512 / vnni（int8 点积加速）"""
+    text = ""
+    try:
+        with open("/proc/cpuinfo", 'r') as f:
+            for line in f:
+                if line.startswith(("flags", "Features")):
+                    text = line.split(":", 1)[1]
+                    break
+    except OSError:
+        pass
+    if not text and sys.platform == "darwin":
+        try:
+            text = subprocess.run(["sysctl", "-n", "machdep.cpu.features", "machdep.cpu.leaf7_features"],
+                                  capture_output=True, text=True, timeout=5).stdout
+        except (OSError, subprocess.SubprocessError):
+            pass
+    if not text:
+        try:
+            import cpuinfo
+            text = " ".join(cpuinfo.get_cpu_info().get("flags", []))
+        except Exception:
+            pass
+    flags = set(text.lower().replace(".", "_").split())
+    return {
+        "avx": "avx" in flags or "avx1_0" in flags,
+        "avx2": "avx2" in flags,
+        "avx512": "avx512f" in flags,
+        "vnni": bool(flags & {"avx512_vnni", "avx512vnni", "avx_vnni", "avxvnni"}),
+        "neon": "neon" in flags or "asimd" in flags,
+        "known": bool(flags),
+    }
+
+
+def available_ram_bytes():
+    """当前可用内存（字节）"""
+    try:
+        import psutil
+        return psutil.virtual_memory().available
+    except ImportError:
+        pass
+    try:
+        with open("/proc/meminfo", 'r') as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+    if sys.platform == "win32":
+        try:
+            return int(_windows_memory_status().ullAvailPhys)
+        except Exception:
+            pass
+    return total_ram_bytes() // 2
+
+
+def _nvidia_smi(fields):
+    """查询第一块显卡，返回字段值列表；没有 nvidia-smi 时返回 None"""
+    executable = shutil.which("nvidia-smi")
+    if not executable:
+        return None
+    try:
+        output = subprocess.run(
+            [executable, f"--query-gpu={fields}", "--format=csv,noheader,nounits"],
+            capture_output=True, text=True, timeout=5,
+            creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0),
+        ).stdout
+    except (OSError, subprocess.SubprocessError):
+        return None
+    lines = output.strip().splitlines()
+    return [v.strip() for v in lines[0].split(",")] if lines else None
+
+
+def _probe_gpu():
+    try:
+        import pynvml
+        pynvml.nvmlInit()
+        handle = pynvml.nvmlDeviceGetHandleByIndex(0)
+        name = pynvml.nvmlDeviceGetName(handle)
+        info = {
+            "name": name.decode() if isinstance(name, bytes) else name,
+            "vram": pynvml.nvmlDeviceGetMemoryInfo(handle).total / 1024**3,
+            "cores": None,
+        }
+        try:
+            info["cores"] = pynvml.nvmlDeviceGetNumGpuCores(handle)
+        except Exception:
+            pass
+        return info
+    except Exception:
+        pass
+    values = _nvidia_smi("name,memory.total")
+    if values and len(values) >= 2:
+        try:
+            return {"name": values[0], "vram": float(values[1]) / 1024, "cores": None}
+        except ValueError:
+            pass
+    try:
+        import ctranslate2
+        if ctranslate2.get_cuda_device_count() > 0:
+            return {"name": "CUDA GPU", "vram": 0.0, "cores": None}
+    except Exception:
+        pass
+    return None
+
+
+def get_gpu_info():
+    """第一块 NVIDIA 显卡的 {name, vram(GB), cores}，没有时返回 None；结果在进程内缓存"""
+    global _gpu_info
+    with _gpu_lock:
+        if _gpu_info is None:
+            _gpu_info = _probe_gpu() or {}
+        return _gpu_info or None
+
+
+def available_vram_bytes():
+    """当前空闲显存（字节），无法获取时返回 0"""
+    try:
+        import pynvml
+        pynvml.nvmlInit()
+        return pynvml.nvmlDeviceGetMemoryInfo(pynvml.nvmlDeviceGetHandleByIndex(0)).free
+    except Exception:
+        pass
+    values = _nvidia_smi("memory.free")
+    if values:
+        try:
+            return int(float(values[0]) * 1024**2)
+        except ValueError:
+            pass
+    return 0
+
+
+def current_rss_bytes():
+    """当前进程常驻内存（字节）"""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm", 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+        # 无法取得当前值时退回历史峰值（Linux 单位 KB，macOS 单位字节）
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+    except ImportError:
+        return 0
+
+
+class PeakRssSampler:
+    """在一段代码执行期间以固定间隔采样，记录常驻内存峰值"""
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, current_rss_bytes())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self.peak = current_rss_bytes()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, current_rss_bytes())
+        return False
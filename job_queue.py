@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+任务队列 - 多个本地文件/在线链接并发转录
+使用按CPU核心数划分的进程池，每个工作进程固定 cpu_threads，避免 CTranslate2 超额订阅
+"""
+
+import itertools
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, replace
+
+from transcriber_engine import TranscriptionEngine, transcript_name_for
+from url_ingest import download_concurrency
+
+
+def plan_workers(cpu_threads=0, max_workers=0):
+    """根据核心数确定 (进程数, 每进程线程数)，保证 进程数 × 线程数 ≤ 核心数"""
+    cores = os.cpu_count() or 1
+    if cpu_threads <= 0:
+        cpu_threads = 4 if cores >= 8 else max(1, cores // 2)
+    cpu_threads = min(cpu_threads, cores)
+    workers = max(1, cores // cpu_threads)
+    if max_workers > 0:
+        workers = min(workers, max_workers)
+    return workers, cpu_threads
+
+
+@dataclass
+class Job:
+    """队列中的单个任务"""
+    job_id: int
+    source: str
+    status: str = "queued"
+    progress: float = 0.0
+    attempts: int = 0
+    error: str = ""
+    result: dict = None
+
+    @property
+    def finished(self):
+        return self.status in ("done", "failed", "cancelled")
+
+
+def storage_settings(options):
+    """
+    父进程中的缓存/归档/音频存储位置与容量上限
+    spawn 方式（Windows）启动的工作进程会重新创建这些单例，需要显式传入才能与父进程一致
+    """
+    settings = {}
+    if options.use_cache:
+        from transcript_cache import get_transcript_cache
+        cache = get_transcript_cache()
+        settings["cache"] = (str(cache.root), cache.max_bytes)
+    if options.download_archive:
+        from url_ingest import get_download_archive
+        archive = get_download_archive()
+        settings["archive"] = (str(archive.root), archive.max_bytes)
+    if options.audio_store:
+        from audio_store import get_audio_store
+        store = get_audio_store()
+        settings["audio_store"] = (str(store.root), store.max_bytes)
+    return settings
+
+
+# --- 工作进程 ---
+_events = None
+_cancel_flags = None
+
+
+def _init_worker(events, cancel_flags, storage, download_limit, download_slots):
+    global _events, _cancel_flags
+    _events = events
+    _cancel_flags = cancel_flags
+    from url_ingest import get_download_archive, set_download_concurrency
+    # 所有工作进程共用一个下载名额信号量，总下载并发与单进程时相同
+    set_download_concurrency(download_limit, download_slots)
+    if "cache" in storage:
+        from transcript_cache import get_transcript_cache
+        get_transcript_cache(*storage["cache"])
+    if "archive" in storage:
+        get_download_archive(*storage["archive"])
+    if "audio_store" in storage:
+        from audio_store import get_audio_store
+        get_audio_store(*storage["audio_store"])
+
+
+def _run_job(job_id, source, options):
+    """在工作进程中执行单个任务；模型由进程级缓存复用"""
+    def log(message, level="INFO"):
+        _events.put(("log", job_id, message, level))
+
+    last_sent = [0.0]
+
+    def on_segment(segment, info):
+        if info.duration <= 0:
+            return
+        progress = min(100.0, segment.end / info.duration * 100)
+        # 进度每变化 1% 才跨进程发送一次
+        if progress - last_sent[0] >= 1.0:
+            last_sent[0] = progress
+            _events.put(("progress", job_id, progress, None))
+
+    _events.put(("status", job_id, "running", None))
+    engine = TranscriptionEngine(options, log=log)
+    result = engine.transcribe_source(
+        source,
+        should_stop=lambda: _cancel_flags.get(job_id, False),
+        on_segment=on_segment,
+        base_name=transcript_name_for(source),
+    )
+    return result.summary()
+
+
+class JobQueue:
+    def __init__(self, options, workers=0, log=None, on_update=None):
+        self.workers, cpu_threads = plan_workers(options.cpu_threads, workers)
+        self.options = replace(options, cpu_threads=cpu_threads, num_workers=1)
+        self.log = log
+        self.on_update = on_update
+        self.jobs = OrderedDict()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._futures = {}
+
+        self._manager = multiprocessing.Manager()
+        self._events = self._manager.Queue()
+        self._cancel_flags = self._manager.dict()
+        download_limit = download_concurrency()
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(self._events, self._cancel_flags, storage_settings(self.options),
+                      download_limit, self._manager.BoundedSemaphore(download_limit)),
+        )
+        self._listener = threading.Thread(target=self._drain_events, daemon=True)
+        self._listener.start()
+        self._log(f"🧵 任务队列: {self.workers} 个进程 × {cpu_threads} 线程", "INFO")
+
+    def _log(self, message, level="INFO"):
+        if self.log:
+            self.log(message, level)
+
+    def _notify(self, job):
+        if self.on_update:
+            self.on_update(job)
+
+    # --- 提交 / 取消 / 重试 ---
+    def submit(self, source):
+        job = Job(job_id=next(self._ids), source=source)
+        with self._lock:
+            self.jobs[job.job_id] = job
+        self._start(job)
+        return job
+
+    def submit_many(self, sources):
+        return [self.submit(source) for source in sources]
+
+    def _start(self, job):
+        job.status = "queued"
+        job.progress = 0.0
+        job.error = ""
+        job.attempts += 1
+        self._cancel_flags[job.job_id] = False
+        future = self._pool.submit(_run_job, job.job_id, job.source, self.options)
+        with self._lock:
+            self._futures[job.job_id] = future
+        future.add_done_callback(lambda f, j=job: self._on_done(j, f))
+        self._notify(job)
+
+    def cancel(self, job_id):
+        job = self.jobs.get(job_id)
+        if not job or job.finished:
+            return False
+        future = self._futures.get(job_id)
+        if future and future.cancel():
+            # 尚未开始，直接从进程池移除
+            job.status = "cancelled"
+            self._notify(job)
+        else:
+            # 正在运行，通知工作进程在下一个片段处停止
+            self._cancel_flags[job_id] = True
+        self._log(f"⏹️ 取消任务 #{job_id}", "WARNING")
+        return True
+
+    def retry(self, job_id):
+        job = self.jobs.get(job_id)
+        if not job or job.status not in ("failed", "cancelled"):
+            return False
+        self._log(f"🔁 重试任务 #{job_id}（第 {job.attempts + 1} 次）", "INFO")
+        self._start(job)
+        return True
+
+    def _on_done(self, job, future):
+        if future.cancelled():
+            job.status = "cancelled"
+        elif future.exception() is not None:
+            job.status = "failed"
+            job.error = str(future.exception())
+        else:
+            summary = future.result()
+            job.result = summary
+            job.error = summary.get("error", "")
+            job.status = {"done": "done", "stopped": "cancelled"}.get(summary["status"], "failed")
+            if job.status == "done":
+                job.progress = 100.0
+        self._notify(job)
+
+    # --- 事件 ---
+    def _drain_events(self):
+        while True:
+            try:
+                kind, job_id, value, level = self._events.get()
+            except (EOFError, OSError):
+                return
+            if kind == "stop":
+                return
+            job = self.jobs.get(job_id)
+            if kind == "log":
+                self._log(f"[#{job_id}] {value}", level)
+            elif job is None or job.finished:
+                continue
+            elif kind == "status":
+                job.status = value
+                self._notify(job)
+            elif kind == "progress":
+                job.progress = value
+                self._notify(job)
+
+    # --- 生命周期 ---
+    def wait(self):
+        """等待所有任务（包括重试）完成"""
+        while True:
+            with self._lock:
+                pending = [f for f in self._futures.values() if not f.done()]
+            if not pending:
+                return list(self.jobs.values())
+            for future in pending:
+                try:
+                    future.result()
+                except Exception:
+                    pass
+
+    def shutdown(self, cancel_pending=True):
+        if cancel_pending:
+            for job_id in list(self.jobs):
+                self.cancel(job_id)
+        self._pool.shutdown(wait=True)
+        self._events.put(("stop", 0, None, None))
+        self._listener.join(timeout=2)
+        self._manager.shutdown()
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+转录服务压力测试 - 多个并发客户端提交任务并通过 SSE 等待结果
+报告任务延迟（提交到完成）的 p50/p90/p99、首个片段延迟、吞吐量与被拒绝次数
+用法：
+    python load_test.py --start-server --clients 4 --jobs-per-client 5
+    python load_test.py --url http://127.0.0.1:8765 --source https://example.com/video
+"""
+
+import argparse
+import io
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+import wave
+
+from audio_ingest import SAMPLE_RATE
+
+
+def synthetic_wav(seconds, seed=0):
+    """合成音频（与基准测试相同的信号）编码为 WAV 字节"""
+    import numpy as np
+    from benchmark import synthetic_clip
+    pcm = (np.clip(synthetic_clip(seconds, seed), -1, 1) * 32767).astype(np.int16)
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(SAMPLE_RATE)
+        f.writeframes(pcm.tobytes())
+    return buffer.getvalue()
+
+
+def percentile(values, p):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(p / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class Client:
+    def __init__(self, base_url, client_id, jobs, source=None, upload=None, max_retries=60):
+        self.base_url = base_url.rstrip("/")
+        self.client_id = client_id
+        self.jobs = jobs
+        self.source = source
+        self.upload = upload
+        self.max_retries = max_retries
+        self.records = []
+        self.rejected = 0
+
+    def _submit(self):
+        if self.source:
+            body = json.dumps({"source": self.source}).encode('utf-8')
+            url, content_type = f"{self.base_url}/jobs", "application/json"
+        else:
+            body = self.upload
+            url, content_type = f"{self.base_url}/jobs?filename=clip.wav", "audio/wav"
+        for _ in range(self.max_retries):
+            request = urllib.request.Request(url, data=body, method="POST", headers={
+                "Content-Type": content_type, "X-Client-Id": self.client_id})
+            try:
+                with urllib.request.urlopen(request, timeout=60) as response:
+                    return json.load(response)
+            except urllib.error.HTTPError as e:
+                if e.code != 429:
+                    raise
+                # 准入控制拒绝：按 Retry-After 退避后重试
+                self.rejected += 1
+                time.sleep(float(e.headers.get("Retry-After", 1)))
+        raise RuntimeError("多次重试后仍被拒绝")
+
+    def _wait(self, job_id, submitted):
+        """读取 SSE 直到 done 事件，返回 (首个片段时间, 完成信息)"""
+        first_segment = None
+        event = None
+        with urllib.request.urlopen(f"{self.base_url}/jobs/{job_id}/events", timeout=3600) as response:
+            for raw in response:
+                line = raw.decode('utf-8').rstrip("\n")
+                if line.startswith("event: "):
+                    event = line[7:]
+                elif line.startswith("data: "):
+                    if event == "segment" and first_segment is None:
+                        first_segment = time.perf_counter() - submitted
+                    elif event == "done":
+                        return first_segment, json.loads(line[6:])
+        raise RuntimeError("事件流意外结束")
+
+    def run(self):
+        for _ in range(self.jobs):
+            submitted = time.perf_counter()
+            try:
+                job = self._submit()
+                first_segment, done = self._wait(job["id"], submitted)
+                result = done.get("result") or {}
+                self.records.append({
+                    "status": done["status"],
+                    "latency": time.perf_counter() - submitted,
+                    "first_segment": first_segment,
+                    "queue_seconds": done.get("queue_seconds"),
+                    "audio_duration": result.get("audio_duration", 0.0),
+                })
+            except Exception as e:
+                self.records.append({"status": "error", "error": str(e),
+                                     "latency": time.perf_counter() - submitted})
+
+
+def wait_for_server(base_url, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(f"{base_url}/health", timeout=2) as response:
+                return json.load(response)
+        except OSError:
+            time.sleep(0.3)
+    raise RuntimeError(f"服务未在 {timeout}s 内启动: {base_url}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="转录服务压力测试")
+    parser.add_argument("--url", default="http://127.0.0.1:8765")
+    parser.add_argument("--clients", type=int, default=4)
+    parser.add_argument("--jobs-per-client", type=int, default=5)
+    parser.add_argument("--source", default="", help="服务端可访问的链接/路径；默认上传合成音频")
+    parser.add_argument("--clip-seconds", type=float, default=30)
+    parser.add_argument("--start-server", action="store_true", help="在本机启动一个临时服务")
+    parser.add_argument("--server-args", default="--workers 2 --model tiny --no-cache",
+                        help="--start-server 时传给 server.py 的参数")
+    parser.add_argument("--output", default="", help="将结果写入 JSON")
+    args = parser.parse_args(argv)
+
+    server = None
+    if args.start_server:
+        port = args.url.rstrip("/").rsplit(":", 1)[-1]
+        server = subprocess.Popen([sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "server.py"),
+                                   "--port", port] + args.server_args.split(),
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        health = wait_for_server(args.url)
+        print(f"🌐 服务: {health['workers']} 个并发名额，模型 {health['model']}")
+        upload = None if args.source else synthetic_wav(args.clip_seconds)
+        clients = [Client(args.url, f"load-{i}", args.jobs_per_client, args.source or None, upload)
+                   for i in range(args.clients)]
+        threads = [threading.Thread(target=c.run) for c in clients]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall = time.perf_counter() - started
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+
+    records = [r for c in clients for r in c.records]
+    done = [r for r in records if r["status"] == "done"]
+    latencies = [r["latency"] for r in done]
+    firsts = [r["first_segment"] for r in done if r["first_segment"] is not None]
+    audio = sum(r["audio_duration"] for r in done)
+    report = {
+        "clients": args.clients,
+        "jobs": len(records),
+        "done": len(done),
+        "failed": len(records) - len(done),
+        "rejected": sum(c.rejected for c in clients),
+        "wall_seconds": round(wall, 3),
+        "jobs_per_second": round(len(done) / wall, 3),
+        "audio_per_second": round(audio / wall, 2),
+        "latency_p50": percentile(latencies, 50),
+        "latency_p90": percentile(latencies, 90),
+        "latency_p99": percentile(latencies, 99),
+        "first_segment_p50": percentile(firsts, 50),
+        "first_segment_p99": percentile(firsts, 99),
+    }
+    print(f"任务 {report['done']}/{report['jobs']} 完成，被拒绝 {report['rejected']} 次，用时 {wall:.1f}s")
+    if latencies:
+        print(f"延迟 p50 {report['latency_p50']:.2f}s | p90 {report['latency_p90']:.2f}s"
+              f" | p99 {report['latency_p99']:.2f}s")
+    if firsts:
+        print(f"首个片段 p50 {report['first_segment_p50']:.2f}s | p99 {report['first_segment_p99']:.2f}s")
+    print(f"吞吐 {report['jobs_per_second']:.2f} 任务/秒 | {report['audio_per_second']:.1f} 音频秒/秒")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return 0 if report["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
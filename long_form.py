@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+长音频分块转录 - 在 VAD 检测到的静音处切分，多块并行转录后按绝对时间拼接
+"""
+
+import bisect
+import re
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+from audio_ingest import SAMPLE_RATE
+from transcriber_engine import to_transcript_segment
+
+# 找不到足够长的静音、只能硬切时，相邻块之间的重叠（秒）
+HARD_CUT_OVERLAP = 2.0
+# 语言检测使用的音频长度（秒）
+LANGUAGE_PROBE_SECONDS = 30
+
+
+def detect_speech(audio, min_silence_s=0.5):
+    """返回语音区间列表 [(start_sample, end_sample), ...]"""
+    from faster_whisper.vad import VadOptions, get_speech_timestamps
+    options = VadOptions(min_silence_duration_ms=int(min_silence_s * 1000))
+    return [(ts["start"], ts["end"]) for ts in get_speech_timestamps(audio, options)]
+
+
+def plan_chunks(total_samples, speech, chunk_seconds=600, max_chunk_seconds=None):
+    """
+    在静音处规划切分点，返回 [(start, end, keep_from, keep_until), ...]（单位：采样点）
+    拼接时每块只保留中点落在 [keep_from, keep_until) 内的片段
+    """
+    target = int(chunk_seconds * SAMPLE_RATE)
+    limit = int((max_chunk_seconds or chunk_seconds * 1.5) * SAMPLE_RATE)
+    overlap = int(HARD_CUT_OVERLAP * SAMPLE_RATE)
+
+    # 候选切分点：相邻语音区间之间静音的中点
+    gaps = [(prev_end + next_start) // 2 for (_, prev_end), (next_start, _) in zip(speech, speech[1:])]
+
+    chunks = []
+    start = keep_from = 0
+    while total_samples - keep_from > limit:
+        index = bisect.bisect_left(gaps, keep_from + target)
+        if index < len(gaps) and gaps[index] <= keep_from + limit:
+            cut = gaps[index]
+            chunks.append((start, cut, keep_from, cut))
+            start = keep_from = cut
+        else:
+            # 没有合适的静音：硬切，相邻块各向外重叠一段，拼接时按中点归属并去重
+            cut = keep_from + limit
+            chunks.append((start, min(total_samples, cut + overlap), keep_from, cut))
+            start, keep_from = cut - overlap, cut
+    chunks.append((start, total_samples, keep_from, total_samples + 1))
+    return chunks
+
+
+def _normalize(text):
+    return re.sub(r"[\W_]+", "", text).lower()
+
+
+class LongFormTranscriber:
+    """model 可以是 WhisperModel，也可以是 BatchedInferencePipeline（两者 transcribe 接口一致）"""
+
+    def __init__(self, model, transcribe_kwargs, workers=2, chunk_seconds=600, log=None):
+        self.model = model
+        self.transcribe_kwargs = dict(transcribe_kwargs)
+        self.workers = max(1, workers)
+        self.chunk_seconds = chunk_seconds
+        self.log = log or (lambda message, level="INFO": None)
+
+    def _transcribe_chunk(self, audio, chunk, should_stop):
+        chunk_start, chunk_end, keep_from, keep_until = chunk
+        offset = chunk_start / SAMPLE_RATE
+        if should_stop():
+            # 已取消时尚未开始的块直接跳过
+            return []
+        segments, _ = self.model.transcribe(audio[chunk_start:chunk_end], **self.transcribe_kwargs)
+        results = []
+        for seg in segments:
+            if should_stop():
+                break
+            if not keep_from <= (seg.start + seg.end + 2 * offset) / 2 * SAMPLE_RATE < keep_until:
+                continue
+            results.append(to_transcript_segment(seg, offset))
+        return results
+
+    def transcribe(self, audio, should_stop=None, speech=None):
+        """
+        返回 (按时间顺序产出 TranscriptSegment 的生成器, info)
+        speech 为已知的语音区间（如 vad_index 的结果），省略时用 Silero VAD 检测
+        """
+        should_stop = should_stop or (lambda: False)
+        if speech is None:
+            # audio_store.AudioView 在切片时才转换为 ndarray（ndarray 的切片不复制）
+            speech = detect_speech(audio[:])
+        chunks = plan_chunks(len(audio), speech, self.chunk_seconds)
+
+        if self.transcribe_kwargs.get("language") is None and speech:
+            # 只检测一次语言，避免各块检测结果不一致
+            probe_start = speech[0][0]
+            probe_kwargs = {"batch_size": 1} if "batch_size" in self.transcribe_kwargs else {}
+            _, probe_info = self.model.transcribe(
+                audio[probe_start:probe_start + LANGUAGE_PROBE_SECONDS * SAMPLE_RATE], beam_size=1, **probe_kwargs)
+            self.transcribe_kwargs["language"] = probe_info.language
+            self.log(f"🌐 检测到语言: {probe_info.language}", "INFO")
+
+        self.log(f"✂️ 长音频分为 {len(chunks)} 块，{self.workers} 个工作线程并行转录", "INFO")
+        info = SimpleNamespace(duration=len(audio) / SAMPLE_RATE,
+                               language=self.transcribe_kwargs.get("language"))
+        return self._stitch(audio, chunks, should_stop), info
+
+    def _stitch(self, audio, chunks, should_stop):
+        pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="chunk")
+        futures = []
+        try:
+            futures += [pool.submit(self._transcribe_chunk, audio, chunk, should_stop) for chunk in chunks]
+            last_end = 0.0
+            last_text = ""
+            for future in futures:
+                if should_stop():
+                    break
+                for seg in future.result():
+                    # 去除重叠区域中重复的边界文本
+                    text = _normalize(seg.text)
+                    if text and text == last_text and seg.start < last_end + HARD_CUT_OVERLAP:
+                        continue
+                    last_end, last_text = seg.end, text
+                    yield seg
+        finally:
+            for future in futures:
+                future.cancel()
+            pool.shutdown(wait=False)
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+运行指标采集 - 固定间隔采样转录速度与资源占用
+采集：音频秒/秒、字/秒、片段/秒、进程CPU、常驻内存、GPU 使用率/温度/显存（如可用）
+结果推送给订阅者（GUI 通过 window.after 更新界面），并可同时导出为 JSONL 时间序列
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+
+from hardware import current_rss_bytes
+
+# 超过这么多秒没有新片段且CPU空闲，判定为停滞
+STALL_SECONDS = 10.0
+# 平均占满多少个核心视为计算受限
+COMPUTE_BUSY_CORES = 0.8
+
+
+def _nvml_handle():
+    try:
+        import pynvml
+        pynvml.nvmlInit()
+        return pynvml, pynvml.nvmlDeviceGetHandleByIndex(0)
+    except Exception:
+        return None, None
+
+
+class MetricsCollector:
+    def __init__(self, interval=1.0, export_path=None):
+        self.interval = interval
+        self.export_path = export_path
+        self._lock = threading.Lock()
+        self._subscribers = []
+        self._stop = threading.Event()
+        self._thread = None
+        self._export = None
+        self._nvml, self._gpu = None, None
+
+        self._audio_seconds = 0.0
+        self._chars = 0
+        self._segments = 0
+        self._positions = {}
+        self._last_progress = time.monotonic()
+        self.latest = None
+
+    def subscribe(self, callback):
+        """callback(sample: dict)，在采样线程中调用"""
+        self._subscribers.append(callback)
+
+    def record_segment(self, segment, key=None):
+        """每产出一个片段调用一次；key 区分并行的多个任务（同一任务的时间位置单调递增）"""
+        with self._lock:
+            previous = self._positions.get(key, 0.0)
+            if segment.end > previous:
+                self._audio_seconds += segment.end - previous
+                self._positions[key] = segment.end
+            self._chars += len(segment.text.strip())
+            self._segments += 1
+            self._last_progress = time.monotonic()
+
+    def start(self):
+        if self._thread:
+            return self
+        if self.export_path:
+            os.makedirs(os.path.dirname(os.path.abspath(self.export_path)), exist_ok=True)
+            self._export = open(self.export_path, 'a', encoding='utf-8')
+        self._nvml, self._gpu = _nvml_handle()
+        self._prev = (time.monotonic(), time.process_time(), 0.0, 0, 0)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="metrics")
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if not self._thread:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self._sample_once()
+        if self._export:
+            self._export.close()
+            self._export = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample_once()
+
+    def _sample_once(self):
+        now, cpu = time.monotonic(), time.process_time()
+        with self._lock:
+            audio, chars, segments, last_progress = self._audio_seconds, self._chars, self._segments, self._last_progress
+        prev_now, prev_cpu, prev_audio, prev_chars, prev_segments = self._prev
+        self._prev = (now, cpu, audio, chars, segments)
+        wall = max(now - prev_now, 1e-6)
+
+        busy_cores = (cpu - prev_cpu) / wall
+        sample = {
+            "time": round(time.time(), 3),
+            "audio_per_second": round((audio - prev_audio) / wall, 3),
+            "chars_per_second": round((chars - prev_chars) / wall, 2),
+            "segments_per_second": round((segments - prev_segments) / wall, 3),
+            "audio_seconds": round(audio, 2),
+            "segments": segments,
+            "cpu_percent": round(busy_cores / (os.cpu_count() or 1) * 100, 1),
+            "busy_cores": round(busy_cores, 2),
+            "rss_mb": round(current_rss_bytes() / 1024**2, 1),
+        }
+        sample.update(self._device_metrics())
+
+        if busy_cores >= COMPUTE_BUSY_CORES:
+            sample["state"] = "compute"
+        elif now - last_progress >= STALL_SECONDS:
+            sample["state"] = "stalled"
+        else:
+            sample["state"] = "io"
+        self.latest = sample
+
+        if self._export:
+            self._export.write(json.dumps(sample) + "\n")
+            self._export.flush()
+        for callback in self._subscribers:
+            try:
+                callback(sample)
+            except Exception:
+                pass
+
+    def _device_metrics(self):
+        metrics = {}
+        if self._gpu is not None:
+            try:
+                nvml, handle = self._nvml, self._gpu
+                memory = nvml.nvmlDeviceGetMemoryInfo(handle)
+                metrics["gpu_percent"] = nvml.nvmlDeviceGetUtilizationRates(handle).gpu
+                metrics["gpu_temp_c"] = nvml.nvmlDeviceGetTemperature(handle, nvml.NVML_TEMPERATURE_GPU)
+                metrics["vram_used_gb"] = round(memory.used / 1024**3, 2)
+                metrics["vram_total_gb"] = round(memory.total / 1024**3, 2)
+            except Exception:
+                pass
+        elif "torch" in sys.modules:
+            # 没有 NVML 时退回 torch 统计（只包含 torch 自身分配的显存）
+            try:
+                torch = sys.modules["torch"]
+                if torch.cuda.is_available():
+                    metrics["vram_used_gb"] = round(torch.cuda.memory_reserved() / 1024**3, 2)
+                    metrics["vram_total_gb"] = round(torch.cuda.get_device_properties(0).total_memory / 1024**3, 2)
+            except Exception:
+                pass
+        return metrics
+
+
+STATE_TEXT = {"compute": "计算中", "io": "等待I/O", "stalled": "停滞"}
+
+
+def describe(sample):
+    """性能面板显示用的一行摘要"""
+    return (f"音频 {sample['audio_per_second']:.1f} 秒/秒 | 片段 {sample['segments_per_second']:.1f}/秒"
+            f" | CPU {sample['cpu_percent']:.0f}% | 内存 {sample['rss_mb']:.0f}MB"
+            f" | {STATE_TEXT.get(sample['state'], sample['state'])}")
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+模型缓存 - 进程级 WhisperModel 缓存
+按 (模型大小, 设备, 计算精度) 缓存已加载模型，超出内存/显存预算时按 LRU 淘汰
+并发工作数不足或 CPU 线程数不同时重新加载（两者都在加载时固定）
+"""
+
+import gc
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+from hardware import get_gpu_info, total_ram_bytes
+
+
+# 各模型参数量（百万）
+MODEL_PARAMS_M = {
+    "tiny": 39,
+    "base": 74,
+    "small": 244,
+    "medium": 769,
+    "large-v1": 1550,
+    "large-v2": 1550,
+    "large-v3": 1550,
+}
+BYTES_PER_PARAM = {
+    "float32": 4,
+    "float16": 2,
+    "bfloat16": 2,
+    "int8_float32": 1,
+    "int8_float16": 1,
+    "int8": 1,
+}
+# 运行时缓冲区等额外开销
+MEMORY_OVERHEAD = 1.3
+
+
+def estimate_model_bytes(model_size, compute_type):
+    """估算模型加载后占用的内存/显存（字节）"""
+    params = MODEL_PARAMS_M.get(model_size, MODEL_PARAMS_M["large-v3"]) * 1e6
+    return int(params * BYTES_PER_PARAM.get(compute_type, 4) * MEMORY_OVERHEAD)
+
+
+def default_budget(device):
+    """默认预算：内存的一半 / 显存的 80%"""
+    if device == "cuda":
+        gpu = get_gpu_info()
+        if gpu and gpu["vram"]:
+            return int(gpu["vram"] * 1024**3 * 0.8)
+        return 4 * 1024**3
+    return int(total_ram_bytes() * 0.5)
+
+
+class _Entry:
+    __slots__ = ("model", "size_bytes", "num_workers", "cpu_threads", "load_time")
+
+    def __init__(self, model, size_bytes, num_workers, cpu_threads, load_time):
+        self.model = model
+        self.size_bytes = size_bytes
+        self.num_workers = num_workers
+        self.cpu_threads = cpu_threads
+        self.load_time = load_time
+
+    def usable(self, device, cpu_threads, num_workers):
+        # GPU 上 cpu_threads 不影响推理
+        return self.num_workers >= num_workers and (device != "cpu" or self.cpu_threads == cpu_threads)
+
+
+class ModelCache:
+    def __init__(self, budgets=None, log=None):
+        self.budgets = dict(budgets or {})
+        self.log = log
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "last_load_time": 0.0,
+            "total_load_time": 0.0,
+        }
+
+    def _log(self, log, message, level="INFO"):
+        log = log or self.log
+        if log:
+            log(message, level)
+
+    def budget_for(self, device):
+        if device not in self.budgets:
+            self.budgets[device] = default_budget(device)
+        return self.budgets[device]
+
+    def used_bytes(self, device):
+        return sum(e.size_bytes for k, e in self._entries.items() if k[1] == device)
+
+    def get(self, model_size, device, compute_type, cpu_threads=0, num_workers=1, log=None):
+        """返回已缓存的模型；未命中时加载并放入缓存"""
+        key = (model_size, device, compute_type)
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        # 同一个 key 只允许一个线程加载，其余线程等待并命中缓存
+        with key_lock:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and entry.usable(device, cpu_threads, num_workers):
+                    self._entries.move_to_end(key)
+                    self.stats["hits"] += 1
+                    self._log(log, f"♻️ 模型缓存命中: {model_size}/{device}/{compute_type}", "INFO")
+                    return entry.model
+                self.stats["misses"] += 1
+                if entry is not None:
+                    # 已缓存实例的并发工作数不足或 CPU 线程数不同，需要重新加载
+                    num_workers = max(num_workers, entry.num_workers)
+                    del self._entries[key]
+                size_bytes = estimate_model_bytes(model_size, compute_type)
+                self._evict_for(device, size_bytes, log)
+
+            from faster_whisper import WhisperModel
+            started = time.perf_counter()
+            model = WhisperModel(model_size, device=device, compute_type=compute_type,
+                                 cpu_threads=cpu_threads, num_workers=max(1, num_workers))
+            load_time = time.perf_counter() - started
+
+            with self._lock:
+                self._entries[key] = _Entry(model, size_bytes, max(1, num_workers), cpu_threads, load_time)
+                self.stats["last_load_time"] = load_time
+                self.stats["total_load_time"] += load_time
+            self._log(log, f"📦 模型缓存未命中: {model_size}/{device}/{compute_type}，加载用时 {load_time:.1f}s", "INFO")
+            return model
+
+    def _evict_for(self, device, size_bytes, log=None):
+        """按 LRU 淘汰同一设备上的模型，直到放得下新模型（需持有 self._lock）"""
+        budget = self.budget_for(device)
+        evicted = False
+        while self._entries and self.used_bytes(device) + size_bytes > budget:
+            victim = next((k for k in self._entries if k[1] == device), None)
+            if victim is None:
+                break
+            del self._entries[victim]
+            self.stats["evictions"] += 1
+            evicted = True
+            self._log(log, f"🗑️ 淘汰模型: {'/'.join(victim)}", "INFO")
+        if evicted:
+            self._release_memory(device)
+
+    def _release_memory(self, device):
+        gc.collect()
+        if device == "cuda" and "torch" in sys.modules:
+            try:
+                sys.modules["torch"].cuda.empty_cache()
+            except Exception:
+                pass
+
+    def warm_up(self, model_size, device, compute_type, cpu_threads=0, num_workers=1, log=None):
+        """加载模型并对一秒静音做一次推理，预热内核与内存分配"""
+        model = self.get(model_size, device, compute_type, cpu_threads, num_workers, log)
+        try:
+            import numpy as np
+            started = time.perf_counter()
+            segments, _ = model.transcribe(np.zeros(16000, dtype=np.float32), beam_size=1, language="en")
+            for _ in segments:
+                pass
+            self._log(log, f"🔥 模型预热完成，用时 {time.perf_counter() - started:.1f}s", "INFO")
+        except Exception as e:
+            self._log(log, f"模型预热失败: {e}", "WARNING")
+        return model
+
+    def clear(self):
+        with self._lock:
+            devices = {k[1] for k in self._entries}
+            self._entries.clear()
+        for device in devices:
+            self._release_memory(device)
+
+    def describe(self):
+        """性能面板显示用的简短状态"""
+        s = self.stats
+        return (f"模型缓存: 命中 {s['hits']} | 未命中 {s['misses']}"
+                f" | 加载 {s['last_load_time']:.1f}s | 已缓存 {len(self._entries)}")
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_model_cache():
+    """进程级单例"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ModelCache()
+        return _cache
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+下载预取流水线 - 在线链接的下载与转录重叠执行
+下载阶段拥有独立的并发上限，通过预取数量与临时磁盘占用上限实现背压
+"""
+
+import os
+import queue
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+
+from cancellation import CancelToken
+from transcriber_engine import is_url
+
+
+@dataclass
+class PrefetchedItem:
+    """已准备好、可直接转录的输入"""
+    source: str
+    input_file: str = None
+    temp_dir: str = None
+    size_bytes: int = 0
+    holds_slot: bool = False
+    error: str = ""
+    # 下载归档中的条目在释放前不会被淘汰
+    resources: ExitStack = field(default_factory=ExitStack)
+
+
+def _dir_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+class DownloadPrefetcher:
+    """
+    生产者：后台线程按顺序发起下载（最多 concurrency 个并发）
+    消费者：迭代本对象，按完成顺序取得已就绪的输入，转录完成后调用 release()
+    """
+
+    def __init__(self, engine, sources, concurrency=2, max_prefetch=4,
+                 max_temp_bytes=2 * 1024**3, should_stop=None):
+        self.engine = engine
+        self.sources = list(sources)
+        self.concurrency = max(1, concurrency)
+        self.max_temp_bytes = max_temp_bytes
+        self.should_stop = CancelToken.wrap(should_stop) if should_stop else CancelToken()
+
+        self._ready = queue.Queue()
+        # 已下载但尚未释放的条目数量上限
+        self._slots = threading.Semaphore(max(1, max_prefetch))
+        self._disk = threading.Condition()
+        self._temp_bytes = 0
+        self._pool = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="prefetch")
+        self._feeder = threading.Thread(target=self._feed, daemon=True)
+        self._feeder.start()
+
+    @property
+    def temp_bytes(self):
+        return self._temp_bytes
+
+    def _feed(self):
+        for source in self.sources:
+            if self.should_stop():
+                self._ready.put(PrefetchedItem(source=source, error="已停止"))
+                continue
+            if not is_url(source):
+                self._ready.put(PrefetchedItem(source=source, input_file=source))
+                continue
+            self._slots.acquire()
+            with self._disk:
+                # 临时目录占用超出上限时，等待消费者释放
+                while self._temp_bytes >= self.max_temp_bytes and not self.should_stop():
+                    self._disk.wait(timeout=1.0)
+            self._pool.submit(self._download, source)
+        self._pool.shutdown(wait=False)
+
+    def _download(self, source):
+        item = PrefetchedItem(source=source, holds_slot=True)
+        try:
+            if self.engine.has_cached_transcript(source) or self.engine.has_stored_audio(source):
+                # 已有缓存结果或解码好的音频，无需下载
+                self._ready.put(item)
+                return
+            item.temp_dir = tempfile.mkdtemp()
+            self.engine.log(f"⬇️ 预取下载: {source}", "INFO")
+            item.input_file = self.engine.download_audio_from_url(source, item.temp_dir, self.should_stop,
+                                                                  item.resources)
+            if not item.input_file or not os.path.exists(item.input_file):
+                item.error = "音频下载失败"
+                item.size_bytes = _dir_size(item.temp_dir)
+            else:
+                # 按返回文件的实际大小计入：启用下载归档时文件已移出 temp_dir，但在释放前同样占用磁盘
+                item.size_bytes = os.path.getsize(item.input_file)
+            with self._disk:
+                self._temp_bytes += item.size_bytes
+        except Exception as e:
+            item.error = str(e)
+        self._ready.put(item)
+
+    def __iter__(self):
+        for _ in range(len(self.sources)):
+            yield self._ready.get()
+
+    def release(self, item):
+        """转录完成后释放临时文件、归档条目与预取名额"""
+        item.resources.close()
+        if item.temp_dir is not None:
+            shutil.rmtree(item.temp_dir, ignore_errors=True)
+            with self._disk:
+                self._temp_bytes -= item.size_bytes
+                self._disk.notify_all()
+        if item.holds_slot:
+            self._slots.release()
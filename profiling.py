@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+性能分析 - 按阶段计时（下载、解码、模型加载、VAD/语言检测、首个片段、后续解码、写出）
+生成单个任务或整批任务的 JSON / HTML 报告，可选附带任务的 cProfile 结果
+"""
+
+import html
+import io
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict
+from datetime import datetime
+
+# 报告中的阶段顺序与中文名
+STAGES = {
+    "cache_lookup": "缓存查找/读取",
+    "download": "下载",
+    "decode": "音频解码",
+    "speech_index": "语音索引（能量 VAD）",
+    "model_load": "模型加载",
+    "batch_probe": "批大小试探",
+    "vad": "VAD/语言检测",
+    "first_segment": "首个片段（编码+首次解码）",
+    "transcribe": "后续解码",
+    "write": "写出结果",
+}
+
+_hardware = None
+_hardware_lock = threading.Lock()
+
+
+class StageTimer:
+    """累计每个阶段的耗时（秒）；同一阶段可多次进入"""
+
+    def __init__(self):
+        self.stages = {}
+
+    def add(self, name, seconds):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started)
+
+    def timed_segments(self, segments, first="first_segment", rest="transcribe"):
+        """
+        包装惰性的片段生成器，只统计生成器内部（推理）的耗时，不含调用方的写出时间
+        faster-whisper 不单独暴露编码器/解码器耗时，首个片段的延迟近似为 编码 + 首次解码
+        """
+        iterator = iter(segments)
+        name = first
+        try:
+            while True:
+                started = time.perf_counter()
+                try:
+                    segment = next(iterator)
+                except StopIteration:
+                    self.add(name, time.perf_counter() - started)
+                    return
+                self.add(name, time.perf_counter() - started)
+                name = rest
+                yield segment
+        finally:
+            # 提前停止时关闭底层生成器，释放推理占用的资源
+            if hasattr(iterator, "close"):
+                iterator.close()
+
+    def as_dict(self):
+        return {name: round(seconds, 4) for name, seconds in self.stages.items()}
+
+
+def hardware_info():
+    """机器与 GPU 信息（同一进程内只采集一次）"""
+    global _hardware
+    with _hardware_lock:
+        if _hardware is None:
+            from benchmark import machine_info
+            _hardware = machine_info()
+        return _hardware
+
+
+def job_report(summary):
+    """单个任务的报告（输入为 JobResult.summary()，进程池任务同样适用）：各阶段耗时，未计入部分记为 other"""
+    stages = dict(summary.get("stages") or {})
+    wall_time = summary.get("wall_time", 0.0)
+    audio = summary.get("audio_duration", 0.0)
+    accounted = sum(stages.values())
+    if wall_time > accounted:
+        stages["other"] = round(wall_time - accounted, 4)
+    return {
+        "source": summary["source"],
+        "status": summary["status"],
+        "error": summary.get("error", ""),
+        "audio_duration": audio,
+        "wall_time": wall_time,
+        "rtf": round(wall_time / audio, 4) if audio else None,
+        "segments": summary.get("segments", 0),
+        "batch_size": summary.get("batch_size", 1),
+        "stages": stages,
+        "cprofile": summary.get("cprofile_file") or None,
+    }
+
+
+def batch_report(summaries, options, wall_time=None):
+    """整批任务的报告，附带配置与硬件信息；各阶段为所有任务的合计（并行时合计可能大于总用时）"""
+    jobs = [job_report(s) for s in summaries]
+    totals = {}
+    for job in jobs:
+        for name, seconds in job["stages"].items():
+            totals[name] = round(totals.get(name, 0.0) + seconds, 4)
+    audio = sum(job["audio_duration"] for job in jobs if job["status"] == "done")
+    wall_time = wall_time if wall_time is not None else sum(job["wall_time"] for job in jobs)
+    return {
+        "version": 1,
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "config": asdict(options),
+        "hardware": hardware_info(),
+        "jobs": jobs,
+        "totals": {
+            "jobs": len(jobs),
+            "done": sum(1 for job in jobs if job["status"] == "done"),
+            "audio_duration": round(audio, 3),
+            "wall_time": round(wall_time, 3),
+            "throughput": round(audio / wall_time, 3) if wall_time > 0 else 0.0,
+            "stages": totals,
+        },
+    }
+
+
+# 进程内同一时刻只能有一个 cProfile（Python 3.12+ 基于 sys.monitoring，再启用一个会抛出 ValueError）
+_cprofile_lock = threading.Lock()
+
+
+@contextmanager
+def cprofile_capture(path):
+    """
+    在 cProfile 下运行，结束后写入 .prof 文件（可用 snakeviz 等工具查看）
+    已有其他任务在分析时不等待，yield None，调用方照常运行但不做分析
+    注意：Python 3.12+ 会记录进程内所有线程，并发任务的耗时也会计入
+    """
+    import cProfile
+    if not _cprofile_lock.acquire(blocking=False):
+        yield None
+        return
+    try:
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # 其他分析工具（调试器、覆盖率等）已经启用
+            yield None
+            return
+        try:
+            yield profiler
+        finally:
+            profiler.disable()
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            profiler.dump_stats(path)
+    finally:
+        _cprofile_lock.release()
+
+
+def top_functions(path, limit=25):
+    """.prof 文件中累计耗时最高的函数（文本）"""
+    import pstats
+    stream = io.StringIO()
+    pstats.Stats(path, stream=stream).sort_stats("cumulative").print_stats(limit)
+    return stream.getvalue()
+
+
+def _stage_rows(stages, wall_time):
+    rows = []
+    names = [n for n in STAGES if n in stages] + [n for n in stages if n not in STAGES]
+    for name in names:
+        seconds = stages[name]
+        percent = seconds / wall_time * 100 if wall_time > 0 else 0
+        label = STAGES.get(name, "其他" if name == "other" else name)
+        rows.append(
+            f"<tr><td>{html.escape(label)}</td><td>{seconds:.3f}s</td><td>{percent:.1f}%</td>"
+            f"<td><div class='bar' style='width:{min(percent, 100):.1f}%'></div></td></tr>")
+    return "\n".join(rows)
+
+
+def render_html(report):
+    totals = report["totals"]
+    parts = [
+        "<!DOCTYPE html><html><head><meta charset='utf-8'><title>性能报告</title>",
+        "<style>body{font-family:'Microsoft YaHei',sans-serif;margin:24px}"
+        "table{border-collapse:collapse;margin-bottom:16px}td,th{border:1px solid #ccc;padding:4px 8px}"
+        ".bar{background:#3498db;height:12px}td:last-child{width:240px}pre{background:#f5f5f5;padding:8px}</style>",
+        "</head><body>",
+        f"<h1>📊 性能报告</h1><p>{html.escape(report['timestamp'])}</p>",
+        f"<p>任务 {totals['done']}/{totals['jobs']} 完成，音频 {totals['audio_duration']:.1f}s，"
+        f"用时 {totals['wall_time']:.1f}s，吞吐 {totals['throughput']:.2f} 音频秒/秒</p>",
+        "<h2>阶段合计</h2><table><tr><th>阶段</th><th>耗时</th><th>占比</th><th></th></tr>",
+        _stage_rows(totals["stages"], sum(job["wall_time"] for job in report["jobs"])),
+        "</table>",
+    ]
+    for job in report["jobs"]:
+        parts.append(f"<h2>{html.escape(job['source'])}</h2>")
+        rtf = f"{job['rtf']:.3f}" if job["rtf"] else "--"
+        parts.append(f"<p>状态 {html.escape(job['status'])}，音频 {job['audio_duration']:.1f}s，"
+                     f"用时 {job['wall_time']:.1f}s，RTF {rtf}，片段 {job['segments']}，批大小 {job['batch_size']}</p>")
+        parts.append("<table><tr><th>阶段</th><th>耗时</th><th>占比</th><th></th></tr>")
+        parts.append(_stage_rows(job["stages"], job["wall_time"]))
+        parts.append("</table>")
+        if job["cprofile"] and os.path.exists(job["cprofile"]):
+            parts.append(f"<details><summary>cProfile（{html.escape(job['cprofile'])}）</summary>"
+                         f"<pre>{html.escape(top_functions(job['cprofile']))}</pre></details>")
+    parts.append("<h2>配置</h2><pre>" + html.escape(json.dumps(report["config"], ensure_ascii=False, indent=2)) + "</pre>")
+    parts.append("<h2>硬件</h2><pre>" + html.escape(json.dumps(report["hardware"], ensure_ascii=False, indent=2)) + "</pre>")
+    parts.append("</body></html>")
+    return "\n".join(parts)
+
+
+def save_report(report, path):
+    """写入 JSON 与同名 HTML，返回 (json路径, html路径)"""
+    base, _ = os.path.splitext(path)
+    os.makedirs(os.path.dirname(os.path.abspath(base)), exist_ok=True)
+    json_path, html_path = base + ".json", base + ".html"
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    with open(html_path, 'w', encoding='utf-8') as f:
+        f.write(render_html(report))
+    return json_path, html_path
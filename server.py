@@ -0,0 +1,622 @@
+#!/usr/bin/env python3
+"""
+本地转录服务 - 多个客户端共用一组常驻模型的 HTTP 接口
+    POST   /jobs                  提交任务：JSON {"source": 链接或服务器路径, "language", "model", ...}
+                                  或直接上传音频（Content-Type: audio/* 或 application/octet-stream）
+    GET    /jobs/<id>             任务状态（排队位置、进度、结果摘要）
+    GET    /jobs/<id>/events      SSE 流式推送片段（支持 Last-Event-ID / ?from= 断点续传）
+    GET    /jobs/<id>/transcript  完整文本（?format=json 返回片段列表）
+    DELETE /jobs/<id>             取消任务（POST /jobs/<id>/cancel 亦可）
+    GET    /health                队列、工作线程与模型缓存状态
+    GET    /search?q=...&limit=   全文搜索已完成的转录（需 --word-index），返回来源与毫秒偏移
+同一模型 × 设备 × 精度只加载一次，按工作线程数设置 num_workers 供所有任务并发使用；
+排队按客户端轮转（公平队列），超出队列容量或单客户端上限时返回 429
+内存中每个任务只保留最近的片段，更早的片段（以及已完成任务的全部片段）从任务的 .jsonl 输出读取
+用法：
+    python server.py --port 8765 --workers 2 --model small
+"""
+
+import argparse
+import itertools
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field, replace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+from cancellation import CancelToken
+from transcriber_engine import TranscribeOptions, TranscriptionEngine, default_log, is_url
+from transcript_writers import JsonlWriter, TranscriptWriterSet
+from url_ingest import set_download_concurrency
+
+ALLOWED_MODELS = ("tiny", "base", "small", "medium", "large-v2", "large-v3")
+# Whisper 支持的语言代码（与 faster_whisper.tokenizer 一致），在入队前校验，避免任务到工作线程中才失败
+ALLOWED_LANGUAGES = frozenset("""
+    auto en zh de es ru ko fr ja pt tr pl ca nl ar sv it id hi fi vi he uk el ms cs ro da hu ta no th ur hr bg
+    lt la mi ml cy sk te fa lv bn sr az sl kn et mk br eu is hy ne mn bs kk sq sw gl mr pa si km sn yo so af
+    oc ka be tg sd gu am yi lo uz fo ht ps tk nn mt sa lb my bo tl mg as tt haw ln ha ba jw su yue
+""".split())
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+# SSE 无新片段时的保活间隔（秒）
+KEEPALIVE_SECONDS = 15
+# 运行中任务在内存中保留的最近片段数；更早的片段必定已刷新到 .jsonl.part
+TAIL_SEGMENTS = 200
+assert TAIL_SEGMENTS > TranscriptWriterSet.FLUSH_EVERY
+# 从文件补发片段时每批读取的数量
+REPLAY_BATCH = 500
+
+
+class Rejected(Exception):
+    """准入控制拒绝：status 为 HTTP 状态码"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def parse_bool(name, value):
+    """JSON 中的布尔值或查询参数中的字符串（1/true/yes/on 与 0/false/no/off）"""
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in ("1", "true", "yes", "on"):
+        return True
+    if text in ("0", "false", "no", "off", ""):
+        return False
+    raise Rejected(400, f"{name} 必须是布尔值: {value}")
+
+
+@dataclass(eq=False)
+class ServerJob:
+    job_id: str
+    client: str
+    source: str
+    options: TranscribeOptions
+    status: str = "queued"
+    progress: float = 0.0
+    duration: float = 0.0
+    segment_count: int = 0
+    # 最近的片段（只含 start/end/text）；任务成功完成后清空，全部从输出文件读取
+    tail: deque = field(default_factory=lambda: deque(maxlen=TAIL_SEGMENTS))
+    result: dict = None
+    error: str = ""
+    temp_dir: str = None
+    created: float = field(default_factory=time.time)
+    started: float = None
+    finished_at: float = None
+    token: CancelToken = field(default_factory=CancelToken)
+    changed: threading.Condition = field(default_factory=threading.Condition)
+
+    @property
+    def finished(self):
+        return self.status in ("done", "failed", "cancelled")
+
+    def notify(self):
+        with self.changed:
+            self.changed.notify_all()
+
+    @property
+    def jsonl_path(self):
+        return os.path.join(self.options.output_dir, f"job_{self.job_id}{JsonlWriter.extension}")
+
+    def records(self, first, limit=REPLAY_BATCH):
+        """
+        从第 first 个片段起最多 limit 个 (序号, 片段字典)
+        不在内存缓冲区中的片段从 .jsonl（运行中为 .jsonl.part）读取；文件中没有时（任务被取消）跳到缓冲区开头
+        """
+        with self.changed:
+            tail_start = self.segment_count - len(self.tail)
+            if first >= tail_start:
+                skip = first - tail_start
+                return [(first + i, r) for i, r in enumerate(itertools.islice(self.tail, skip, skip + limit))]
+        last = min(tail_start, first + limit)
+        # 读取期间 .part 可能正好被重命名为最终文件
+        for path in (self.jsonl_path, self.jsonl_path + ".part", self.jsonl_path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    lines = itertools.islice(f, first, last)
+                    records = [(first + i, json.loads(line)) for i, line in enumerate(lines)]
+            except FileNotFoundError:
+                continue
+            if records:
+                return records
+            break
+        return self.records(tail_start, limit) if self.tail else []
+
+    def describe(self, position=None):
+        info = {
+            "id": self.job_id,
+            "client": self.client,
+            "source": self.source,
+            "status": self.status,
+            "progress": round(self.progress, 1),
+            "segments": self.segment_count,
+            "created": self.created,
+            "queue_seconds": round((self.started or time.time()) - self.created, 3),
+            "error": self.error,
+        }
+        if position is not None:
+            info["position"] = position
+        if self.finished_at:
+            info["latency"] = round(self.finished_at - self.created, 3)
+        if self.result:
+            info["result"] = self.result
+        return info
+
+
+class FairQueue:
+    """按客户端轮转出队，避免单个客户端的大批任务饿死其他客户端"""
+
+    def __init__(self, max_pending=64, max_per_client=8):
+        self.max_pending = max_pending
+        self.max_per_client = max_per_client
+        self._clients = OrderedDict()
+        self._size = 0
+        self._cond = threading.Condition()
+
+    def __len__(self):
+        return self._size
+
+    def put(self, job):
+        with self._cond:
+            if self._size >= self.max_pending:
+                raise Rejected(429, "服务繁忙，队列已满")
+            pending = self._clients.setdefault(job.client, deque())
+            if len(pending) >= self.max_per_client:
+                raise Rejected(429, f"每个客户端最多排队 {self.max_per_client} 个任务")
+            pending.append(job)
+            self._size += 1
+            self._cond.notify()
+
+    def get(self, stop):
+        with self._cond:
+            while not self._size:
+                if stop.is_set():
+                    return None
+                self._cond.wait(timeout=0.5)
+            client, pending = next(iter(self._clients.items()))
+            job = pending.popleft()
+            self._size -= 1
+            # 轮到的客户端移到队尾
+            del self._clients[client]
+            if pending:
+                self._clients[client] = pending
+            return job
+
+    def remove(self, job):
+        with self._cond:
+            pending = self._clients.get(job.client)
+            if pending and job in pending:
+                pending.remove(job)
+                self._size -= 1
+                if not pending:
+                    del self._clients[job.client]
+                return True
+            return False
+
+    def position(self, job):
+        """按轮转顺序估算的排队位置（从 1 开始）"""
+        with self._cond:
+            pending = self._clients.get(job.client)
+            if not pending or job not in pending:
+                return None
+            rank = pending.index(job)
+            ahead = rank
+            passed_own = False
+            for client, queue in self._clients.items():
+                if client == job.client:
+                    passed_own = True
+                    continue
+                # 排在本客户端之前的客户端在每一轮中都先出队
+                ahead += min(len(queue), rank if passed_own else rank + 1)
+            return ahead + 1
+
+
+class TranscriptionService:
+    def __init__(self, options, workers=2, max_pending=64, max_per_client=8, max_upload_bytes=2 * 1024**3,
+                 allow_local_files=False, max_finished=1000, log=None):
+        # 所有任务共用 workers 个并发名额；模型按此设置 num_workers，只加载一次
+        # 片段的补发与 /transcript 依赖 .jsonl 输出（仅作回放用，不为此额外计算词级时间戳）
+        self.options = replace(options, num_workers=max(1, workers), save_jsonl=True, jsonl_words=False)
+        self.workers = max(1, workers)
+        self.max_upload_bytes = max_upload_bytes
+        self.allow_local_files = allow_local_files
+        self.max_finished = max_finished
+        self.log = log or default_log
+        self.queue = FairQueue(max_pending, max_per_client)
+        self.jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self, warm_up=True):
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker, daemon=True, name=f"transcribe-{i}")
+            thread.start()
+            self._threads.append(thread)
+        if warm_up:
+            threading.Thread(target=TranscriptionEngine(self.options, log=self.log).warm_up, daemon=True).start()
+        self.log(f"🌐 转录服务: {self.workers} 个并发名额，模型 {self.options.model_size}", "INFO")
+
+    def shutdown(self):
+        self._stop.set()
+        with self._lock:
+            jobs = list(self.jobs.values())
+        for job in jobs:
+            self.cancel(job.job_id)
+
+    # --- 提交 / 取消 ---
+    def submit(self, client, source=None, upload=None, settings=None):
+        """source 为链接或本地路径；upload 为 (文件流, 字节数, 扩展名) 形式的上传音频"""
+        settings = settings or {}
+        options = self.options
+        model = settings.get("model")
+        if model:
+            if model not in ALLOWED_MODELS:
+                raise Rejected(400, f"不支持的模型: {model}")
+            options = replace(options, model_size=model)
+        language = settings.get("language")
+        if language:
+            if not isinstance(language, str) or language not in ALLOWED_LANGUAGES:
+                raise Rejected(400, f"不支持的语言: {language}")
+            options = replace(options, language=language)
+        if "vad_filter" in settings:
+            options = replace(options, vad_filter=parse_bool("vad_filter", settings["vad_filter"]))
+
+        job_id = f"{next(self._ids):06d}"
+        options = replace(options, output_dir=os.path.join(self.options.output_dir, job_id))
+        job = ServerJob(job_id=job_id, client=client, source=source or "upload", options=options)
+        if upload is not None:
+            # 上传保存在一次性的临时路径，按路径保存的解码音频与语音索引不可能再被命中
+            job.options = replace(options, audio_store=False, persist_inputs=False)
+            job.temp_dir = tempfile.mkdtemp(prefix="upload_")
+            try:
+                job.source = self._save_upload(upload, job.temp_dir)
+            except Exception:
+                shutil.rmtree(job.temp_dir, ignore_errors=True)
+                raise
+        elif not source:
+            raise Rejected(400, "缺少 source")
+        elif not is_url(source):
+            if not self.allow_local_files:
+                raise Rejected(403, "服务未开启本地文件访问（--allow-local-files）")
+            if not os.path.isfile(source):
+                raise Rejected(404, f"文件不存在: {source}")
+
+        try:
+            self.queue.put(job)
+        except Rejected:
+            if job.temp_dir:
+                shutil.rmtree(job.temp_dir, ignore_errors=True)
+            raise
+        with self._lock:
+            self.jobs[job.job_id] = job
+            self._evict_finished()
+        self.log(f"📥 [{job.job_id}] {client}: {job.source}（排队 {len(self.queue)}）", "INFO")
+        return job
+
+    def _save_upload(self, upload, temp_dir):
+        stream, length, extension = upload
+        if length <= 0:
+            raise Rejected(400, "上传文件为空")
+        if length > self.max_upload_bytes:
+            raise Rejected(413, f"上传文件超过 {self.max_upload_bytes / 1024**2:.0f}MB")
+        path = os.path.join(temp_dir, "audio" + extension)
+        remaining = length
+        with open(path, 'wb') as f:
+            while remaining > 0:
+                data = stream.read(min(UPLOAD_CHUNK_BYTES, remaining))
+                if not data:
+                    raise Rejected(400, "上传不完整")
+                f.write(data)
+                remaining -= len(data)
+        return path
+
+    def _evict_finished(self):
+        finished = [job_id for job_id, job in self.jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            del self.jobs[job_id]
+
+    def get(self, job_id):
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        if not job or job.finished:
+            return False
+        if self.queue.remove(job):
+            self._finish(job, "cancelled")
+        else:
+            job.token.cancel()
+        return True
+
+    # --- 执行 ---
+    def _worker(self):
+        while not self._stop.is_set():
+            job = self.queue.get(self._stop)
+            if job is None:
+                return
+            job.status = "running"
+            job.started = time.time()
+            job.notify()
+            try:
+                engine = TranscriptionEngine(job.options, log=lambda m, l="INFO", j=job: self.log(f"[{j.job_id}] {m}", l))
+                result = engine.transcribe_source(job.source, should_stop=job.token,
+                                                  on_segment=lambda s, info, j=job: self._on_segment(j, s, info),
+                                                  base_name=f"job_{job.job_id}")
+                job.result = result.summary()
+                job.error = result.error
+                status = {"done": "done", "stopped": "cancelled"}.get(result.status, "failed")
+            except Exception as e:
+                job.error = str(e)
+                status = "failed"
+            self._finish(job, status)
+
+    def _on_segment(self, job, segment, info):
+        with job.changed:
+            job.tail.append({"start": round(segment.start, 3), "end": round(segment.end, 3), "text": segment.text})
+            job.segment_count += 1
+            job.duration = info.duration
+            if info.duration:
+                job.progress = min(100.0, segment.end / info.duration * 100)
+            job.changed.notify_all()
+
+    def _finish(self, job, status):
+        if job.temp_dir:
+            shutil.rmtree(job.temp_dir, ignore_errors=True)
+        with job.changed:
+            job.status = status
+            job.finished_at = time.time()
+            if status == "done":
+                job.progress = 100.0
+                # 全部片段已在最终的 .jsonl 中
+                job.tail.clear()
+            job.changed.notify_all()
+        self.log(f"🏁 [{job.job_id}] {status}（{job.finished_at - job.created:.1f}s）",
+                 "SUCCESS" if status == "done" else "WARNING")
+
+    def health(self):
+        from model_cache import get_model_cache
+        with self._lock:
+            running = sum(1 for job in self.jobs.values() if job.status == "running")
+        return {
+            "workers": self.workers,
+            "running": running,
+            "queued": len(self.queue),
+            "max_pending": self.queue.max_pending,
+            "model": self.options.model_size,
+            "model_cache": get_model_cache().describe(),
+        }
+
+
+def _segment_json(index, record):
+    return json.dumps({"index": index, "start": record["start"], "end": record["end"],
+                       "text": record["text"]}, ensure_ascii=False)
+
+
+def _iter_records(job):
+    """按顺序逐批产出任务当前的全部片段"""
+    sent = 0
+    while True:
+        batch = job.records(sent)
+        if not batch:
+            return
+        yield from batch
+        sent = batch[-1][0] + 1
+
+
+class TranscriptionHandler(BaseHTTPRequestHandler):
+    service = None
+    server_version = "VideoTranscriber/1.0"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _client_id(self):
+        return self.headers.get("X-Client-Id") or self.client_address[0]
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        if status == 429:
+            self.send_header("Retry-After", "5")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _route(self):
+        parts = [p for p in urlparse(self.path).path.split("/") if p]
+        job = self.service.get(parts[1]) if len(parts) >= 2 and parts[0] == "jobs" else None
+        return parts, job
+
+    def do_GET(self):
+        parts, job = self._route()
+        if parts == ["health"]:
+            return self._send_json(200, self.service.health())
+        if parts == ["search"]:
+            return self._search()
+        if parts == ["jobs"]:
+            with self.service._lock:
+                jobs = [j.describe() for j in self.service.jobs.values() if j.client == self._client_id()]
+            return self._send_json(200, {"jobs": jobs})
+        if job is None:
+            return self._send_json(404, {"error": "任务不存在"})
+        if len(parts) == 2:
+            return self._send_json(200, job.describe(self.service.queue.position(job)))
+        if parts[2] == "events":
+            return self._stream_events(job)
+        if parts[2] == "transcript":
+            query = parse_qs(urlparse(self.path).query)
+            if query.get("format") == ["json"]:
+                return self._send_json(200, {"status": job.status, "segments": [
+                    json.loads(_segment_json(i, r)) for i, r in _iter_records(job)]})
+            body = "\n".join(r["text"].strip() for _, r in _iter_records(job)).encode('utf-8')
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        self._send_json(404, {"error": "未知路径"})
+
+    def _search(self):
+        options = self.service.options
+        if not options.word_index:
+            return self._send_json(404, {"error": "未启用全文索引（--word-index）"})
+        query = parse_qs(urlparse(self.path).query)
+        try:
+            limit = min(200, int(query.get("limit", ["20"])[0]))
+        except ValueError:
+            return self._send_json(400, {"error": "limit 必须是整数"})
+        from transcript_index import get_transcript_index
+        hits = get_transcript_index(options.word_index_db or None).search(query.get("q", [""])[0], limit=limit)
+        self._send_json(200, {"hits": [hit._asdict() for hit in hits]})
+
+    def _stream_events(self, job):
+        """SSE：已有片段先补发，之后边转录边推送，任务结束时发送 done 事件"""
+        query = parse_qs(urlparse(self.path).query)
+        try:
+            sent = int(self.headers.get("Last-Event-ID", query.get("from", ["-1"])[0])) + 1
+        except ValueError:
+            sent = 0
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream; charset=utf-8")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        last_status = None
+        try:
+            while True:
+                with job.changed:
+                    if job.segment_count <= sent and job.status == last_status and not job.finished:
+                        job.changed.wait(timeout=KEEPALIVE_SECONDS)
+                    status, finished, count = job.status, job.finished, job.segment_count
+                pending = job.records(sent) if sent < count else []
+                chunks = [f"id: {i}\nevent: segment\ndata: {_segment_json(i, r)}\n\n" for i, r in pending]
+                # 文件中已不存在的片段直接跳过
+                sent = pending[-1][0] + 1 if pending else max(sent, count)
+                if sent < count:
+                    # 还有未补发的片段：先发出这一批，不发送 done
+                    self.wfile.write("".join(chunks).encode('utf-8'))
+                    self.wfile.flush()
+                    continue
+                if status != last_status:
+                    chunks.append(f"event: status\ndata: {json.dumps({'status': status})}\n\n")
+                    last_status = status
+                if finished:
+                    chunks.append(f"event: done\ndata: {json.dumps(job.describe(), ensure_ascii=False)}\n\n")
+                elif not chunks:
+                    chunks.append(": ping\n\n")
+                self.wfile.write("".join(chunks).encode('utf-8'))
+                self.wfile.flush()
+                if finished:
+                    return
+        except (BrokenPipeError, ConnectionResetError):
+            # 客户端断开不影响任务本身，可重新连接续传
+            return
+
+    def do_POST(self):
+        parts, job = self._route()
+        if parts == ["jobs"]:
+            return self._submit()
+        if job is not None and parts[2:] == ["cancel"]:
+            return self._send_json(200 if self.service.cancel(job.job_id) else 409, job.describe())
+        self._send_json(404, {"error": "未知路径"})
+
+    def do_DELETE(self):
+        parts, job = self._route()
+        if job is None or len(parts) != 2:
+            return self._send_json(404, {"error": "任务不存在"})
+        self._send_json(200 if self.service.cancel(job.job_id) else 409, job.describe())
+
+    def _submit(self):
+        content_type = self.headers.get("Content-Type", "").split(";")[0].strip()
+        try:
+            header = self.headers.get("Content-Length")
+            if header is None and content_type != "application/json":
+                raise Rejected(411, "上传音频需要 Content-Length")
+            length = int(header or 0)
+            if length < 0:
+                raise ValueError(f"Content-Length 无效: {header}")
+            if content_type == "application/json":
+                settings = json.loads(self.rfile.read(length) or b"{}")
+                job = self.service.submit(self._client_id(), source=settings.get("source"), settings=settings)
+            else:
+                query = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+                extension = Path(query.get("filename", "")).suffix or ".bin"
+                job = self.service.submit(self._client_id(), upload=(self.rfile, length, extension), settings=query)
+        except Rejected as e:
+            # 未读完的请求体会让连接状态错乱，拒绝时关闭连接
+            self.close_connection = True
+            return self._send_json(e.status, {"error": str(e)})
+        except ValueError as e:
+            return self._send_json(400, {"error": f"请求格式错误: {e}"})
+        self._send_json(202, {
+            "id": job.job_id,
+            "status_url": f"/jobs/{job.job_id}",
+            "events_url": f"/jobs/{job.job_id}/events",
+            "position": self.service.queue.position(job),
+        })
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="本地转录 HTTP 服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=2, help="同时转录的任务数（共享同一模型）")
+    parser.add_argument("--model", default="small")
+    parser.add_argument("--compute-mode", default="auto")
+    parser.add_argument("--language", default="auto")
+    parser.add_argument("--cpu-threads", type=int, default=0)
+    parser.add_argument("--max-pending", type=int, default=64, help="排队任务总数上限")
+    parser.add_argument("--max-per-client", type=int, default=8, help="单个客户端排队任务上限")
+    parser.add_argument("--max-upload-mb", type=int, default=2048)
+    parser.add_argument("--allow-local-files", action="store_true", help="允许以服务器本地路径作为 source")
+    parser.add_argument("--output-dir", default=str(Path.home() / "Transcripts" / "server"))
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument("--no-warmup", action="store_true")
+    parser.add_argument("--download-concurrency", type=int, default=2, help="同时下载的链接数上限")
+    parser.add_argument("--word-index", action="store_true", help="记录词级时间戳并建立全文索引（GET /search）")
+    args = parser.parse_args(argv)
+
+    options = TranscribeOptions(
+        model_size=args.model,
+        compute_mode=args.compute_mode,
+        language=args.language,
+        cpu_threads=args.cpu_threads,
+        output_dir=args.output_dir,
+        save_jsonl=True,
+        word_index=args.word_index,
+        use_cache=not args.no_cache,
+        # 服务端任务可随时重新提交，不保留续转日志
+        resume=False,
+    )
+    set_download_concurrency(args.download_concurrency)
+    service = TranscriptionService(options, workers=args.workers, max_pending=args.max_pending,
+                                   max_per_client=args.max_per_client,
+                                   max_upload_bytes=args.max_upload_mb * 1024**2,
+                                   allow_local_files=args.allow_local_files)
+    service.start(warm_up=not args.no_warmup)
+    TranscriptionHandler.service = service
+    httpd = ThreadingHTTPServer((args.host, args.port), TranscriptionHandler)
+    httpd.daemon_threads = True
+    default_log(f"🌐 监听 http://{args.host}:{args.port}", "SUCCESS")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.shutdown()
+        httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
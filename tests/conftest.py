@@ -0,0 +1,15 @@
+import os
+import sys
+
+import pytest
+
+# 模块位于仓库根目录（平铺结构）
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    """所有磁盘缓存（续转日志、全文索引等）写入临时目录"""
+    root = tmp_path / "cache"
+    monkeypatch.setenv("TRANSCRIBER_CACHE_DIR", str(root))
+    return root
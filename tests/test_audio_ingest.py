@@ -0,0 +1,42 @@
+import os
+import sys
+
+import pytest
+
+from audio_ingest import SAMPLE_RATE, iter_pcm_chunks
+
+np = pytest.importorskip("numpy")
+
+pytestmark = pytest.mark.skipif(os.name == "nt", reason="假 ffmpeg 为 shell 脚本")
+
+FAKE_FFMPEG = """#!{python}
+import sys
+# 先向 stderr 写入远超管道缓冲区的警告，再输出 PCM
+for _ in range(20000):
+    sys.stderr.write("[mp3float @ 0x0] Header missing\\n")
+sys.stderr.flush()
+sys.stdout.buffer.write(bytes({pcm_bytes}))
+sys.exit({code})
+"""
+
+
+def fake_ffmpeg(tmp_path, monkeypatch, pcm_bytes, code=0):
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    script = bin_dir / "ffmpeg"
+    script.write_text(FAKE_FFMPEG.format(python=sys.executable, pcm_bytes=pcm_bytes, code=code))
+    script.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+
+
+def test_noisy_stderr_does_not_block_decoding(tmp_path, monkeypatch):
+    fake_ffmpeg(tmp_path, monkeypatch, SAMPLE_RATE * 2 * 3)
+    total = sum(len(chunk) for chunk in iter_pcm_chunks("damaged.mp3"))
+    assert total == SAMPLE_RATE * 3
+
+
+def test_failure_reports_tail_of_stderr(tmp_path, monkeypatch):
+    fake_ffmpeg(tmp_path, monkeypatch, 0, code=1)
+    with pytest.raises(RuntimeError, match="Header missing") as error:
+        list(iter_pcm_chunks("damaged.mp3"))
+    assert len(str(error.value)) < 5000
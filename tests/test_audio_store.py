@@ -0,0 +1,137 @@
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+import audio_store
+import transcriber_engine
+from audio_ingest import SAMPLE_RATE
+from audio_store import AudioStore, AudioView
+from transcriber_engine import TranscribeOptions, TranscriptionEngine
+
+np = pytest.importorskip("numpy")
+
+pytestmark = pytest.mark.skipif(os.name == "nt", reason="假 ffmpeg 为 shell 脚本")
+
+FAKE_FFMPEG = """#!{python}
+import sys
+with open({pcm!r}, 'rb') as f:
+    sys.stdout.buffer.write(f.read())
+"""
+
+
+def speech_like(seconds, bursts):
+    """bursts 内为 440Hz 正弦（“语音”），其余为近乎静音的噪声"""
+    rng = np.random.default_rng(0)
+    audio = rng.normal(0, 30, seconds * SAMPLE_RATE)
+    t = np.arange(seconds * SAMPLE_RATE) / SAMPLE_RATE
+    for start, end in bursts:
+        mask = (t >= start) & (t < end)
+        audio[mask] += 8000 * np.sin(2 * np.pi * 440 * t[mask])
+    return audio.astype(np.int16)
+
+
+@pytest.fixture
+def ffmpeg(tmp_path, monkeypatch):
+    """假 ffmpeg：输出给定的 int16 PCM"""
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    pcm_path = tmp_path / "source.pcm"
+    script = bin_dir / "ffmpeg"
+    script.write_text(FAKE_FFMPEG.format(python=sys.executable, pcm=str(pcm_path)))
+    script.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    # 每个测试使用独立的进程级单例
+    monkeypatch.setattr(audio_store, "_store", None)
+
+    def set_audio(pcm):
+        pcm_path.write_bytes(pcm.tobytes())
+    return set_audio
+
+
+def test_audio_view_converts_only_the_slice():
+    pcm = np.array([0, 16384, -32768, 32767], dtype=np.int16)
+    view = AudioView(pcm)
+    assert len(view) == 4
+    part = view[1:3]
+    assert part.dtype == np.float32
+    assert part.tolist() == [0.5, -1.0]
+    with pytest.raises(TypeError):
+        view[0]
+
+
+def test_ingest_round_trip_and_views(tmp_path, ffmpeg):
+    pcm = speech_like(3, [(1, 2)])
+    ffmpeg(pcm)
+    store = AudioStore(tmp_path / "store")
+    assert store.get("k") is None
+    stored = store.ingest("k", "input.mp4")
+    assert (stored.samples, stored.duration) == (len(pcm), 3.0)
+
+    again = store.get("k")
+    assert again.fingerprint == stored.fingerprint
+    whole = again.view()
+    assert whole.fingerprint == stored.fingerprint
+    assert np.array_equal(whole[:], pcm / 32768.0)
+    region = again.view(1.0, 2.0)
+    assert len(region) == SAMPLE_RATE and region.fingerprint is None
+    assert np.array_equal(region[:], pcm[SAMPLE_RATE:2 * SAMPLE_RATE] / 32768.0)
+    assert len(again.view(2.5, 10)) == SAMPLE_RATE // 2
+
+    wav = again.write_wav(tmp_path / "clip.wav", 1.0, 2.0)
+    assert os.path.getsize(wav) == 44 + 2 * SAMPLE_RATE
+
+
+def test_incomplete_entry_is_a_miss(tmp_path, ffmpeg):
+    ffmpeg(speech_like(1, []))
+    store = AudioStore(tmp_path / "store")
+    stored = store.ingest("k", "input.mp4")
+    with open(stored.path, 'ab') as f:
+        f.write(b"\0\0")
+    assert store.get("k") is None
+
+
+def test_eviction_skips_pinned_entries(tmp_path, ffmpeg):
+    ffmpeg(speech_like(1, []))
+    store = AudioStore(tmp_path / "store", max_bytes=3 * SAMPLE_RATE)
+    with store.pinned("a"):
+        store.ingest("a", "a.mp4")
+        store.ingest("b", "b.mp4")
+        os.utime(store._paths("b")[0], (0, 0))
+        store.ingest("c", "c.mp4")
+        assert store.contains("a") and store.contains("c")
+        assert not store.contains("b")
+
+
+class FakeModel:
+    """只接受 ndarray（与 Silero VAD / faster-whisper 一样访问 audio.shape）"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def transcribe(self, audio, **kwargs):
+        self.calls += 1
+        duration = audio.shape[0] / SAMPLE_RATE
+        segments = [SimpleNamespace(start=0.0, end=min(1.0, duration), text=f"块{self.calls}", words=None)]
+        return iter(segments), SimpleNamespace(language="zh", duration=duration)
+
+
+def test_long_form_without_vad_on_stored_audio(tmp_path, ffmpeg, monkeypatch):
+    # 回归：长音频模式 + 关闭 VAD + 音频存储时，内存映射视图不能直接交给 Silero
+    import long_form
+    monkeypatch.setattr(transcriber_engine, "get_gpu_info", lambda: None)
+    monkeypatch.setattr(long_form, "detect_speech", lambda audio: pytest.fail("不应对存储音频调用 Silero"))
+    ffmpeg(speech_like(60, [(2, 20), (25, 45), (50, 58)]))
+    source = tmp_path / "talk.mp4"
+    source.write_bytes(b"fake")
+
+    options = TranscribeOptions(output_dir=str(tmp_path / "out"), long_form=True, chunk_seconds=20,
+                                vad_filter=False, use_cache=False, resume=False, save_srt=False)
+    engine = TranscriptionEngine(options, log=lambda message, level="INFO": None)
+    model = FakeModel()
+    engine.get_model = lambda: model
+    result = engine.transcribe_source(str(source))
+    assert result.status == "done", result.error
+    assert model.calls > 2
+    assert result.segment_count == model.calls - 1
@@ -0,0 +1,59 @@
+import pytest
+
+import batched_inference
+import transcriber_engine
+from transcriber_engine import TranscribeOptions, TranscriptionEngine
+
+pytest.importorskip("numpy")
+
+
+@pytest.mark.parametrize("batch_size, vad_filter, batched", [
+    (1, True, False),
+    (0, True, True),
+    (8, True, True),
+    # BatchedInferencePipeline 在没有 VAD 片段时对 30 秒以上的音频报错
+    (0, False, False),
+    (8, False, False),
+])
+def test_batching_requires_vad(monkeypatch, batch_size, vad_filter, batched):
+    monkeypatch.setattr(transcriber_engine, "get_gpu_info", lambda: None)
+    options = TranscribeOptions(batch_size=batch_size, vad_filter=vad_filter)
+    assert options.batched is batched
+    assert ("batched" in TranscriptionEngine(options).cache_settings()) is batched
+
+
+class FakePipeline:
+    def __init__(self, calls):
+        self.calls = calls
+
+    def transcribe(self, audio, **kwargs):
+        self.calls.append(kwargs)
+        return iter(()), None
+
+
+def test_probe_uses_vad_like_the_real_call(monkeypatch):
+    calls = []
+    monkeypatch.setattr(batched_inference, "batched_pipeline", lambda model: FakePipeline(calls))
+    monkeypatch.setattr(batched_inference, "PROBE_SECONDS", 2)
+    batched_inference.probe_batch_size(None, limit=2)
+    assert [call["batch_size"] for call in calls] == [1, 2]
+    assert all(call["vad_filter"] for call in calls)
+
+
+def test_explicit_batch_size_skips_probe(monkeypatch):
+    monkeypatch.setattr(batched_inference, "batched_supported", lambda: True)
+    monkeypatch.setattr(batched_inference, "probe_batch_size", lambda *args, **kwargs: pytest.fail("不应试探"))
+    assert batched_inference.resolve_batch_size(4, None, "small", "cpu", "int8") == 4
+
+
+def test_auto_batch_size_is_probed_once_per_model(monkeypatch):
+    probes = []
+    monkeypatch.setattr(batched_inference, "batched_supported", lambda: True)
+    monkeypatch.setattr(batched_inference, "_probe_results", {})
+    monkeypatch.setattr(batched_inference, "memory_limited_batch_size", lambda *args: 8)
+    monkeypatch.setattr(batched_inference, "probe_batch_size",
+                        lambda model, limit, log=None: probes.append(limit) or (4, 10.0))
+    assert batched_inference.resolve_batch_size(0, None, "small", "cpu", "int8") == 4
+    assert batched_inference.resolve_batch_size(0, None, "small", "cpu", "int8") == 4
+    assert batched_inference.resolve_batch_size(0, None, "tiny", "cpu", "int8") == 4
+    assert probes == [8, 8]
@@ -0,0 +1,89 @@
+from checkpoint import SegmentJournal
+from transcriber_engine import TranscriptSegment
+
+HEADER = {"source": "a.mp4", "cache_key": "k", "language": "zh"}
+
+
+def write(journal, segments, header=HEADER, restored=0):
+    journal.open(header, restored)
+    for seg in segments:
+        journal.append(seg)
+    journal.close()
+
+
+def segs(*ends):
+    return [TranscriptSegment(end - 1.0, end, f"第{i}句") for i, end in enumerate(ends)]
+
+
+def test_missing_journal_starts_from_zero(tmp_path):
+    assert SegmentJournal(tmp_path / "none.jsonl").load() == (None, 0, 0.0)
+
+
+def test_load_returns_count_and_last_end(tmp_path):
+    journal = SegmentJournal(tmp_path / "j.jsonl")
+    write(journal, segs(2.0, 4.5, 7.25))
+    header, restored, offset = journal.load()
+    assert header == HEADER
+    assert (restored, offset) == (3, 7.25)
+
+
+def test_truncated_last_line_is_ignored(tmp_path):
+    journal = SegmentJournal(tmp_path / "j.jsonl")
+    write(journal, segs(2.0, 4.5))
+    with open(journal.path, 'a', encoding='utf-8') as f:
+        f.write('{"s": 4.5, "e": 9')
+    assert journal.load()[1:] == (2, 4.5)
+    assert [s.end for s in journal.iter_segments()] == [2.0, 4.5]
+
+
+def test_reopen_keeps_restored_segments_and_appends(tmp_path):
+    journal = SegmentJournal(tmp_path / "j.jsonl")
+    write(journal, segs(2.0, 4.5, 7.25))
+    with open(journal.path, 'a', encoding='utf-8') as f:
+        f.write('{"s": 7.2')
+
+    # 续转：只保留前两个片段，之后的输出从 4.5s 接上
+    write(journal, [TranscriptSegment(4.5, 6.0, "续", [(4.5, 6.0, "续", 0.9)])], restored=2)
+    header, restored, offset = journal.load()
+    assert (restored, offset) == (3, 6.0)
+    segments = list(journal.iter_segments())
+    assert [s.text for s in segments] == ["第0句", "第1句", "续"]
+    assert segments[-1].words == [[4.5, 6.0, "续", 0.9]]
+    assert list(journal.iter_segments(1)) == segs(2.0)
+
+
+def test_for_key_lives_under_cache_root(cache_dir):
+    journal = SegmentJournal.for_key("abc")
+    assert journal.path == cache_dir / "journals" / "abc.jsonl"
+
+
+def test_discard_removes_journal(tmp_path):
+    journal = SegmentJournal(tmp_path / "j.jsonl")
+    write(journal, segs(1.0))
+    journal.discard()
+    assert not journal.path.exists()
+    assert journal.load() == (None, 0, 0.0)
+
+
+def test_engine_resumes_only_with_same_input_and_settings(tmp_path, monkeypatch):
+    import transcriber_engine
+    from checkpoint import file_fingerprint
+    from transcript_cache import TranscriptCache
+    monkeypatch.setattr(transcriber_engine, "get_gpu_info", lambda: None)
+
+    source = tmp_path / "a.wav"
+    source.write_bytes(b"RIFF" + bytes(100))
+    engine = transcriber_engine.TranscriptionEngine(transcriber_engine.TranscribeOptions())
+    key = TranscriptCache.make_key(file_fingerprint(str(source)), engine.cache_settings())
+    write(SegmentJournal.for_key(key), segs(3.0, 8.5))
+
+    journal, header, restored, offset = engine._open_journal(str(source))
+    assert (header, restored, offset) == (HEADER, 2, 8.5)
+    assert journal.path.name == f"{key}.jsonl"
+
+    # 设置不同（结果不可拼接）时从头开始
+    engine.options.beam_size = 1
+    assert engine._open_journal(str(source))[2:] == (0, 0.0)
+    engine.options.beam_size = 5
+    engine.options.resume = False
+    assert engine._open_journal(str(source)) == (None, None, 0, 0.0)
@@ -0,0 +1,117 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+import job_queue
+import transcript_cache
+import url_ingest
+from job_queue import JobQueue, plan_workers, storage_settings
+from transcriber_engine import JobResult, TranscribeOptions
+
+
+@pytest.mark.parametrize("cpu_threads, max_workers", [(0, 0), (1, 0), (2, 0), (3, 2), (64, 0)])
+def test_plan_workers_never_oversubscribes(cpu_threads, max_workers):
+    workers, threads = plan_workers(cpu_threads, max_workers)
+    assert workers >= 1 and threads >= 1
+    assert workers * threads <= max(os.cpu_count() or 1, threads)
+    if max_workers:
+        assert workers <= max_workers
+
+
+def test_storage_settings_follow_parent_singletons(tmp_path, monkeypatch):
+    monkeypatch.setattr(transcript_cache, "_cache", transcript_cache.TranscriptCache(tmp_path / "t", 123))
+    monkeypatch.setattr(url_ingest, "_archive", url_ingest.DownloadArchive(tmp_path / "d", 456))
+    options = TranscribeOptions(audio_store=False)
+    assert storage_settings(options) == {"cache": (str(tmp_path / "t"), 123), "archive": (str(tmp_path / "d"), 456)}
+    assert storage_settings(TranscribeOptions(use_cache=False, download_archive=False, audio_store=False)) == {}
+
+
+def _worker_state():
+    """在工作进程中读取单例配置，并占用一个下载名额不释放"""
+    from audio_store import get_audio_store
+    cache = transcript_cache.get_transcript_cache()
+    archive = url_ingest.get_download_archive()
+    store = get_audio_store()
+    url_ingest._download_slots.acquire()
+    return (str(cache.root), cache.max_bytes, str(archive.root), archive.max_bytes,
+            str(store.root), store.max_bytes, url_ingest.download_concurrency())
+
+
+def test_spawned_workers_get_parent_settings_and_shared_download_slots(tmp_path):
+    storage = {"cache": (str(tmp_path / "t"), 1), "archive": (str(tmp_path / "d"), 2),
+               "audio_store": (str(tmp_path / "a"), 3)}
+    with multiprocessing.Manager() as manager:
+        slots = manager.BoundedSemaphore(1)
+        pool = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"),
+                                   initializer=job_queue._init_worker,
+                                   initargs=(manager.Queue(), manager.dict(), storage, 1, slots))
+        with pool:
+            state = pool.submit(_worker_state).result(timeout=60)
+        assert state == (str(tmp_path / "t"), 1, str(tmp_path / "d"), 2, str(tmp_path / "a"), 3, 1)
+        # 工作进程占用的是父进程中的同一个名额
+        assert not slots.acquire(timeout=0.1)
+
+
+class FakeEngine:
+    """按来源名决定结果的假引擎（fork 出的工作进程继承这个替身）"""
+
+    def __init__(self, options, log=None):
+        self.log = log
+
+    def transcribe_source(self, source, should_stop=None, on_segment=None, base_name=None):
+        if source == "crash":
+            raise RuntimeError("解码失败")
+        result = JobResult(source=source)
+        self.log(f"开始 {source}")
+        info = type("Info", (), {"duration": 10.0})()
+        for end in range(1, 11):
+            if should_stop():
+                result.status = "stopped"
+                return result
+            on_segment(type("Seg", (), {"end": float(end)})(), info)
+            if source == "slow":
+                time.sleep(0.2)
+        result.status = "done"
+        result.segment_count = 10
+        return result
+
+
+@pytest.fixture
+def queue(monkeypatch):
+    if multiprocessing.get_start_method() != "fork":
+        pytest.skip("假引擎需要 fork 方式启动的工作进程")
+    monkeypatch.setattr(job_queue, "TranscriptionEngine", FakeEngine)
+    logs, updates = [], []
+    options = TranscribeOptions(use_cache=False, download_archive=False, audio_store=False)
+    result = JobQueue(options, workers=2, log=lambda message, level="INFO": logs.append(message),
+                      on_update=lambda job: updates.append((job.job_id, job.status)))
+    result.logs, result.updates = logs, updates
+    yield result
+    result.shutdown()
+
+
+def test_jobs_finish_with_results_and_progress(queue):
+    jobs = queue.submit_many(["a.mp4", "b.mp4", "crash"])
+    queue.wait()
+    assert [job.status for job in jobs] == ["done", "done", "failed"]
+    assert jobs[0].progress == 100.0 and jobs[0].result["segments"] == 10
+    assert "解码失败" in jobs[2].error
+    assert queue.options.num_workers == 1
+
+
+def test_cancel_running_job_and_retry(queue):
+    job = queue.submit("slow")
+    deadline = time.monotonic() + 30
+    while job.progress < 10 and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert queue.cancel(job.job_id)
+    queue.wait()
+    assert job.status == "cancelled"
+
+    assert queue.retry(job.job_id)
+    queue.wait()
+    assert (job.status, job.attempts) == ("done", 2)
+    assert not queue.retry(job.job_id)
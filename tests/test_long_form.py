@@ -0,0 +1,107 @@
+from types import SimpleNamespace
+
+import pytest
+
+from audio_ingest import SAMPLE_RATE
+from long_form import HARD_CUT_OVERLAP, LongFormTranscriber, plan_chunks
+
+np = pytest.importorskip("numpy")
+
+SR = SAMPLE_RATE
+
+
+def assert_tiles(chunks, total):
+    """各块的保留区间首尾相接，覆盖整段音频"""
+    assert chunks[0][2] == 0
+    assert chunks[-1][3] == total + 1
+    for (_, _, _, keep_until), (_, _, keep_from, _) in zip(chunks, chunks[1:]):
+        assert keep_until == keep_from
+    for start, end, keep_from, keep_until in chunks:
+        assert start <= keep_from < min(keep_until, end + 1) and end <= total
+
+
+def test_short_audio_is_one_chunk():
+    assert plan_chunks(100 * SR, [(0, 100 * SR)], chunk_seconds=600) == [(0, 100 * SR, 0, 100 * SR + 1)]
+
+
+def test_cuts_at_silence_midpoints():
+    # 每 10s 一段语音，之间 2s 静音
+    speech = [(i * 12 * SR, (i * 12 + 10) * SR) for i in range(10)]
+    total = 120 * SR
+    chunks = plan_chunks(total, speech, chunk_seconds=30)
+    assert_tiles(chunks, total)
+    gaps = {(prev_end + next_start) // 2 for (_, prev_end), (next_start, _) in zip(speech, speech[1:])}
+    for start, end, keep_from, keep_until in chunks[:-1]:
+        # 在静音处切分时不重叠
+        assert end == keep_until in gaps
+        assert 30 * SR <= end - start <= 45 * SR
+
+
+def test_hard_cut_overlaps_neighbours():
+    total = 100 * SR
+    chunks = plan_chunks(total, [(0, total)], chunk_seconds=20)
+    assert_tiles(chunks, total)
+    overlap = int(HARD_CUT_OVERLAP * SR)
+    for (start, end, _, cut), (next_start, _, _, _) in zip(chunks, chunks[1:]):
+        assert cut - start <= 30 * SR + overlap
+        assert end == cut + overlap
+        assert next_start == cut - overlap
+
+
+class FakeModel:
+    """按绝对时间的“剧本”返回片段；只返回与输入音频有交集的部分，时间相对于输入起点"""
+
+    def __init__(self, script, language="ja"):
+        self.script = script
+        self.language = language
+        self.calls = []
+
+    def transcribe(self, audio, **kwargs):
+        self.calls.append(kwargs)
+        # 测试音频的每个采样值就是它的采样点序号
+        start = float(audio[0]) / SR
+        end = start + len(audio) / SR
+        segments = [SimpleNamespace(start=max(s, start) - start, end=min(e, end) - start, text=text, words=None)
+                    for s, e, text in self.script if s < end and e > start]
+        return iter(segments), SimpleNamespace(language=self.language, duration=len(audio) / SR)
+
+
+def run(script, seconds, chunk_seconds, **kwargs):
+    model = FakeModel(script)
+    audio = np.arange(seconds * SR, dtype=np.float64)
+    transcriber = LongFormTranscriber(model, dict(language=None, beam_size=5, **kwargs), workers=2,
+                                      chunk_seconds=chunk_seconds)
+    segments, info = transcriber.transcribe(audio, speech=[(0, len(audio))])
+    return model, list(segments), info
+
+
+def test_segments_are_stitched_in_order_without_duplicates():
+    script = [(t, t + 1.5, f"第{t}句") for t in range(0, 60, 2)]
+    _, segments, info = run(script, 60, chunk_seconds=10)
+    assert [s.text for s in segments] == [text for _, _, text in script]
+    assert [s.start for s in segments] == pytest.approx([s for s, _, _ in script])
+    assert info.duration == 60
+
+
+def test_boundary_text_seen_by_both_chunks_is_kept_once():
+    # 块长 4s，硬切于 6s：第一块为 [0, 8s)，第二块从 4s 开始
+    # 跨越切分点的句子在两块中被截成不同的时间，中点分别落在各自的保留区间内
+    script = [(0.0, 2.5, "first"), (3.0, 9.0, "Hello, world"), (9.5, 10.0, "last")]
+    _, segments, _ = run(script, 10, chunk_seconds=4)
+    assert [s.text for s in segments] == ["first", "Hello, world", "last"]
+    assert segments[1].start == pytest.approx(3.0)
+
+
+def test_repeated_text_outside_the_overlap_is_kept():
+    script = [(t, t + 1.0, "嗯") for t in range(0, 40, 5)]
+    _, segments, _ = run(script, 40, chunk_seconds=10)
+    assert len(segments) == len(script)
+
+
+def test_language_is_probed_once_and_shared_by_all_chunks():
+    model, _, info = run([(1.0, 2.0, "こんにちは")], 40, chunk_seconds=10)
+    probe, *chunks = model.calls
+    assert probe["beam_size"] == 1
+    assert len(chunks) > 1
+    assert all(call["language"] == "ja" for call in chunks)
+    assert info.language == "ja"
@@ -0,0 +1,142 @@
+import os
+import threading
+import time
+
+from pipeline import DownloadPrefetcher
+
+
+class FakeEngine:
+    """download_audio_from_url 写入指定大小的文件；可选阻塞直到 gate 打开"""
+
+    def __init__(self, size=1000, gate=None, cached=(), archive=None):
+        self.size = size
+        self.gate = gate
+        # 模拟下载归档：文件写到 temp_dir 之外
+        self.archive = archive
+        self.cached = set(cached)
+        self.started = []
+        self._lock = threading.Lock()
+
+    def log(self, message, level="INFO"):
+        pass
+
+    def has_cached_transcript(self, source):
+        return source in self.cached
+
+    def has_stored_audio(self, source):
+        return False
+
+    def download_audio_from_url(self, url, temp_dir, token=None, resources=None):
+        with self._lock:
+            self.started.append(url)
+        if self.gate:
+            self.gate.wait(10)
+        if url.endswith("/fail"):
+            return None
+        path = os.path.join(self.archive or temp_dir, url.rsplit("/", 1)[1] + ".webm")
+        with open(path, 'wb') as f:
+            f.write(bytes(self.size))
+        return path
+
+
+def urls(n):
+    return [f"https://example.com/{i}" for i in range(n)]
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_every_source_is_yielded_once_and_released(tmp_path):
+    local = str(tmp_path / "local.wav")
+    sources = urls(3) + [local, "https://example.com/fail"]
+    prefetcher = DownloadPrefetcher(FakeEngine(), sources, concurrency=2, max_prefetch=2)
+    seen = {}
+    for item in prefetcher:
+        seen[item.source] = item
+        if item.source == local:
+            assert item.input_file == local and item.temp_dir is None
+        elif item.source.endswith("/fail"):
+            assert item.error == "音频下载失败"
+        else:
+            assert not item.error and os.path.getsize(item.input_file) == 1000
+        prefetcher.release(item)
+        if item.temp_dir:
+            assert not os.path.exists(item.temp_dir)
+    assert set(seen) == set(sources)
+    assert prefetcher.temp_bytes == 0
+
+
+def test_cached_sources_skip_download():
+    engine = FakeEngine(cached=urls(2))
+    items = list(DownloadPrefetcher(engine, urls(2)))
+    assert engine.started == []
+    assert all(item.input_file is None and not item.error for item in items)
+
+
+def test_max_prefetch_limits_unreleased_downloads():
+    engine = FakeEngine()
+    prefetcher = DownloadPrefetcher(engine, urls(5), concurrency=4, max_prefetch=2)
+    items = iter(prefetcher)
+    first = next(items)
+    assert wait_for(lambda: len(engine.started) == 2)
+    time.sleep(0.2)
+    assert len(engine.started) == 2
+    prefetcher.release(first)
+    assert wait_for(lambda: len(engine.started) == 3)
+    for item in items:
+        prefetcher.release(item)
+
+
+def test_temp_bytes_limit_applies_backpressure():
+    gate = threading.Event()
+    engine = FakeEngine(size=1000, gate=gate)
+    prefetcher = DownloadPrefetcher(engine, urls(4), concurrency=2, max_prefetch=2, max_temp_bytes=1000)
+    # 前两个下载在占用磁盘之前同时发起
+    assert wait_for(lambda: len(engine.started) == 2)
+    gate.set()
+    items = iter(prefetcher)
+    first = next(items)
+    second = next(items)
+    assert prefetcher.temp_bytes == 2000
+    # 释放一个预取名额后仍占用 1000 字节，达到上限，不发起新的下载
+    prefetcher.release(first)
+    time.sleep(0.2)
+    assert len(engine.started) == 2
+    prefetcher.release(second)
+    assert wait_for(lambda: len(engine.started) >= 3)
+    for item in items:
+        prefetcher.release(item)
+    assert prefetcher.temp_bytes == 0
+
+
+def test_archived_downloads_count_against_temp_limit(tmp_path):
+    engine = FakeEngine(size=1000, archive=str(tmp_path))
+    prefetcher = DownloadPrefetcher(engine, urls(3), concurrency=1, max_prefetch=3, max_temp_bytes=1000)
+    items = iter(prefetcher)
+    first = next(items)
+    assert not first.input_file.startswith(first.temp_dir)
+    assert prefetcher.temp_bytes >= 1000
+    prefetcher.release(first)
+    for item in items:
+        prefetcher.release(item)
+    assert prefetcher.temp_bytes == 0
+
+
+def test_stop_marks_pending_sources():
+    gate = threading.Event()
+    stopped = threading.Event()
+    engine = FakeEngine(gate=gate)
+    prefetcher = DownloadPrefetcher(engine, urls(4), concurrency=1, max_prefetch=1, should_stop=stopped.is_set)
+    assert wait_for(lambda: len(engine.started) == 1)
+    stopped.set()
+    gate.set()
+    items = []
+    for item in prefetcher:
+        items.append(item)
+        prefetcher.release(item)
+    assert len(items) == 4
+    assert sum(item.error == "已停止" for item in items) >= 2
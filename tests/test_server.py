@@ -0,0 +1,155 @@
+import http.client
+import json
+import os
+import threading
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+import transcriber_engine
+from server import FairQueue, Rejected, ServerJob, TranscriptionHandler, TranscriptionService, parse_bool
+from transcriber_engine import TranscribeOptions
+
+
+def job(client, name):
+    return ServerJob(job_id=name, client=client, source=name, options=None)
+
+
+def drain(queue):
+    stop = threading.Event()
+    stop.set()
+    names = []
+    while True:
+        item = queue.get(stop)
+        if item is None:
+            return names
+        names.append(item.job_id)
+
+
+def test_fair_queue_rotates_between_clients():
+    queue = FairQueue()
+    for name in ("a1", "a2", "a3"):
+        queue.put(job("a", name))
+    queue.put(job("b", "b1"))
+    queue.put(job("c", "c1"))
+    queue.put(job("b", "b2"))
+    assert drain(queue) == ["a1", "b1", "c1", "a2", "b2", "a3"]
+    assert len(queue) == 0
+
+
+def test_fair_queue_position_matches_dequeue_order():
+    queue = FairQueue()
+    jobs = [job("a", "a1"), job("a", "a2"), job("a", "a3"), job("b", "b1"), job("c", "c1"), job("b", "b2")]
+    for item in jobs:
+        queue.put(item)
+    positions = {item.job_id: queue.position(item) for item in jobs}
+    order = drain(queue)
+    assert [positions[name] for name in order] == [1, 2, 3, 4, 5, 6]
+    assert queue.position(jobs[0]) is None
+
+
+def test_fair_queue_limits_and_remove():
+    queue = FairQueue(max_pending=3, max_per_client=2)
+    queue.put(job("a", "a1"))
+    queue.put(job("a", "a2"))
+    with pytest.raises(Rejected) as error:
+        queue.put(job("a", "a3"))
+    assert error.value.status == 429
+    b1 = job("b", "b1")
+    queue.put(b1)
+    with pytest.raises(Rejected):
+        queue.put(job("c", "c1"))
+    assert queue.remove(b1) and not queue.remove(b1)
+    assert drain(queue) == ["a1", "a2"]
+
+
+@pytest.mark.parametrize("value, expected", [(True, True), ("1", True), ("Yes", True), ("on", True),
+                                             (False, False), ("false", False), ("0", False), ("", False)])
+def test_parse_bool(value, expected):
+    assert parse_bool("vad_filter", value) is expected
+
+
+def test_parse_bool_rejects_other_values():
+    with pytest.raises(Rejected) as error:
+        parse_bool("vad_filter", "maybe")
+    assert error.value.status == 400
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    # 不启动工作线程：提交的任务停留在队列中
+    monkeypatch.setattr(transcriber_engine, "get_gpu_info", lambda: None)
+    return TranscriptionService(TranscribeOptions(output_dir=str(tmp_path / "out")), max_upload_bytes=1000,
+                                log=lambda message, level="INFO": None)
+
+
+def rejected(fn, *args, **kwargs):
+    with pytest.raises(Rejected) as error:
+        fn(*args, **kwargs)
+    return error.value.status
+
+
+def test_submit_validates_before_queueing(service, tmp_path):
+    url = "https://example.com/v"
+    assert rejected(service.submit, "c", source=url, settings={"language": "klingon"}) == 400
+    assert rejected(service.submit, "c", source=url, settings={"language": ["zh"]}) == 400
+    assert rejected(service.submit, "c", source=url, settings={"model": "huge"}) == 400
+    assert rejected(service.submit, "c", source=url, settings={"vad_filter": "maybe"}) == 400
+    assert rejected(service.submit, "c") == 400
+    assert rejected(service.submit, "c", source=str(tmp_path / "a.wav")) == 403
+    assert len(service.queue) == 0
+
+    queued = service.submit("c", source=url, settings={"language": "zh", "vad_filter": "false"})
+    assert (queued.options.language, queued.options.vad_filter) == ("zh", False)
+    assert queued.options.save_jsonl and not queued.options.word_timestamps
+    assert service.queue.position(queued) == 1
+
+
+def test_uploads_are_size_checked_and_cleaned_up(service, tmp_path, monkeypatch):
+    import io
+    import tempfile
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    assert rejected(service.submit, "c", upload=(io.BytesIO(b""), 0, ".wav")) == 400
+    assert rejected(service.submit, "c", upload=(io.BytesIO(bytes(2000)), 2000, ".wav")) == 413
+    assert rejected(service.submit, "c", upload=(io.BytesIO(bytes(10)), 100, ".wav")) == 400
+    assert not [p for p in os.listdir(tmp_path) if p.startswith("upload_")]
+
+    queued = service.submit("c", upload=(io.BytesIO(bytes(100)), 100, ".wav"))
+    assert os.path.getsize(queued.source) == 100
+    assert not queued.options.audio_store and not queued.options.persist_inputs
+
+
+@pytest.fixture
+def api(service):
+    TranscriptionHandler.service = service
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), TranscriptionHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+
+    def request(method, path, body=None, headers=None):
+        conn = http.client.HTTPConnection("127.0.0.1", httpd.server_port, timeout=10)
+        conn.request(method, path, body=body, headers=headers or {})
+        response = conn.getresponse()
+        payload = json.loads(response.read() or b"null")
+        conn.close()
+        return response.status, payload
+
+    yield request
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_http_rejects_bad_requests(api):
+    json_headers = {"Content-Type": "application/json"}
+    assert api("POST", "/jobs", json.dumps({"source": "https://example.com/v", "language": "xx"}),
+                json_headers)[0] == 400
+    assert api("POST", "/jobs", b"", {"Content-Type": "audio/wav", "Content-Length": "0"})[0] == 400
+    assert api("POST", "/jobs", b"", {"Content-Type": "audio/wav", "Content-Length": "abc"})[0] == 400
+    assert api("POST", "/jobs", b"{", json_headers)[0] == 400
+    assert api("GET", "/jobs/999999")[0] == 404
+
+    status, payload = api("POST", "/jobs?filename=a.wav", bytes(10), {"Content-Type": "audio/wav"})
+    assert status == 202 and payload["position"] == 1
+    status, payload = api("GET", payload["status_url"])
+    assert (status, payload["status"]) == (200, "queued")
+    assert api("DELETE", f"/jobs/{payload['id']}")[1]["status"] == "cancelled"
@@ -0,0 +1,115 @@
+import pytest
+
+import transcriber_engine
+from transcriber_engine import TranscribeOptions, TranscriptionEngine, TranscriptSegment
+from transcript_cache import TranscriptCache, url_fingerprint
+
+
+@pytest.fixture(autouse=True)
+def no_gpu_probe(monkeypatch):
+    monkeypatch.setattr(transcriber_engine, "get_gpu_info", lambda: None)
+
+
+def engine(gpu=None, **options):
+    result = TranscriptionEngine(TranscribeOptions(**options))
+    result.gpu_info = gpu
+    result.has_gpu = gpu is not None
+    return result
+
+
+def key(**options):
+    return TranscriptCache.make_key("fp", engine(**options).cache_settings())
+
+
+def test_make_key_is_stable_and_order_insensitive():
+    a = TranscriptCache.make_key("fp", {"model": "small", "beam_size": 5})
+    b = TranscriptCache.make_key("fp", {"beam_size": 5, "model": "small"})
+    assert a == b and len(a) == 64
+    assert a != TranscriptCache.make_key("other", {"model": "small", "beam_size": 5})
+
+
+def test_default_settings():
+    assert engine().cache_settings() == {
+        "model": "small", "compute_type": "int8", "language": "auto", "beam_size": 5,
+        "vad_filter": True, "speech_index": 1,
+    }
+
+
+@pytest.mark.parametrize("options", [
+    {"model_size": "medium"},
+    {"language": "zh"},
+    {"beam_size": 1},
+    {"vad_filter": False},
+    {"compute_mode": "float32"},
+    {"word_index": True},
+    {"long_form": True},
+    {"batch_size": 0},
+])
+def test_settings_that_change_output_change_key(options):
+    assert key(**options) != key()
+
+
+@pytest.mark.parametrize("options", [
+    {"cpu_threads": 8},
+    {"num_workers": 4},
+    {"chunk_workers": 4},
+    {"output_dir": "/elsewhere"},
+    {"use_cache": False},
+    {"save_vtt": True},
+])
+def test_settings_that_do_not_change_output_keep_key(options):
+    assert key(**options) == key()
+
+
+def test_chunk_seconds_only_matters_for_long_form():
+    assert key(chunk_seconds=300) == key()
+    assert key(long_form=True, chunk_seconds=300) != key(long_form=True)
+
+
+def test_compute_type_follows_device():
+    gpu = {"name": "GPU", "vram": 8, "cores": 0}
+    assert engine(gpu).cache_settings()["compute_type"] == "float16"
+    assert engine(gpu, device="cpu").cache_settings()["compute_type"] == "int8"
+    assert engine(gpu, device="cpu", compute_mode="float32").cache_settings()["compute_type"] == "float32"
+    assert engine({"name": "GPU", "vram": 2, "cores": 0}).cache_settings()["compute_type"] == "int8"
+
+
+def test_url_fingerprint_normalizes_extractor():
+    assert url_fingerprint("YouTube", "abc") == url_fingerprint("youtube", "abc") == "url:youtube:abc"
+
+
+SEGMENTS = [TranscriptSegment(0.0, 1.5, "你好", None), TranscriptSegment(1.5, 3.0, "world", [[1.5, 3.0, "world", 0.9]])]
+
+
+def store(cache, key="k" * 64):
+    writer = cache.writer(key, source="a.mp4", language="zh", duration=3.0)
+    for seg in SEGMENTS:
+        writer.write(seg)
+    writer.commit()
+    return cache._path(key)
+
+
+def test_entry_round_trip(tmp_path):
+    cache = TranscriptCache(tmp_path)
+    store(cache)
+    entry, segments = cache.get("k" * 64)
+    assert entry == {"source": "a.mp4", "language": "zh", "duration": 3.0}
+    assert list(segments) == SEGMENTS
+    assert cache.get("x" * 64) is None
+    assert cache.stats["hits"] == cache.stats["misses"] == 1
+
+
+@pytest.mark.parametrize("damage", [
+    lambda text: text[:-7],
+    lambda text: text + "[1.0]\n",
+    lambda text: text + "42\n",
+    lambda text: "[]\n" + text.split("\n", 1)[1],
+    lambda text: "",
+])
+def test_corrupt_entry_is_a_miss_and_evicted(tmp_path, damage):
+    cache = TranscriptCache(tmp_path)
+    path = store(cache)
+    path.write_text(damage(path.read_text(encoding='utf-8')), encoding='utf-8')
+    assert cache.get("k" * 64) is None
+    assert not path.exists()
+    assert cache.stats["misses"] == 1
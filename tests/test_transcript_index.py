@@ -0,0 +1,120 @@
+import os
+
+import pytest
+
+from transcript_index import TranscriptIndex, tokenize
+from transcript_writers import WordsWriter
+from transcriber_engine import TranscriptSegment
+
+
+def write_words(path, source, words, language="en"):
+    """words: [(开始秒, 词), ...]，每个词持续 0.4s"""
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('# {"source": "%s", "language": "%s", "duration": 60}\n' % (source, language))
+        for start, word in words:
+            f.write(f"{round(start * 1000)}\t{round(start * 1000) + 400}\t90\t{word}\n")
+    return str(path)
+
+
+def timed(text, start=0.0, step=0.5):
+    return [(start + i * step, word) for i, word in enumerate(text.split())]
+
+
+@pytest.fixture
+def index(tmp_path):
+    result = TranscriptIndex(tmp_path / "index.sqlite3")
+    yield result
+    result.close()
+
+
+def test_tokenize_splits_cjk_per_character():
+    assert tokenize("Hello, 世界! GPU加速") == ["hello", "世", "界", "gpu", "加", "速"]
+
+
+def test_phrase_search_requires_adjacent_words(index, tmp_path):
+    write_words(tmp_path / "a.words.tsv", "a.mp4", timed("the quick brown fox jumps over the lazy dog", 10.0))
+    write_words(tmp_path / "b.words.tsv", "b.mp4", timed("a brown quick fox"))
+    index.add(tmp_path / "a.words.tsv")
+    index.add(tmp_path / "b.words.tsv")
+
+    hits = index.search("quick brown")
+    assert [(h.source, h.start_ms, h.position) for h in hits] == [("a.mp4", 10500, 1)]
+    assert "quick brown fox" in hits[0].context
+    assert {h.source for h in index.search("Fox")} == {"a.mp4", "b.mp4"}
+    assert index.search("brown dog") == []
+    assert index.search("unicorn") == []
+    assert index.search("  ,  ") == []
+
+
+def test_prefix_search_on_last_word(index, tmp_path):
+    write_words(tmp_path / "a.words.tsv", "a.mp4", timed("transcribe transcription transit lazy trans"))
+    index.add(tmp_path / "a.words.tsv")
+    assert [h.position for h in index.search("transcri*")] == [0, 1]
+    assert [h.position for h in index.search("trans*")] == [0, 1, 2, 4]
+    assert index.search("transcri") == []
+    assert [h.position for h in index.search("lazy tra*")] == [3]
+
+
+def test_cjk_phrase_spans_word_boundaries(index, tmp_path):
+    # 分词结果中的一个“词”含多个汉字，检索时逐字匹配
+    write_words(tmp_path / "zh.words.tsv", "zh.mp4", [(1.0, "今天"), (1.5, "我们"), (2.0, "讨论"), (2.5, "语音识别")],
+                language="zh")
+    index.add(tmp_path / "zh.words.tsv")
+    hits = index.search("们讨论语")
+    assert [(h.source, h.start_ms) for h in hits] == [("zh.mp4", 1500)]
+    assert "讨论" in hits[0].context
+    assert index.search("识别")[0].start_ms == 2500
+    assert index.search("讨识") == []
+
+
+def test_words_writer_output_is_searchable(index, tmp_path):
+    writer = WordsWriter(str(tmp_path / "w"), {"source": "w.mp4", "language": "en", "duration": 5})
+    writer.write(TranscriptSegment(0.0, 1.0, " Hello world", [(0.0, 0.4, " Hello", 0.9), (0.5, 1.0, " world", 0.8)]))
+    writer.write(TranscriptSegment(2.0, 3.0, " no words here"))
+    writer.finalize()
+    index.index_directory(str(tmp_path))
+    assert [(h.source, h.start_ms) for h in index.search("hello world")] == [("w.mp4", 0)]
+    assert index.search("words here")[0].start_ms == 2000
+
+
+def test_incremental_add_and_remove(index, tmp_path):
+    path = write_words(tmp_path / "a.words.tsv", "a.mp4", timed("alpha beta"))
+    assert index.add(path)
+    assert not index.add(path)
+    assert index.stats()["documents"] == 1
+
+    write_words(path, "a.mp4", timed("gamma delta epsilon"))
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 10**9))
+    assert index.add(path)
+    assert index.search("alpha") == []
+    assert index.search("delta")[0].position == 1
+
+    os.remove(path)
+    assert index.index_directory(str(tmp_path)) == (0, 1)
+    assert index.search("delta") == []
+    assert index.stats()["documents"] == 0
+
+
+def test_search_while_other_threads_index(index, tmp_path):
+    import threading
+    paths = [write_words(tmp_path / f"{i}.words.tsv", f"{i}.mp4", timed(f"common phrase number{i} 共享文本"))
+             for i in range(40)]
+    errors = []
+
+    def run(fn):
+        try:
+            fn()
+        except Exception as e:
+            errors.append(e)
+
+    writers = [threading.Thread(target=run, args=(lambda chunk=paths[i::4]: [index.add(p) for p in chunk],))
+               for i in range(4)]
+    readers = [threading.Thread(target=run, args=(lambda: [index.search("common phr*") for _ in range(50)],))
+               for _ in range(4)]
+    for thread in writers + readers:
+        thread.start()
+    for thread in writers + readers:
+        thread.join()
+    assert errors == []
+    assert len(index.search("common phrase", limit=100)) == 40
+    assert len(index.search("共享", limit=100)) == 40
@@ -0,0 +1,58 @@
+import json
+import random
+
+import pytest
+
+import transcriber_engine
+from bench_writers import legacy_format_time
+from transcriber_engine import TranscribeOptions, TranscriptionEngine, TranscriptSegment
+from transcript_writers import TranscriptWriterSet, format_timestamp
+
+
+def test_format_timestamp_matches_legacy_format_time():
+    rng = random.Random(0)
+    values = [0.0, 0.001, 0.999, 1.001, 59.999, 60.0, 3599.999, 3600.0, 36000.5]
+    # faster-whisper 的时间戳为 0.02 秒粒度的浮点数
+    values += [round(i * 0.02, 2) for i in range(50_000)]
+    values += [rng.uniform(0, 36000) for _ in range(50_000)]
+    assert [v for v in values if format_timestamp(v) != legacy_format_time(v)] == []
+
+
+def test_vtt_uses_dot_marker():
+    assert format_timestamp(3661.5, ".") == "01:01:01.500"
+
+
+SEGMENTS = [
+    TranscriptSegment(0.0, 1.5, " Hello world", [(0.0, 0.5, " Hello", 0.91234), (0.75, 1.5, " world", 0.8)]),
+    TranscriptSegment(1.5, 2.0, " 没有词"),
+]
+
+
+def test_writer_set_streams_all_formats(tmp_path):
+    writers = TranscriptWriterSet(str(tmp_path), "out", ["txt", "srt", "vtt", "jsonl"])
+    for seg in SEGMENTS:
+        writers.write(seg)
+    paths = writers.finalize()
+    assert sorted(p.rsplit(".", 1)[1] for p in paths) == ["jsonl", "srt", "txt", "vtt"]
+    assert not list(tmp_path.glob("*.part"))
+
+    srt = (tmp_path / "out.srt").read_text(encoding='utf-8')
+    assert "1\n00:00:00,000 --> 00:00:01,500\n Hello world\n" in srt
+    assert "00:00:01.500 --> 00:00:02.000" in (tmp_path / "out.vtt").read_text(encoding='utf-8')
+    records = [json.loads(line) for line in (tmp_path / "out.jsonl").read_text(encoding='utf-8').splitlines()]
+    assert records[0]["words"] == [[0.0, 0.5, " Hello", 0.9123], [0.75, 1.5, " world", 0.8]]
+    assert "words" not in records[1]
+
+
+@pytest.mark.parametrize("options, expected", [
+    ({}, False),
+    ({"save_jsonl": True}, True),
+    ({"word_index": True}, True),
+    ({"save_jsonl": True, "jsonl_words": False}, False),
+])
+def test_jsonl_output_requests_word_timestamps(monkeypatch, options, expected):
+    monkeypatch.setattr(transcriber_engine, "get_gpu_info", lambda: None)
+    options = TranscribeOptions(**options)
+    assert options.word_timestamps is expected
+    # 带词级时间戳的结果与不带的不能共用缓存条目
+    assert ("word_timestamps" in TranscriptionEngine(options).cache_settings()) is expected
@@ -0,0 +1,100 @@
+import threading
+
+from ui_channel import UIChannel
+
+
+class FakeRoot:
+    def __init__(self):
+        self.scheduled = []
+
+    def after(self, ms, fn):
+        self.scheduled.append(fn)
+
+    def frame(self):
+        self.scheduled.pop(0)()
+
+
+class FakeText:
+    """只实现 UIChannel 用到的 Tk Text 接口（按行存储）"""
+
+    def __init__(self):
+        self.lines = []
+
+    def config(self, **kwargs):
+        pass
+
+    def insert(self, index, text):
+        self.lines += text.split("\n")[:-1]
+
+    def delete(self, first, last):
+        del self.lines[:int(last.split(".")[0]) - 1]
+
+    def see(self, index):
+        pass
+
+
+def channel(**kwargs):
+    root = FakeRoot()
+    result = UIChannel(root, FakeText(), **kwargs)
+    result.start()
+    return root, result
+
+
+def test_calls_run_in_order_and_updates_coalesce():
+    root, ui = channel()
+    seen = []
+    ui.call(seen.append, "a")
+    for i in range(100):
+        ui.update("progress", seen.append, i)
+    ui.call(seen.append, "b")
+    ui.log("line")
+    root.frame()
+    assert seen == ["a", "b", 99]
+    assert ui.log_widget.lines == ["line"]
+    # 下一帧已排期
+    assert len(root.scheduled) == 1
+
+
+def test_failing_callback_does_not_drop_the_rest_of_the_frame():
+    root, ui = channel()
+    seen = []
+
+    def broken():
+        raise ValueError("坏掉的回调")
+
+    ui.call(broken)
+    ui.call(seen.append, "call")
+    ui.update("speed", seen.append, "update")
+    ui.log("after")
+    root.frame()
+    assert seen == ["call", "update"]
+    assert ui.log_widget.lines[0] == "after"
+    assert "坏掉的回调" in ui.log_widget.lines[1]
+    assert len(root.scheduled) == 1
+
+
+def test_log_is_capped():
+    root, ui = channel(max_log_lines=10)
+    for i in range(25):
+        ui.log(str(i))
+    root.frame()
+    assert len(ui.log_widget.lines) <= 10 and ui.log_widget.lines[-1] == "24"
+    for i in range(25, 30):
+        ui.log(str(i))
+    root.frame()
+    assert len(ui.log_widget.lines) == 10 and ui.log_widget.lines[-1] == "29"
+
+
+def test_events_from_worker_threads():
+    root, ui = channel()
+    seen = []
+    threads = [threading.Thread(target=lambda n=n: [ui.call(seen.append, (n, i)) for i in range(100)])
+               for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    root.frame()
+    assert len(seen) == 400
+    for n in range(4):
+        assert [i for m, i in seen if m == n] == list(range(100))
@@ -0,0 +1,51 @@
+import os
+import time
+
+from url_ingest import DownloadArchive
+
+
+def download(tmp_path, name, size):
+    path = tmp_path / f"{name}.webm"
+    path.write_bytes(bytes(size))
+    return str(path)
+
+
+def age(path, seconds):
+    stamp = time.time() - seconds
+    os.utime(path, (stamp, stamp))
+
+
+def test_put_and_get(tmp_path):
+    archive = DownloadArchive(tmp_path / "archive", max_bytes=10_000)
+    assert archive.get("url:youtube:abc") is None
+    stored = archive.put("url:youtube:abc", download(tmp_path, "a", 100))
+    assert archive.get("url:youtube:abc") == stored
+    assert os.path.getsize(stored) == 100
+    assert archive.stats == {"hits": 1, "misses": 1, "evictions": 0}
+
+
+def test_least_recently_used_entry_is_evicted(tmp_path):
+    archive = DownloadArchive(tmp_path / "archive", max_bytes=2500)
+    old = archive.put("url:x:old", download(tmp_path, "old", 1000))
+    age(old, 100)
+    recent = archive.put("url:x:recent", download(tmp_path, "recent", 1000))
+    age(recent, 50)
+    archive.get("url:x:old")
+    archive.put("url:x:new", download(tmp_path, "new", 1000))
+    assert archive.get("url:x:recent") is None
+    assert archive.get("url:x:old") and archive.get("url:x:new")
+
+
+def test_pinned_entries_count_against_cap(tmp_path):
+    archive = DownloadArchive(tmp_path / "archive", max_bytes=1500)
+    with archive.pinned("url:x:a"):
+        first = archive.put("url:x:a", download(tmp_path, "a", 1000))
+        age(first, 100)
+        with archive.pinned("url:x:b"):
+            archive.put("url:x:b", download(tmp_path, "b", 1000))
+            # 两个条目都在使用中，暂时超出上限
+            assert archive.get("url:x:a") and archive.get("url:x:b")
+        # b 释放后总大小仍超出上限，立即淘汰；a 仍在使用中
+        assert archive.get("url:x:b") is None
+        assert archive.get("url:x:a")
+    assert sum(p.stat().st_size for p in (tmp_path / "archive").iterdir()) <= 1500
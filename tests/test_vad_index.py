@@ -0,0 +1,58 @@
+import pytest
+
+from audio_ingest import SAMPLE_RATE
+from transcriber_engine import TranscriptSegment
+from vad_index import SpeechIndex, SpeechMap
+
+SR = SAMPLE_RATE
+
+# 原始音频中的语音：[1s, 3s)、[10s, 11s)、[20s, 24s)；拼接后依次位于 [0, 2s)、[2s, 3s)、[3s, 7s)
+REGIONS = [(1 * SR, 3 * SR), (10 * SR, 11 * SR), (20 * SR, 24 * SR)]
+
+
+def test_compact_regions_are_contiguous():
+    assert SpeechMap(REGIONS).regions == [(0, 2 * SR), (2 * SR, 3 * SR), (3 * SR, 7 * SR)]
+
+
+@pytest.mark.parametrize("compact, original", [
+    (0.0, 1.0),
+    (1.5, 2.5),
+    (2.0, 10.0),
+    (2.5, 10.5),
+    (3.0, 20.0),
+    (6.5, 23.5),
+])
+def test_to_original(compact, original):
+    assert SpeechMap(REGIONS).to_original(compact) == pytest.approx(original)
+
+
+def test_end_on_a_join_belongs_to_the_previous_region():
+    speech_map = SpeechMap(REGIONS)
+    assert speech_map.to_original(2.0, is_end=True) == pytest.approx(3.0)
+    assert speech_map.to_original(3.0, is_end=True) == pytest.approx(11.0)
+    assert speech_map.to_original(0.0, is_end=True) == pytest.approx(1.0)
+
+
+def test_restore_maps_segment_and_words_with_offset():
+    seg = TranscriptSegment(1.5, 3.0, "跨 段", [(1.5, 2.0, "跨", 0.9), (2.0, 3.0, "段", 0.8)])
+    restored = SpeechMap(REGIONS).restore(seg, offset=100.0)
+    assert restored.text == "跨 段"
+    assert (restored.start, restored.end) == pytest.approx((102.5, 111.0))
+    assert [w[:2] for w in restored.words] == [pytest.approx((102.5, 103.0)), pytest.approx((110.0, 111.0))]
+    assert [w[2:] for w in restored.words] == [("跨", 0.9), ("段", 0.8)]
+
+
+def test_compact_drops_silence_and_returns_map():
+    np = pytest.importorskip("numpy")
+    audio = np.arange(30 * SR, dtype=np.float32)
+    compacted, speech_map = SpeechIndex(REGIONS, len(audio)).compact(audio)
+    assert len(compacted) == 7 * SR
+    assert compacted[2 * SR] == 10 * SR
+    assert speech_map.to_original(2.0) == pytest.approx(10.0)
+
+
+def test_compact_keeps_mostly_speech_audio():
+    np = pytest.importorskip("numpy")
+    audio = np.zeros(10 * SR, dtype=np.float32)
+    assert SpeechIndex([(0, int(9.5 * SR))], len(audio)).compact(audio)[1] is None
+    assert SpeechIndex([], len(audio)).compact(audio)[1] is None
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+视频转录工具 - 命令行批处理入口（无界面）
+用法示例：
+    python transcribe_cli.py ./videos --workers 4 --model small
+    python transcribe_cli.py "lectures/**/*.mp4" --language zh
+    python transcribe_cli.py manifest.txt --summary-json summary.json
+    python transcribe_cli.py ./videos --processes auto --cpu-threads 4
+    python transcribe_cli.py "https://www.youtube.com/playlist?list=..." --download-concurrency 3
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+from transcript_cache import get_transcript_cache
+from transcriber_engine import TranscribeOptions, TranscriptionEngine, collect_inputs, default_log, is_url
+from url_ingest import expand_sources, get_download_archive, set_download_concurrency
+
+
+def build_parser():
+    defaults = TranscribeOptions()
+    parser = argparse.ArgumentParser(description="视频转录工具 - 命令行批处理")
+    parser.add_argument("inputs", nargs="+", help="目录、通配符、清单文件（每行一个路径/链接）、文件或链接")
+    parser.add_argument("--model", default=defaults.model_size,
+                        choices=["tiny", "base", "small", "medium", "large-v2", "large-v3"], help="模型大小")
+    parser.add_argument("--compute-mode", default=defaults.compute_mode,
+                        choices=["auto", "float16", "float32", "int8", "cpu"], help="计算模式")
+    parser.add_argument("--language", default=defaults.language, help="语言代码，auto 为自动检测")
+    parser.add_argument("--no-vad", action="store_true", help="关闭 VAD 静音检测")
+    parser.add_argument("--beam-size", type=int, default=defaults.beam_size)
+    parser.add_argument("--batch-size", default="1",
+                        help="批量推理的批大小（每次前向计算解码多个 VAD 片段），auto 为自动选择")
+    parser.add_argument("--workers", type=int, default=1, help="并发转录的工作线程数")
+    parser.add_argument("--download-concurrency", type=int, default=2, help="在线链接同时下载的数量")
+    parser.add_argument("--no-expand", action="store_true",
+                        help="不展开播放列表/频道链接（默认展开为其中的全部视频并按视频ID去重）")
+    parser.add_argument("--no-download-archive", action="store_true", help="不保存/复用已下载的音频")
+    parser.add_argument("--archive-max-gb", type=float, default=5.0, help="下载归档容量上限（GB），超出后按 LRU 淘汰")
+    parser.add_argument("--prefetch", type=int, default=2, help="转录线程之外最多提前下载好的链接数")
+    parser.add_argument("--max-temp-gb", type=float, default=2.0, help="预取下载占用临时磁盘的上限（GB）")
+    parser.add_argument("--processes", default="",
+                        help="使用进程池并发转录：auto 按CPU核心数划分，或指定进程数（与 --workers 二选一）")
+    parser.add_argument("--cpu-threads", type=int, default=defaults.cpu_threads,
+                        help="CTranslate2 每个工作线程使用的CPU线程数（0 为自动）")
+    parser.add_argument("--long-form", action="store_true",
+                        help="长音频在静音处分块，多块并行转录后拼接时间戳")
+    parser.add_argument("--chunk-seconds", type=int, default=defaults.chunk_seconds, help="分块目标长度（秒）")
+    parser.add_argument("--chunk-workers", type=int, default=defaults.chunk_workers, help="单个文件分块并行的线程数")
+    parser.add_argument("--no-cache", action="store_true", help="不使用转录结果缓存")
+    parser.add_argument("--cache-dir", default="", help="转录缓存目录（默认位于用户缓存目录）")
+    parser.add_argument("--cache-max-gb", type=float, default=2.0, help="转录缓存容量上限（GB），超出后按 LRU 淘汰")
+    parser.add_argument("--no-audio-store", action="store_true", help="不保存解码后的音频（每次都重新调用 ffmpeg）")
+    parser.add_argument("--audio-store-max-gb", type=float, default=10.0,
+                        help="解码音频存储容量上限（GB，每小时音频约 115MB），超出后按 LRU 淘汰")
+    parser.add_argument("--no-resume", action="store_true", help="不使用断点续转（忽略并不再写入片段日志）")
+    parser.add_argument("--output-dir", default=defaults.output_dir, help="输出目录")
+    parser.add_argument("--no-srt", action="store_true", help="不保存 .srt 字幕文件")
+    parser.add_argument("--no-txt", action="store_true", help="不保存 .txt 文本文件")
+    parser.add_argument("--vtt", action="store_true", help="额外保存 .vtt 字幕文件")
+    parser.add_argument("--jsonl", action="store_true", help="额外保存 .jsonl（每行一个片段，含词级时间戳）")
+    parser.add_argument("--word-index", action="store_true",
+                        help="记录词级时间戳，保存 .words.tsv 并加入全文索引（用 transcript_index.py search 查询）")
+    parser.add_argument("--index-db", default="", help="全文索引数据库路径（默认位于用户缓存目录）")
+    parser.add_argument("--cookies", default="", help="cookies.txt 路径（会员/登录视频）")
+    parser.add_argument("--summary-json", default="", help="将每个文件的结果与吞吐量写入 JSON")
+    parser.add_argument("--autotune", action="store_true",
+                        help="使用已保存的自动调优配置（没有时用第一个本地输入校准），覆盖模型/精度/线程/批大小")
+    parser.add_argument("--target-rtf", type=float, default=0.5, help="自动调优的目标实时率（用时/音频时长）")
+    parser.add_argument("--metrics-file", default="", help="每秒采样速度/CPU/内存，写入 JSONL 时间序列")
+    parser.add_argument("--profile-report", default="",
+                        help="写入按阶段计时的性能报告（同名 .json 与 .html）")
+    parser.add_argument("--cprofile", action="store_true", help="对任务做 cProfile（保存在 输出目录/profiles；并发时同一时刻只分析一个）")
+    parser.add_argument("--warmup", action="store_true", help="开始前预热模型（加载并做一次推理）")
+    parser.add_argument("--verbose", action="store_true", help="打印每个转录片段")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    sources = collect_inputs(args.inputs)
+    fingerprints = {}
+    if not args.no_expand:
+        sources, fingerprints = expand_sources(sources, args.cookies, args.download_concurrency)
+    if not sources:
+        default_log("❌ 未找到可转录的文件", "ERROR")
+        return 2
+    default_log(f"共 {len(sources)} 个待转录文件", "INFO")
+
+    options = TranscribeOptions(
+        model_size=args.model,
+        compute_mode=args.compute_mode,
+        language=args.language,
+        vad_filter=not args.no_vad,
+        beam_size=args.beam_size,
+        cpu_threads=args.cpu_threads,
+        output_dir=args.output_dir,
+        save_srt=not args.no_srt,
+        save_txt=not args.no_txt,
+        save_vtt=args.vtt,
+        save_jsonl=args.jsonl,
+        cookie_file=args.cookies,
+        long_form=args.long_form,
+        chunk_seconds=args.chunk_seconds,
+        chunk_workers=args.chunk_workers,
+        batch_size=0 if args.batch_size == "auto" else int(args.batch_size),
+        use_cache=not args.no_cache,
+        resume=not args.no_resume,
+        cprofile=args.cprofile,
+        download_archive=not args.no_download_archive,
+        audio_store=not args.no_audio_store,
+        word_index=args.word_index,
+        word_index_db=args.index_db,
+    )
+    if args.autotune:
+        from autotune import apply_profile, calibrate, describe, load_profile, save_profile
+        profile = load_profile()
+        if profile is None:
+            # 用第一个本地输入校准，比合成音频更接近真实负载
+            sample = next((s for s in sources if not is_url(s) and os.path.isfile(s)), None)
+            profile = calibrate(args.target_rtf, log=default_log, sample=sample)
+            save_profile(profile)
+        apply_profile(options, profile)
+        default_log(f"⚡ 自动调优配置: {describe(profile)}", "INFO")
+    if options.use_cache:
+        get_transcript_cache(args.cache_dir or None, int(args.cache_max_gb * 1024**3))
+    if options.download_archive:
+        get_download_archive(max_bytes=int(args.archive_max_gb * 1024**3))
+    if options.audio_store:
+        from audio_store import get_audio_store
+        get_audio_store(max_bytes=int(args.audio_store_max_gb * 1024**3))
+    set_download_concurrency(args.download_concurrency)
+    if args.processes:
+        return run_process_pool(sources, options, args)
+
+    if args.warmup:
+        # 按并发数预热，之后 run_batch 直接命中模型缓存
+        options.num_workers = max(options.num_workers, args.workers)
+    engine = TranscriptionEngine(options)
+    engine.remember_fingerprints(fingerprints)
+    if args.warmup:
+        engine.warm_up()
+
+    metrics = None
+    if args.metrics_file:
+        from metrics import MetricsCollector
+        metrics = MetricsCollector(export_path=args.metrics_file).start()
+
+    def on_segment(segment, info):
+        if metrics:
+            metrics.record_segment(segment, key=id(info))
+        if args.verbose:
+            default_log(f"[{segment.start:.1f}s] {segment.text}", "RESULT")
+
+    started = time.perf_counter()
+    try:
+        results = engine.run_batch(sources, workers=args.workers, on_segment=on_segment,
+                                   download_concurrency=args.download_concurrency,
+                                   prefetch=args.prefetch,
+                                   max_temp_bytes=int(args.max_temp_gb * 1024**3))
+    finally:
+        if metrics:
+            metrics.stop()
+            default_log(f"📈 性能时间序列已保存: {args.metrics_file}", "INFO")
+
+    summaries = [r.summary() for r in results]
+    write_summary(args.summary_json, summaries)
+    write_profile_report(args.profile_report, summaries, options, time.perf_counter() - started)
+    return 0 if all(r.status == "done" for r in results) else 1
+
+
+def run_process_pool(sources, options, args):
+    """按核心数划分的进程池，每个进程独立持有模型"""
+    from job_queue import JobQueue
+
+    workers = 0 if args.processes == "auto" else int(args.processes)
+    started = time.perf_counter()
+    queue = JobQueue(options, workers=workers, log=default_log)
+    try:
+        queue.submit_many(sources)
+        jobs = queue.wait()
+    finally:
+        queue.shutdown(cancel_pending=False)
+
+    wall_time = time.perf_counter() - started
+    summaries = [job.result or {"source": job.source, "status": job.status, "error": job.error} for job in jobs]
+    audio_total = sum(s.get("audio_duration", 0) for s in summaries if s["status"] == "done")
+    done = sum(1 for job in jobs if job.status == "done")
+    default_log(f"✅ 批处理完成: {done}/{len(jobs)} 成功，音频 {audio_total:.1f}s，用时 {wall_time:.1f}s"
+                f" = {audio_total / wall_time if wall_time > 0 else 0:.2f} 音频秒/秒", "SUCCESS")
+    write_summary(args.summary_json, summaries)
+    write_profile_report(args.profile_report, summaries, options, wall_time)
+    return 0 if done == len(jobs) else 1
+
+
+def write_summary(path, summaries):
+    if not path:
+        return
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(summaries, f, ensure_ascii=False, indent=2)
+    default_log(f"💾 结果摘要已保存到: {path}", "SUCCESS")
+
+
+def write_profile_report(path, summaries, options, wall_time):
+    if not path:
+        return
+    from profiling import batch_report, save_report
+    json_path, html_path = save_report(batch_report(summaries, options, wall_time), path)
+    default_log(f"📊 性能报告已保存: {json_path} / {html_path}", "INFO")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
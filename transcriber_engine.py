@@ -0,0 +1,869 @@
+#!/usr/bin/env python3
+"""
+转录引擎 - 与GUI解耦的无界面转录核心
+可被GUI、命令行批处理（无界面Linux服务器）共同使用
+"""
+
+import os
+import glob
+import hashlib
+import importlib
+import shutil
+import tempfile
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from types import SimpleNamespace
+
+from audio_ingest import SAMPLE_RATE, decode_audio, download_native_audio, has_ffmpeg, probe_url
+from cancellation import CancelToken, Cancelled, run_cancellable, ytdlp_progress_hook
+from hardware import get_gpu_info
+from model_cache import get_model_cache
+from profiling import StageTimer
+from transcript_writers import TranscriptWriterSet
+
+
+MEDIA_EXTENSIONS = (
+    ".mp4", ".mkv", ".avi", ".mov", ".flv", ".webm",
+    ".mp3", ".wav", ".m4a", ".aac", ".flac", ".ogg", ".opus",
+)
+MANIFEST_EXTENSIONS = (".txt", ".lst", ".list")
+# 来自音频存储且长于此值的输入自动分块读取转录，常驻内存不随音频时长增长
+MAX_RESIDENT_SECONDS = 2 * 3600
+
+
+def default_log(message, level="INFO"):
+    """默认日志输出（打印到终端）"""
+    timestamp = datetime.now().strftime("%H:%M:%S")
+    print(f"[{timestamp}] [{level}] {message}", flush=True)
+
+
+def is_url(source):
+    return "://" in source or source.startswith("www.")
+
+
+def preload_heavy_modules(modules=("numpy", "faster_whisper", "yt_dlp")):
+    """在后台线程中提前导入重量级模块，界面先显示，首次转录时不再等待导入"""
+    def worker():
+        for module in modules:
+            try:
+                importlib.import_module(module)
+            except Exception:
+                pass
+    thread = threading.Thread(target=worker, daemon=True, name="preload")
+    thread.start()
+    return thread
+
+
+def collect_inputs(inputs):
+    """展开输入：目录（递归）、通配符、清单文件（每行一个路径或链接）、链接、文件"""
+    sources = []
+    for item in inputs:
+        item = item.strip()
+        if not item:
+            continue
+        if is_url(item):
+            sources.append(item)
+        elif os.path.isdir(item):
+            for root, _, files in os.walk(item):
+                for name in sorted(files):
+                    if name.lower().endswith(MEDIA_EXTENSIONS):
+                        sources.append(os.path.join(root, name))
+        elif os.path.isfile(item) and item.lower().endswith(MANIFEST_EXTENSIONS):
+            with open(item, 'r', encoding='utf-8') as f:
+                lines = [line.strip() for line in f]
+            sources.extend(collect_inputs([line for line in lines if line and not line.startswith('#')]))
+        elif os.path.isfile(item):
+            sources.append(item)
+        else:
+            sources.extend(sorted(glob.glob(item, recursive=True)))
+
+    # 去重并保持顺序
+    seen = set()
+    unique = []
+    for source in sources:
+        key = source if is_url(source) else os.path.abspath(source)
+        if key not in seen:
+            seen.add(key)
+            unique.append(source)
+    return unique
+
+
+def transcript_name_for(source):
+    """为批量任务生成不冲突的输出文件名"""
+    if is_url(source):
+        stem = "url"
+    else:
+        stem = Path(source).stem
+    stem = "".join(c if c.isalnum() or c in "-_" else "_" for c in stem)[:60]
+    digest = hashlib.sha1(source.encode('utf-8')).hexdigest()[:8]
+    return f"transcript_{stem}_{digest}"
+
+
+# 与 faster-whisper Segment 兼容的轻量片段（words 为 [(start, end, word, probability), ...]）
+TranscriptSegment = namedtuple("TranscriptSegment", "start end text words", defaults=(None,))
+
+
+def to_transcript_segment(seg, offset=0.0):
+    """将 faster-whisper 的 Segment 转为轻量片段（丢弃 tokens 等大字段），可选平移时间"""
+    if isinstance(seg, TranscriptSegment):
+        if not offset:
+            return seg
+        words = [(s + offset, e + offset, w, p) for s, e, w, p in seg.words] if seg.words else None
+        return TranscriptSegment(seg.start + offset, seg.end + offset, seg.text, words)
+    words = None
+    if getattr(seg, "words", None):
+        words = [(w.start + offset, w.end + offset, w.word, w.probability) for w in seg.words]
+    return TranscriptSegment(seg.start + offset, seg.end + offset, seg.text, words)
+
+
+@dataclass
+class TranscribeOptions:
+    """转录配置，对应GUI中的各项设置"""
+    model_size: str = "small"
+    compute_mode: str = "auto"
+    # auto / cpu / cuda；为 cpu 时 compute_mode 只决定精度（float32 或 int8），如自动调优得到的 CPU 配置
+    device: str = "auto"
+    language: str = "auto"
+    vad_filter: bool = True
+    beam_size: int = 5
+    cpu_threads: int = 0
+    num_workers: int = 1
+    output_dir: str = str(Path.home() / "Desktop" / "Transcripts")
+    save_srt: bool = True
+    save_txt: bool = True
+    save_vtt: bool = False
+    save_jsonl: bool = False
+    # .jsonl 是否含词级时间戳；服务端只把 .jsonl 用于片段回放时关闭
+    jsonl_words: bool = True
+    cookie_file: str = ""
+    # 长音频分块并行：音频长于 2 倍块长时启用
+    long_form: bool = False
+    chunk_seconds: int = 600
+    chunk_workers: int = 2
+    # 批量推理的批大小，0 表示自动
+    batch_size: int = 1
+    use_cache: bool = True
+    resume: bool = True
+    # 下载过的音频保存在缓存目录中，之后的运行直接复用（见 url_ingest.DownloadArchive）
+    download_archive: bool = True
+    # 解码后的 PCM 保存在缓存目录中并以内存映射读取（见 audio_store）
+    audio_store: bool = True
+    # 按输入身份持久化语音索引与解码音频；输入是一次性的临时文件（如服务端上传）时关闭
+    persist_inputs: bool = True
+    # 记录词级时间戳，写出 .words.tsv 并加入全文索引（见 transcript_index）
+    word_index: bool = False
+    # 全文索引数据库路径，空表示缓存目录中的默认位置
+    word_index_db: str = ""
+    # 对任务做 cProfile，结果保存在 输出目录/profiles（并发任务中同一时刻只分析一个）
+    cprofile: bool = False
+
+    @property
+    def word_timestamps(self):
+        """是否需要词级时间戳：全文索引与 .jsonl 输出都会用到"""
+        return self.word_index or (self.save_jsonl and self.jsonl_words)
+
+    @property
+    def batched(self):
+        """
+        是否使用批量推理；BatchedInferencePipeline 按 VAD 切出的片段组批，
+        关闭 VAD 时 30 秒以上的音频会直接报错（No clip timestamps found），因此退回逐段转录
+        """
+        return self.batch_size != 1 and self.vad_filter
+
+
+@dataclass
+class JobResult:
+    """单个文件的转录结果"""
+    source: str
+    status: str = "pending"
+    segment_count: int = 0
+    batch_size: int = 1
+    audio_duration: float = 0.0
+    wall_time: float = 0.0
+    output_files: list = field(default_factory=list)
+    error: str = ""
+    # 各阶段耗时（秒），见 profiling.STAGES
+    stages: dict = field(default_factory=dict)
+    cprofile_file: str = ""
+    # 语音占比（见 vad_index），未启用 VAD 时为 None
+    speech_ratio: float = None
+
+    @property
+    def throughput(self):
+        """音频秒数 / 实际耗时秒数"""
+        return self.audio_duration / self.wall_time if self.wall_time > 0 else 0.0
+
+    def summary(self):
+        return {
+            "source": self.source,
+            "status": self.status,
+            "segments": self.segment_count,
+            "batch_size": self.batch_size,
+            "audio_duration": round(self.audio_duration, 3),
+            "wall_time": round(self.wall_time, 3),
+            "throughput": round(self.throughput, 3),
+            "output_files": self.output_files,
+            "error": self.error,
+            "stages": self.stages,
+            "cprofile_file": self.cprofile_file,
+            "speech_ratio": None if self.speech_ratio is None else round(self.speech_ratio, 3),
+        }
+
+
+class TranscriptionEngine:
+    def __init__(self, options=None, log=None):
+        self.options = options or TranscribeOptions()
+        self.log = log or default_log
+        self.gpu_info = get_gpu_info()
+        self.has_gpu = self.gpu_info is not None
+        self._model = None
+        self._model_workers = 0
+        # 需要的模型实例数在任务开始前确定，任务执行中不再修改（其他线程可能正在使用同一模型）
+        self._workers_needed = self.model_workers(self.options.num_workers)
+        self._model_lock = threading.Lock()
+        self._url_fingerprints = {}
+
+    # --- 模型 ---
+    def resolve_compute(self):
+        """根据计算模式确定 (device, compute_type)"""
+        compute_mode = self.options.compute_mode
+        if compute_mode == "cpu" or self.options.device == "cpu" or not self.has_gpu:
+            # CPU 上 int8 比 float32 快得多；只有明确选择高精度模式时才用 float32
+            return "cpu", "float32" if compute_mode == "float32" else "int8"
+        if compute_mode == "auto":
+            vram = self.gpu_info['vram'] if self.gpu_info else 0
+            return "cuda", "float16" if vram >= 4 else "int8"
+        if compute_mode in ("float16", "int8", "int8_float16"):
+            return "cuda", compute_mode
+        return "cuda", "float32"
+
+    def model_workers(self, concurrency=1):
+        """CTranslate2 num_workers = 并发任务数 × 每个任务内的并发转录数（长音频分块并行时为 chunk_workers）"""
+        per_job = max(1, self.options.chunk_workers) if self.options.long_form else 1
+        return max(1, concurrency) * per_job
+
+    def load_model(self):
+        """从进程级模型缓存获取模型，未命中时才真正加载"""
+        try:
+            model_size = self.options.model_size
+            self.log(f"加载 {model_size} 模型...")
+
+            device, compute_type = self.resolve_compute()
+            if device == "cpu":
+                self.log("使用CPU模式", "INFO")
+            else:
+                self.log(f"使用GPU加速 ({compute_type}精度)", "SUCCESS")
+
+            return get_model_cache().get(model_size, device, compute_type,
+                                         cpu_threads=self.options.cpu_threads,
+                                         num_workers=self._workers_needed,
+                                         log=self.log)
+        except Exception as e:
+            self.log(f"❌ 模型加载失败: {e}", "ERROR")
+            return None
+
+    def warm_up(self):
+        """预热：提前加载模型并做一次推理，后续任务直接命中缓存"""
+        try:
+            device, compute_type = self.resolve_compute()
+            self.log(f"🔥 预热 {self.options.model_size} 模型...")
+            get_model_cache().warm_up(self.options.model_size, device, compute_type,
+                                      cpu_threads=self.options.cpu_threads,
+                                      num_workers=self._workers_needed,
+                                      log=self.log)
+            return True
+        except Exception as e:
+            self.log(f"模型预热失败: {e}", "WARNING")
+            return False
+
+    def get_model(self):
+        """同一引擎内只加载一次模型，供所有工作线程共享"""
+        with self._model_lock:
+            if self._model is None or self._model_workers < self._workers_needed:
+                self._model = self.load_model()
+                self._model_workers = self._workers_needed
+            return self._model
+
+    # --- 下载 ---
+    def download_audio_from_url(self, url, temp_dir, token=None, resources=None):
+        """
+        下载原始音频流（不再转码为 MP3），解码统一在转录前完成；token 取消时中止下载
+        启用下载归档时先按视频ID查找已下载的文件，新下载的文件移入归档（返回路径可能不在 temp_dir 中）
+        resources 为 ExitStack 时，归档条目在其关闭之前不会被淘汰
+        """
+        from url_ingest import download_slot, get_download_archive
+        archive = get_download_archive() if self.options.download_archive else None
+        fingerprint = self.url_fingerprint(url) if archive else None
+        if fingerprint:
+            if resources is not None:
+                resources.enter_context(archive.pinned(fingerprint))
+            archived = archive.get(fingerprint)
+            if archived:
+                self.log(f"♻️ 复用已下载的音频: {os.path.basename(archived)}", "INFO")
+                return archived
+
+        extra_opts = {'progress_hooks': [ytdlp_progress_hook(token)]} if token is not None else None
+        try:
+            with download_slot(token):
+                path = download_native_audio(url, temp_dir, self.options.cookie_file.strip(), extra_opts)
+        except Exception as e:
+            if token is not None and token.cancelled:
+                raise Cancelled()
+            self.log(f"下载失败: {str(e)}", "ERROR")
+            return None
+        if fingerprint and path and os.path.exists(path):
+            try:
+                return archive.put(fingerprint, path)
+            except OSError as e:
+                self.log(f"写入下载归档失败: {e}", "WARNING")
+        return path
+
+    # --- 音频存储 ---
+    def audio_store(self):
+        if not self.options.audio_store or not has_ffmpeg():
+            return None
+        from audio_store import get_audio_store
+        return get_audio_store()
+
+    def has_stored_audio(self, source):
+        """已有解码好的音频（预取阶段据此跳过下载）"""
+        store = self.audio_store()
+        key = self._input_key(source) if store else None
+        return bool(key) and store.contains(key)
+
+    def stored_audio(self, source, token=None):
+        """返回 source 在音频存储中的条目，没有时下载/解码并写入"""
+        store = self.audio_store()
+        key = self._input_key(source)
+        if not store or not key:
+            raise RuntimeError("音频存储不可用（需要 ffmpeg，且已启用 audio_store）")
+        stored = store.get(key)
+        if stored:
+            return stored
+        if not is_url(source):
+            return store.ingest(key, source, cancel=token)
+        with ExitStack() as resources:
+            temp_dir = tempfile.mkdtemp()
+            resources.callback(shutil.rmtree, temp_dir, ignore_errors=True)
+            input_file = self.download_audio_from_url(source, temp_dir, token, resources)
+            if not input_file or not os.path.exists(input_file):
+                raise Exception("音频下载失败")
+            return store.ingest(key, input_file, cancel=token)
+
+    def preview_region(self, source, start, end, path=None):
+        """把 [start, end) 秒导出为 WAV 供试听，返回文件路径"""
+        path = path or os.path.join(tempfile.gettempdir(), f"preview_{start:.0f}_{end:.0f}.wav")
+        return self.stored_audio(source).write_wav(path, start, end)
+
+    def transcribe_region(self, source, start, end, should_stop=None, on_segment=None):
+        """
+        只重新转录 [start, end) 秒：从音频存储中随机读取该区间，不重新解码整个文件
+        返回按原始时间轴的片段列表（不写出文件、不进入缓存）
+        """
+        token = CancelToken.wrap(should_stop) if should_stop else CancelToken()
+        audio = self.stored_audio(source, token).view(start, end)[:]
+        model = run_cancellable(self.get_model, token)
+        if not model:
+            raise Exception("模型加载失败")
+        language = self.options.language
+        segments, info = model.transcribe(audio, beam_size=self.options.beam_size,
+                                          language=None if language == "auto" else language,
+                                          vad_filter=self.options.vad_filter,
+                                          word_timestamps=self.options.word_timestamps, task="transcribe")
+        info = SimpleNamespace(duration=start + info.duration, language=info.language)
+        results = []
+        for seg in segments:
+            if token():
+                break
+            seg = to_transcript_segment(seg, start)
+            results.append(seg)
+            if on_segment:
+                on_segment(seg, info)
+        return results
+
+    # --- 转录缓存 ---
+    def transcript_cache(self):
+        if not self.options.use_cache:
+            return None
+        from transcript_cache import get_transcript_cache
+        return get_transcript_cache()
+
+    def cache_settings(self):
+        """影响转录结果的全部设置，作为缓存键的一部分"""
+        _, compute_type = self.resolve_compute()
+        settings = {
+            "model": self.options.model_size,
+            "compute_type": compute_type,
+            "language": self.options.language,
+            "beam_size": self.options.beam_size,
+            "vad_filter": self.options.vad_filter,
+        }
+        if self.options.vad_filter:
+            from vad_index import VAD_VERSION
+            settings["speech_index"] = VAD_VERSION
+        if self.options.word_timestamps:
+            settings["word_timestamps"] = True
+        if self.options.long_form:
+            settings["chunk_seconds"] = self.options.chunk_seconds
+        if self.options.batched:
+            settings["batched"] = True
+        return settings
+
+    def url_fingerprint(self, url):
+        """链接的 提取器+视频ID（只取元数据，不下载）"""
+        if url not in self._url_fingerprints:
+            from transcript_cache import url_fingerprint
+            fingerprint = None
+            try:
+                info = probe_url(url, self.options.cookie_file.strip())
+                if info.get("id"):
+                    fingerprint = url_fingerprint(info.get("extractor_key") or info.get("ie_key") or "generic",
+                                                  info["id"])
+            except Exception as e:
+                self.log(f"获取视频ID失败，跳过链接缓存: {e}", "WARNING")
+            self._url_fingerprints[url] = fingerprint
+        return self._url_fingerprints[url]
+
+    def remember_fingerprints(self, fingerprints):
+        """记录已知的 链接 → 指纹（来自播放列表展开），之后不必再逐个获取视频ID"""
+        self._url_fingerprints.update(fingerprints)
+
+    def has_cached_transcript(self, source):
+        """链接是否已有缓存结果（预取阶段据此跳过下载）"""
+        cache = self.transcript_cache()
+        if not cache or not is_url(source):
+            return False
+        fingerprint = self.url_fingerprint(source)
+        return bool(fingerprint) and cache.contains(cache.make_key(fingerprint, self.cache_settings()))
+
+    def _serve_from_cache(self, result, cache, cache_key, on_segment, base_name):
+        hit = cache.get(cache_key)
+        if hit is None:
+            self.log(f"转录缓存未命中（{cache.describe()}）", "INFO")
+            return False
+        entry, segments = hit
+        info = SimpleNamespace(duration=entry.get("duration", 0.0), language=entry.get("language"))
+        result.audio_duration = info.duration
+        writers = self.open_writers(base_name, self._output_metadata(result.source, info))
+        try:
+            for segment in segments:
+                writers.write(segment)
+                result.segment_count += 1
+                if on_segment:
+                    on_segment(segment, info)
+        except Exception:
+            writers.abort()
+            raise
+        result.output_files = self._finalize_output(writers)
+        result.status = "done"
+        self.log(f"💡 转录缓存命中，直接使用已保存的结果（{cache.describe()}）", "SUCCESS")
+        return True
+
+    # --- 转录 ---
+    def transcribe_source(self, source, should_stop=None, on_segment=None, base_name=None, input_file=None):
+        """
+        转录单个本地文件或在线链接，返回 JobResult；input_file 为已预取好的音频
+        should_stop 可以是 CancelToken（支持暂停与立即中止子进程）或普通回调
+        """
+        token = CancelToken.wrap(should_stop) if should_stop else CancelToken()
+        result = JobResult(source=source)
+        timer = StageTimer()
+        # 任务结束时统一释放：临时目录、音频存储/下载归档中正在使用的条目
+        resources = ExitStack()
+        started = time.perf_counter()
+        try:
+            if self.options.cprofile:
+                from profiling import cprofile_capture
+                result.cprofile_file = os.path.join(
+                    self.options.output_dir, "profiles",
+                    f"{base_name or transcript_name_for(source)}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.prof")
+                with cprofile_capture(result.cprofile_file) as profiler:
+                    if profiler is None:
+                        result.cprofile_file = ""
+                        self.log("已有任务在做 cProfile，本任务不做分析", "INFO")
+                    self._run_job(result, timer, token, on_segment, base_name, input_file, resources)
+            else:
+                self._run_job(result, timer, token, on_segment, base_name, input_file, resources)
+        except Cancelled:
+            result.status = "stopped"
+            self.log("⏹️ 转录已停止", "WARNING")
+        except Exception as e:
+            result.status = "failed"
+            result.error = str(e)
+            self.log(f"❌ 转录出错: {e}", "ERROR")
+        finally:
+            resources.close()
+            result.wall_time = time.perf_counter() - started
+            result.stages = timer.as_dict()
+
+        if result.status == "done" and self.options.word_index:
+            self._update_word_index(result)
+        if result.status == "done":
+            self.log(f"📊 {result.source}: 音频 {result.audio_duration:.1f}s / 用时 {result.wall_time:.1f}s"
+                     f" = {result.throughput:.2f} 音频秒/秒", "INFO")
+        return result
+
+    def _run_job(self, result, timer, token, on_segment, base_name, input_file, resources):
+        source = result.source
+        cache = self.transcript_cache()
+        cache_key = None
+        if cache and is_url(source):
+            # 链接按视频ID查缓存，命中时连下载都可以省掉
+            with timer.stage("cache_lookup"):
+                fingerprint = self.url_fingerprint(source)
+                if fingerprint:
+                    cache_key = cache.make_key(fingerprint, self.cache_settings())
+                    if self._serve_from_cache(result, cache, cache_key, on_segment, base_name):
+                        return
+
+        journal, header, restored, offset = self._open_journal(source)
+        if restored:
+            self.log(f"⏩ 发现未完成的转录，已完成 {restored} 个片段，从 {offset:.1f}s 继续", "INFO")
+            cache_key = header.get("cache_key")
+
+        input_key = self._input_key(source)
+        speech_index = None
+        if self.options.vad_filter and not offset and input_key:
+            from vad_index import load_index
+            speech_index = load_index(input_key)
+            if speech_index:
+                self.log(f"🗣️ {speech_index.describe()}（已有语音索引）", "INFO")
+                if not speech_index.regions:
+                    self._finish_silent(result, base_name, speech_index, journal)
+                    return
+        store = self.audio_store() if input_key else None
+        if store:
+            resources.enter_context(store.pinned(input_key))
+        stored = store.get(input_key) if store else None
+
+        if stored or input_file:
+            pass
+        elif is_url(source):
+            temp_dir = tempfile.mkdtemp()
+            resources.callback(shutil.rmtree, temp_dir, ignore_errors=True)
+            self.log("正在下载音频...", "INFO")
+            with timer.stage("download"):
+                input_file = self.download_audio_from_url(source, temp_dir, token, resources)
+            if not input_file or not os.path.exists(input_file):
+                raise Exception("音频下载失败")
+        else:
+            input_file = source
+
+        if stored:
+            # 之前解码过：直接内存映射，不再调用 ffmpeg（续转时从断点处切片）
+            audio = stored.view(offset)
+            self.log(f"🎧 复用音频存储中的 PCM: {len(audio) / SAMPLE_RATE:.1f}s", "INFO")
+        else:
+            with timer.stage("decode"):
+                if store:
+                    # 边解码边写入存储，内存中只保留当前一块
+                    stored = store.ingest(input_key, input_file, cancel=token)
+                    audio = stored.view(offset)
+                else:
+                    # 续转时直接定位到断点，不解码已转录的部分
+                    audio = decode_audio(input_file, start=offset, cancel=token)
+            self.log(f"🎧 已解码为 16kHz 单声道 PCM: {len(audio) / SAMPLE_RATE:.1f}s"
+                     f"（用时 {timer.stages['decode']:.1f}s）", "INFO")
+
+        if cache and cache_key is None and not restored:
+            from transcript_cache import audio_fingerprint
+            with timer.stage("cache_lookup"):
+                cache_key = cache.make_key(audio_fingerprint(audio), self.cache_settings())
+                if self._serve_from_cache(result, cache, cache_key, on_segment, base_name):
+                    return
+
+        duration = len(audio) / SAMPLE_RATE
+        speech_map = None
+        if self.options.vad_filter:
+            if speech_index is None:
+                from vad_index import build_index, save_index
+                with timer.stage("speech_index"):
+                    speech_index = build_index(audio)
+                if input_key and not offset:
+                    save_index(input_key, speech_index)
+                self.log(f"🗣️ {speech_index.describe()}", "INFO")
+            result.speech_ratio = speech_index.speech_ratio
+            if not speech_index.regions and not restored:
+                self._finish_silent(result, base_name, speech_index, journal)
+                return
+
+        # 很长的存储音频不整体转换为 float32，改为分块从内存映射读取
+        chunked_read = stored is not None and len(audio) > MAX_RESIDENT_SECONDS * SAMPLE_RATE
+        if speech_index and speech_index.regions and not chunked_read:
+            # 只把语音部分送入模型，片段时间再映射回原始时间轴
+            audio, speech_map = speech_index.compact(audio)
+
+        long_form = chunked_read or \
+            (self.options.long_form and len(audio) > 2 * self.options.chunk_seconds * SAMPLE_RATE)
+        if long_form and speech_index is None and stored is not None:
+            # 未启用 VAD 时也需要在静音处切分；Silero 只接受 ndarray，
+            # 存储中的音频改用能量 VAD 逐段读取内存映射，不整体转换为 float32
+            from vad_index import build_index
+            speech_index = build_index(audio)
+        if chunked_read and not self.options.long_form:
+            self.log("📼 音频较长，按块从音频存储读取并转录", "INFO")
+
+        with timer.stage("model_load"):
+            # 加载本身无法中断；取消时不再等待，加载完成的模型仍会进入缓存
+            model = run_cancellable(self.get_model, token)
+        if not model:
+            raise Exception("模型加载失败")
+
+        self.log("开始转录...", "INFO")
+        language = self.options.language
+        transcribe_kwargs = dict(
+            beam_size=self.options.beam_size,
+            language=None if language == "auto" else language,
+            vad_filter=self.options.vad_filter,
+            word_timestamps=self.options.word_timestamps,
+            task="transcribe"
+        )
+        if restored and header.get("language"):
+            # 续转部分沿用首次检测到的语言
+            transcribe_kwargs["language"] = header["language"]
+        transcriber = model
+        if self.options.batch_size > 1 and not self.options.batched:
+            # 自动批大小（0）时静默退回
+            self.log("批量推理需要启用 VAD 静音过滤，本次逐段转录", "WARNING")
+        if self.options.batched:
+            from batched_inference import batched_pipeline, resolve_batch_size
+            device, compute_type = self.resolve_compute()
+            with timer.stage("batch_probe"):
+                result.batch_size = resolve_batch_size(self.options.batch_size, model, self.options.model_size,
+                                                       device, compute_type, log=self.log)
+            if result.batch_size > 1:
+                # 每次前向计算解码多个 VAD 片段
+                transcriber = batched_pipeline(model)
+                transcribe_kwargs["batch_size"] = result.batch_size
+                self.log(f"📦 批量推理: 批大小 {result.batch_size}", "INFO")
+        if restored and len(audio) < SAMPLE_RATE // 10:
+            # 上次已转录到结尾，只差保存输出
+            segments, info = [], SimpleNamespace(duration=len(audio) / SAMPLE_RATE, language=header.get("language"))
+        elif long_form:
+            from long_form import LongFormTranscriber
+            with timer.stage("vad"):
+                segments, info = LongFormTranscriber(
+                    transcriber, transcribe_kwargs,
+                    # 模型实例只按启用了长音频模式预留；仅因音频过长而分块读取时逐块转录
+                    workers=self.options.chunk_workers if self.options.long_form else 1,
+                    chunk_seconds=self.options.chunk_seconds,
+                    log=self.log,
+                ).transcribe(audio, token, speech=speech_map.regions if speech_map else
+                             speech_index.regions if speech_index else None)
+        else:
+            # transcribe() 在返回生成器之前同步完成 VAD 与语言检测
+            # （来自音频存储的视图在此整体转换为 float32；ndarray 的切片不复制）
+            with timer.stage("vad"):
+                segments, info = transcriber.transcribe(audio[:], **transcribe_kwargs)
+        segments = timer.timed_segments(segments)
+        # 时长与进度均以完整音频为准
+        info = SimpleNamespace(duration=offset + duration, language=info.language)
+        result.audio_duration = info.duration
+
+        writers = self.open_writers(base_name, self._output_metadata(source, info))
+        cache_writer = None
+        if cache and cache_key:
+            cache_writer = cache.writer(cache_key, source=source, language=info.language, duration=info.duration)
+        if journal:
+            journal.open({"source": source, "cache_key": cache_key, "language": info.language}, restored)
+        try:
+            # 先重放日志中已完成的片段，再继续新的片段；全部边到达边写出，不在内存中累积
+            finished = journal.iter_segments(restored) if restored else ()
+            with timer.stage("write"):
+                for segment in finished:
+                    self._emit(segment, info, result, writers, cache_writer, on_segment)
+
+            for segment in segments:
+                if token():
+                    result.status = "stopped"
+                    self.log("⏹️ 转录已停止" + ("，进度已保存，下次可继续" if journal else ""), "WARNING")
+                    segments.close()
+                    break
+                segment = speech_map.restore(segment, offset) if speech_map else to_transcript_segment(segment, offset)
+                with timer.stage("write"):
+                    if journal:
+                        journal.append(segment)
+                    self._emit(segment, info, result, writers, cache_writer, on_segment)
+        except Exception:
+            # 保留 .part 文件以便排查
+            writers.close()
+            if cache_writer:
+                cache_writer.abort()
+            raise
+        finally:
+            if journal:
+                journal.close()
+
+        if result.status == "stopped":
+            writers.abort()
+            if cache_writer:
+                cache_writer.abort()
+            return
+
+        with timer.stage("write"):
+            result.output_files = self._finalize_output(writers)
+        result.status = "done"
+        if cache_writer:
+            cache_writer.commit()
+        if journal:
+            journal.discard()
+
+    def _input_key(self, source):
+        """语音索引与音频存储按输入身份保存：链接用视频ID，本地文件用 路径+大小+修改时间"""
+        if not self.options.persist_inputs:
+            return None
+        if is_url(source):
+            return self.url_fingerprint(source)
+        from checkpoint import file_fingerprint
+        try:
+            return file_fingerprint(source)
+        except OSError:
+            return None
+
+    def _finish_silent(self, result, base_name, speech_index, journal):
+        """整个文件没有语音：不加载模型、不转录，只写出空的输出文件"""
+        result.audio_duration = speech_index.total_samples / speech_index.sample_rate
+        result.speech_ratio = 0.0
+        result.output_files = self._finalize_output(self.open_writers(
+            base_name, {"source": result.source, "duration": result.audio_duration}))
+        result.status = "done"
+        if journal:
+            journal.discard()
+        self.log("🔇 未检测到语音，跳过转录", "WARNING")
+
+    @staticmethod
+    def _emit(segment, info, result, writers, cache_writer, on_segment):
+        writers.write(segment)
+        if cache_writer:
+            cache_writer.write(segment)
+        result.segment_count += 1
+        if on_segment:
+            on_segment(segment, info)
+
+    def _open_journal(self, source):
+        """按输入身份+设置找到续转日志，返回 (journal, header, 已完成片段数, 续转起点秒数)"""
+        if not self.options.resume:
+            return None, None, 0, 0.0
+        from checkpoint import SegmentJournal, file_fingerprint
+        from transcript_cache import TranscriptCache
+        try:
+            fingerprint = self.url_fingerprint(source) if is_url(source) else file_fingerprint(source)
+        except OSError:
+            fingerprint = None
+        if not fingerprint:
+            return None, None, 0, 0.0
+        journal = SegmentJournal.for_key(TranscriptCache.make_key(fingerprint, self.cache_settings()))
+        header, restored, offset = journal.load()
+        return journal, header, restored, offset
+
+    def run_batch(self, sources, workers=1, should_stop=None, on_segment=None,
+                  download_concurrency=2, prefetch=2, max_temp_bytes=2 * 1024**3):
+        """
+        使用线程池批量转录，模型在所有工作线程间共享
+        含在线链接时，下载由预取流水线提前进行，转录线程无需等待 yt-dlp
+        返回的结果与 sources 顺序一致（与完成顺序无关）
+        """
+        workers = max(1, min(workers, len(sources) or 1))
+        # CTranslate2 需要 num_workers >= 并发转录数才能真正并行执行；在任何任务开始前确定
+        with self._model_lock:
+            self._workers_needed = max(self._workers_needed, self.model_workers(workers))
+        if not self.get_model():
+            return [JobResult(source=s, status="failed", error="模型加载失败") for s in sources]
+
+        results = []
+        results_lock = threading.Lock()
+
+        def report(future):
+            result = future.result()
+            with results_lock:
+                results.append(result)
+                index = len(results)
+            self.log(f"[{index}/{len(sources)}] {result.status}: {result.source}", "INFO")
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            if any(is_url(source) for source in sources):
+                from pipeline import DownloadPrefetcher
+                prefetcher = DownloadPrefetcher(
+                    self, sources,
+                    concurrency=download_concurrency,
+                    max_prefetch=workers + prefetch,
+                    max_temp_bytes=max_temp_bytes,
+                    should_stop=should_stop,
+                )
+                for item in prefetcher:
+                    pool.submit(self._transcribe_prefetched, prefetcher, item,
+                                should_stop, on_segment).add_done_callback(report)
+            else:
+                for source in sources:
+                    pool.submit(self.transcribe_source, source, should_stop, on_segment,
+                                transcript_name_for(source)).add_done_callback(report)
+
+        wall_time = time.perf_counter() - started
+        audio_total = sum(r.audio_duration for r in results if r.status == "done")
+        done = sum(1 for r in results if r.status == "done")
+        self.log(f"✅ 批处理完成: {done}/{len(sources)} 成功，音频 {audio_total:.1f}s，用时 {wall_time:.1f}s"
+                 f" = {audio_total / wall_time if wall_time > 0 else 0:.2f} 音频秒/秒", "SUCCESS")
+        order = {}
+        for index, source in enumerate(sources):
+            order.setdefault(source, index)
+        return sorted(results, key=lambda r: order.get(r.source, len(sources)))
+
+    def _transcribe_prefetched(self, prefetcher, item, should_stop, on_segment):
+        try:
+            if item.error:
+                self.log(f"❌ 转录出错: {item.error}", "ERROR")
+                return JobResult(source=item.source, status="failed", error=item.error)
+            return self.transcribe_source(item.source, should_stop, on_segment,
+                                          transcript_name_for(item.source), input_file=item.input_file)
+        finally:
+            prefetcher.release(item)
+
+    # --- 输出 ---
+    def output_formats(self):
+        o = self.options
+        return [fmt for fmt, enabled in (("txt", o.save_txt), ("srt", o.save_srt), ("vtt", o.save_vtt),
+                                         ("jsonl", o.save_jsonl), ("words", o.word_index)) if enabled]
+
+    @staticmethod
+    def _output_metadata(source, info):
+        """写入 .words.tsv 首行，使每个转录文件可独立识别来源"""
+        return {"source": source, "language": info.language, "duration": round(info.duration, 3)}
+
+    def open_writers(self, base_name=None, metadata=None):
+        """打开流式输出，片段到达即写入"""
+        base_name = base_name or f"transcript_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        return TranscriptWriterSet(self.options.output_dir, base_name, self.output_formats(), metadata)
+
+    def _update_word_index(self, result):
+        """把新写出的 .words.tsv 增量加入全文索引"""
+        from transcript_index import WORDS_SUFFIX, get_transcript_index
+        for path in result.output_files:
+            if path.endswith(WORDS_SUFFIX):
+                try:
+                    get_transcript_index(self.options.word_index_db or None).add(path, result.source)
+                    self.log("🔎 已加入全文索引", "INFO")
+                except Exception as e:
+                    self.log(f"全文索引更新失败: {e}", "WARNING")
+
+    def _finalize_output(self, writers):
+        written = writers.finalize()
+        self.log(f"💾 已保存到: {self.options.output_dir}", "SUCCESS")
+        return written
+
+    def save_transcript(self, segments, base_name=None):
+        """一次性保存一组已完成的片段"""
+        writers = self.open_writers(base_name)
+        try:
+            for seg in segments:
+                writers.write(seg)
+        except Exception:
+            writers.abort()
+            raise
+        return self._finalize_output(writers)
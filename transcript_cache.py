@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+转录结果缓存 - 按内容寻址的磁盘缓存
+键 = 解码后音频的哈希（或 链接的提取器+视频ID） + 模型/精度/语言/beam_size/VAD 等解码设置
+"""
+
+import hashlib
+import json
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+from transcriber_engine import TranscriptSegment
+
+DEFAULT_MAX_BYTES = 2 * 1024**3
+
+
+def cache_root():
+    """所有磁盘缓存的根目录，可通过环境变量 TRANSCRIBER_CACHE_DIR 覆盖"""
+    root = os.environ.get("TRANSCRIBER_CACHE_DIR")
+    if root:
+        return Path(root)
+    if os.name == "nt" and os.environ.get("LOCALAPPDATA"):
+        return Path(os.environ["LOCALAPPDATA"]) / "video_transcriber"
+    return Path.home() / ".cache" / "video_transcriber"
+
+
+def audio_fingerprint(audio):
+    """解码后 PCM 的内容哈希（不复制数组）；音频存储的视图直接使用写入时计算的指纹"""
+    if getattr(audio, "fingerprint", None):
+        return audio.fingerprint
+    return "pcm:" + hashlib.sha256(memoryview(audio).cast("B")).hexdigest()
+
+
+def url_fingerprint(extractor, video_id):
+    return f"url:{extractor.lower()}:{video_id}"
+
+
+class InUse:
+    """正在使用的缓存条目（按名称引用计数），淘汰时跳过"""
+
+    def __init__(self):
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def __contains__(self, name):
+        with self._lock:
+            return name in self._counts
+
+    @contextmanager
+    def hold(self, name):
+        with self._lock:
+            self._counts[name] = self._counts.get(name, 0) + 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._counts[name] -= 1
+                if not self._counts[name]:
+                    del self._counts[name]
+
+
+def evict_lru(entries, max_bytes, in_use=()):
+    """
+    entries 为 [(最近使用时间, 字节数, 名称, [文件, ...]), ...]
+    总大小超出 max_bytes 时从最久未使用的条目开始删除，in_use 中的条目跳过；返回删除的条目数
+    """
+    total = sum(size for _, size, _, _ in entries)
+    evicted = 0
+    for _, size, name, paths in sorted(entries, key=lambda e: e[0]):
+        if total <= max_bytes:
+            break
+        if name in in_use:
+            continue
+        try:
+            for path in paths:
+                path.unlink()
+        except OSError:
+            continue
+        total -= size
+        evicted += 1
+    return evicted
+
+
+class TranscriptCache:
+    def __init__(self, root=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = Path(root) if root else cache_root() / "transcripts"
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    @staticmethod
+    def make_key(fingerprint, settings):
+        payload = json.dumps({"fingerprint": fingerprint, "settings": settings}, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return self.root / key[:2] / f"{key}.jsonl"
+
+    def contains(self, key):
+        return self._path(key).exists()
+
+    def get(self, key):
+        """命中时返回 (entry, 逐个读取片段的迭代器)，未命中返回 None；损坏的条目按未命中处理并删除"""
+        path = self._path(key)
+        try:
+            f = open(path, 'r', encoding='utf-8')
+        except OSError:
+            with self._lock:
+                self.stats["misses"] += 1
+            return None
+        try:
+            entry = json.loads(f.readline())
+            if not isinstance(entry, dict):
+                raise ValueError("条目头部无效")
+            start = f.tell()
+            # 先逐行校验一遍（不保留片段），避免输出写到一半才发现条目被截断
+            for line in f:
+                self._decode(line)
+            f.seek(start)
+        except (ValueError, IndexError, TypeError):
+            f.close()
+            with self._lock:
+                self.stats["misses"] += 1
+                try:
+                    os.remove(path)
+                    self.stats["evictions"] += 1
+                except OSError:
+                    pass
+            return None
+        # 更新访问时间，供 LRU 淘汰使用
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        with self._lock:
+            self.stats["hits"] += 1
+        return entry, self._iter_segments(f)
+
+    @staticmethod
+    def _decode(line):
+        return TranscriptSegment(*json.loads(line))
+
+    @classmethod
+    def _iter_segments(cls, f):
+        with f:
+            for line in f:
+                yield cls._decode(line)
+
+    def writer(self, key, **metadata):
+        """流式写入新条目，commit() 后才对读取者可见"""
+        return _EntryWriter(self, self._path(key), metadata)
+
+    def evict(self):
+        """总大小超出上限时，按最近访问时间淘汰最旧的条目"""
+        with self._lock:
+            entries = []
+            for path in self.root.glob("*/*.jsonl"):
+                try:
+                    st = path.stat()
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path.name, [path]))
+            self.stats["evictions"] += evict_lru(entries, self.max_bytes)
+
+    def describe(self):
+        s = self.stats
+        total = s["hits"] + s["misses"]
+        ratio = s["hits"] / total * 100 if total else 0
+        return f"转录缓存: 命中 {s['hits']} | 未命中 {s['misses']} | 命中率 {ratio:.0f}%"
+
+
+class _EntryWriter:
+    def __init__(self, cache, path, metadata):
+        self.cache = cache
+        self.path = path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        self._file = open(self.tmp_path, 'w', encoding='utf-8')
+        self._file.write(json.dumps(metadata, ensure_ascii=False) + "\n")
+
+    def write(self, seg):
+        self._file.write(json.dumps([seg.start, seg.end, seg.text, seg.words], ensure_ascii=False) + "\n")
+
+    def commit(self):
+        self._file.close()
+        os.replace(self.tmp_path, self.path)
+        self.cache.evict()
+
+    def abort(self):
+        self._file.close()
+        try:
+            os.remove(self.tmp_path)
+        except OSError:
+            pass
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_transcript_cache(root=None, max_bytes=None):
+    """进程级单例；首次调用时可指定目录与容量上限"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = TranscriptCache(root, max_bytes or DEFAULT_MAX_BYTES)
+        return _cache
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+转录全文索引 - 基于每个转录的 .words.tsv（词级时间戳）建立 SQLite 倒排索引
+- 任务完成后增量加入索引；同一文件重新生成后替换旧记录，未变化的文件直接跳过
+- 查询返回 来源 + 毫秒级时间偏移；多个词按相邻位置做短语匹配，末尾加 * 为前缀匹配
+- 中日韩文字按单字建索引，查询时同样按单字拆分后做短语匹配
+用法：
+    python transcript_index.py index ~/Desktop/Transcripts
+    python transcript_index.py search "gradient descent" --limit 20
+    python transcript_index.py search "机器学习"
+"""
+
+import argparse
+import json
+import os
+import re
+import sqlite3
+import threading
+from collections import namedtuple
+
+from transcript_writers import WordsWriter
+
+INDEX_VERSION = 1
+WORDS_SUFFIX = WordsWriter.extension
+# 前缀查询最多展开的词项数
+MAX_PREFIX_TERMS = 200
+# 中日韩文字（假名、汉字、谚文）逐字作为词项
+_CJK = "\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff"
+_TOKEN = re.compile(f"[{_CJK}]|[^\\W_{_CJK}]+")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    source TEXT NOT NULL,
+    language TEXT,
+    duration REAL,
+    mtime_ns INTEGER,
+    size INTEGER,
+    tokens INTEGER
+);
+CREATE TABLE IF NOT EXISTS terms (id INTEGER PRIMARY KEY, term TEXT UNIQUE NOT NULL);
+CREATE TABLE IF NOT EXISTS postings (
+    term_id INTEGER NOT NULL,
+    doc_id INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    start_ms INTEGER NOT NULL,
+    PRIMARY KEY (term_id, doc_id, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_doc ON postings (doc_id);
+"""
+
+SearchHit = namedtuple("SearchHit", "source start_ms path position context")
+
+
+def tokenize(text):
+    return [t.lower() for t in _TOKEN.findall(text)]
+
+
+def read_words(path):
+    """返回 (元数据, 逐行产出 (start_ms, end_ms, 置信度或 None, 词) 的迭代器)"""
+    f = open(path, 'r', encoding='utf-8')
+    first = f.readline()
+    metadata = json.loads(first[2:]) if first.startswith("# ") else {}
+
+    def rows():
+        with f:
+            for line in f:
+                parts = line.rstrip("\n").split("\t", 3)
+                if len(parts) == 4:
+                    yield int(parts[0]), int(parts[1]), int(parts[2]) if parts[2] else None, parts[3]
+    return metadata, rows()
+
+
+def default_index_path():
+    from transcript_cache import cache_root
+    return cache_root() / "transcript_index.sqlite3"
+
+
+class TranscriptIndex:
+    def __init__(self, path=None):
+        self.path = str(path or default_index_path())
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        # 多个工作进程可能同时写入：WAL + 忙等待；进程内共用一个连接，读写都用锁串行化
+        self._conn = sqlite3.connect(self.path, timeout=60, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.executescript(SCHEMA)
+            self._conn.execute("INSERT OR IGNORE INTO meta VALUES ('version', ?)", (str(INDEX_VERSION),))
+
+    def close(self):
+        self._conn.close()
+
+    # --- 写入 ---
+    def add(self, path, source=None):
+        """加入或更新一个 .words.tsv；文件未变化时跳过，返回是否重新建立了索引"""
+        path = os.path.abspath(path)
+        st = os.stat(path)
+        with self._lock:
+            row = self._conn.execute("SELECT mtime_ns, size FROM documents WHERE path = ?", (path,)).fetchone()
+        if row == (st.st_mtime_ns, st.st_size):
+            return False
+
+        metadata, rows = read_words(path)
+        postings = []
+        position = 0
+        for start_ms, _, _, word in rows:
+            for term in tokenize(word):
+                postings.append((term, position, start_ms))
+                position += 1
+
+        with self._lock, self._conn:
+            conn = self._conn
+            conn.execute("DELETE FROM postings WHERE doc_id = (SELECT id FROM documents WHERE path = ?)", (path,))
+            conn.execute("INSERT OR REPLACE INTO documents (path, source, language, duration, mtime_ns, size, tokens)"
+                         " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                         (path, source or metadata.get("source") or path, metadata.get("language"),
+                          metadata.get("duration"), st.st_mtime_ns, st.st_size, position))
+            doc_id = conn.execute("SELECT id FROM documents WHERE path = ?", (path,)).fetchone()[0]
+            term_ids = self._term_ids({term for term, _, _ in postings})
+            # 按主键顺序插入，B 树页面按顺序写满，比随机插入快得多
+            rows = sorted((term_ids[term], doc_id, pos, start_ms) for term, pos, start_ms in postings)
+            conn.executemany("INSERT OR REPLACE INTO postings VALUES (?, ?, ?, ?)", rows)
+        return True
+
+    def _term_ids(self, terms):
+        conn = self._conn
+        conn.executemany("INSERT OR IGNORE INTO terms (term) VALUES (?)", ((t,) for t in terms))
+        ids = {}
+        terms = list(terms)
+        for i in range(0, len(terms), 500):
+            batch = terms[i:i + 500]
+            ids.update((term, term_id) for term_id, term in conn.execute(
+                f"SELECT id, term FROM terms WHERE term IN ({','.join('?' * len(batch))})", batch))
+        return ids
+
+    def remove(self, path):
+        path = os.path.abspath(path)
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM postings WHERE doc_id = (SELECT id FROM documents WHERE path = ?)", (path,))
+            self._conn.execute("DELETE FROM documents WHERE path = ?", (path,))
+
+    def index_directory(self, root, log=None):
+        """增量索引目录下的全部 .words.tsv，并移除已被删除的文件，返回 (新建/更新数, 移除数)"""
+        updated = 0
+        for dirpath, _, files in os.walk(root):
+            for name in sorted(files):
+                if name.endswith(WORDS_SUFFIX):
+                    try:
+                        updated += self.add(os.path.join(dirpath, name))
+                    except (OSError, ValueError) as e:
+                        if log:
+                            log(f"索引失败: {name} ({e})", "WARNING")
+        removed = 0
+        root = os.path.abspath(root)
+        with self._lock:
+            indexed = self._conn.execute("SELECT path FROM documents").fetchall()
+        for (path,) in indexed:
+            if path.startswith(root + os.sep) and not os.path.exists(path):
+                self.remove(path)
+                removed += 1
+        return updated, removed
+
+    # --- 查询 ---
+    def _query_terms(self, token, prefix):
+        # 调用方持有 self._lock
+        if not prefix:
+            row = self._conn.execute("SELECT id FROM terms WHERE term = ?", (token,)).fetchone()
+            return [row[0]] if row else []
+        return [r[0] for r in self._conn.execute(
+            "SELECT id FROM terms WHERE term >= ? AND term < ? LIMIT ?", (token, token + "\uffff", MAX_PREFIX_TERMS))]
+
+    def search(self, query, limit=20, context_words=8):
+        """返回 SearchHit 列表；start_ms 为匹配处第一个词在来源音频中的毫秒偏移"""
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        prefix = query.rstrip().endswith("*")
+        # 共享连接上可能正有工作线程在 add() 的事务中，查询同样在锁内进行
+        with self._lock:
+            rows = self._search_rows(tokens, prefix, limit)
+        contexts = self._contexts(rows, len(tokens), context_words) if context_words and rows else {}
+        return [SearchHit(source, start_ms, path, position, contexts.get((path, position), ""))
+                for source, start_ms, path, position in rows]
+
+    def _search_rows(self, tokens, prefix, limit):
+        term_sets = [self._query_terms(t, prefix and i == len(tokens) - 1) for i, t in enumerate(tokens)]
+        if not all(term_sets):
+            return []
+
+        # 短语：第 i 个词必须紧跟在第 i-1 个词之后（按主键 term_id, doc_id, position 逐个查找）
+        joins, params = [], []
+        for i, ids in enumerate(term_sets[1:], 1):
+            joins.append(f"JOIN postings p{i} ON p{i}.doc_id = p0.doc_id AND p{i}.position = p0.position + {i}"
+                         f" AND p{i}.term_id IN ({','.join('?' * len(ids))})")
+            params += ids
+        sql = ("SELECT d.source, p0.start_ms, d.path, p0.position FROM postings p0 "
+               + " ".join(joins)
+               + " JOIN documents d ON d.id = p0.doc_id"
+               f" WHERE p0.term_id IN ({','.join('?' * len(term_sets[0]))})"
+               f" ORDER BY p0.doc_id DESC, p0.position LIMIT ?")
+        return self._conn.execute(sql, params + term_sets[0] + [limit]).fetchall()
+
+    @staticmethod
+    def _contexts(rows, length, width):
+        """{(路径, 位置): 匹配处前后各 width 个词项所在的原文}；每个文件只读一遍"""
+        by_path = {}
+        for _, _, path, position in rows:
+            by_path.setdefault(path, []).append(position)
+        contexts = {}
+        for path, positions in by_path.items():
+            windows = [(p, p - width, p + length + width, []) for p in sorted(set(positions))]
+            end = windows[-1][2]
+            current = 0
+            try:
+                _, words = read_words(path)
+                for _, _, _, word in words:
+                    count = len(tokenize(word))
+                    for _, first, last, parts in windows:
+                        if current + count > first and current < last:
+                            parts.append(word)
+                    current += count
+                    if current >= end:
+                        words.close()
+                        break
+            except (OSError, ValueError):
+                continue
+            contexts.update(((path, p), " ".join(parts)) for p, _, _, parts in windows)
+        return contexts
+
+    def stats(self):
+        with self._lock:
+            docs, tokens = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(tokens), 0) FROM documents").fetchone()
+            terms = self._conn.execute("SELECT COUNT(*) FROM terms").fetchone()[0]
+        return {"documents": docs, "tokens": tokens, "terms": terms}
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_transcript_index(path=None):
+    """进程级单例；首次调用时可指定数据库路径"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = TranscriptIndex(path)
+        return _index
+
+
+def format_offset(ms):
+    seconds, ms = divmod(ms, 1000)
+    h, rem = divmod(seconds, 3600)
+    m, s = divmod(rem, 60)
+    return f"{h:02d}:{m:02d}:{s:02d}.{ms:03d}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="转录全文索引")
+    parser.add_argument("--db", default="", help="索引数据库路径（默认位于用户缓存目录）")
+    commands = parser.add_subparsers(dest="command", required=True)
+    index_cmd = commands.add_parser("index", help="增量索引目录下的 .words.tsv")
+    index_cmd.add_argument("dirs", nargs="+")
+    search_cmd = commands.add_parser("search", help="搜索，末尾加 * 为前缀匹配")
+    search_cmd.add_argument("query")
+    search_cmd.add_argument("--limit", type=int, default=20)
+    search_cmd.add_argument("--json", action="store_true", help="以 JSON 输出")
+    commands.add_parser("stats", help="显示索引规模")
+    args = parser.parse_args(argv)
+
+    index = TranscriptIndex(args.db or None)
+    if args.command == "index":
+        for root in args.dirs:
+            updated, removed = index.index_directory(root, log=lambda m, level="INFO": print(m))
+            print(f"📚 {root}: 更新 {updated} 个文件，移除 {removed} 个")
+        print(f"索引规模: {index.stats()}")
+    elif args.command == "search":
+        hits = index.search(args.query, limit=args.limit)
+        if args.json:
+            print(json.dumps([hit._asdict() for hit in hits], ensure_ascii=False, indent=2))
+        else:
+            for hit in hits:
+                print(f"{hit.source}  {format_offset(hit.start_ms)} ({hit.start_ms} ms)  …{hit.context}…")
+            print(f"共 {len(hits)} 条结果" + ("（已达上限）" if len(hits) == args.limit else ""))
+    else:
+        print(json.dumps(index.stats(), ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
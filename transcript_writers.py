@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+流式输出 - 每个片段到达即写入 SRT / TXT / VTT / JSONL，内存占用与片段数量无关
+写入过程中使用 .part 临时文件，全部完成后原子重命名为最终文件
+"""
+
+import json
+import os
+
+
+def format_timestamp(seconds, decimal_marker=","):
+    """HH:MM:SS,mmm —— 与旧版 _format_time 输出逐字相同（毫秒截断而非四舍五入）"""
+    whole = int(seconds)
+    ms = int((seconds - whole) * 1000)
+    h, rem = divmod(whole, 3600)
+    m, s = divmod(rem, 60)
+    return "%02d:%02d:%02d%s%03d" % (h, m, s, decimal_marker, ms)
+
+
+class _StreamWriter:
+    extension = ""
+
+    def __init__(self, base_path, metadata=None):
+        self.path = base_path + self.extension
+        self.part_path = self.path + ".part"
+        self.metadata = metadata or {}
+        self._file = open(self.part_path, 'w', encoding='utf-8')
+        self.count = 0
+        self.write_header()
+
+    def write_header(self):
+        pass
+
+    def write(self, seg):
+        self.count += 1
+        self._write(seg)
+
+    def _write(self, seg):
+        raise NotImplementedError
+
+    def flush(self):
+        self._file.flush()
+
+    def finalize(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        os.replace(self.part_path, self.path)
+        return self.path
+
+    def close(self):
+        """关闭但保留 .part 文件（出错时用于排查）"""
+        self._file.close()
+
+    def abort(self):
+        self._file.close()
+        try:
+            os.remove(self.part_path)
+        except OSError:
+            pass
+
+
+class TxtWriter(_StreamWriter):
+    extension = ".txt"
+
+    def _write(self, seg):
+        self._file.write(seg.text + "\n")
+
+
+class SrtWriter(_StreamWriter):
+    extension = ".srt"
+
+    def _write(self, seg):
+        self._file.write(f"{self.count}\n{format_timestamp(seg.start)} --> {format_timestamp(seg.end)}\n{seg.text}\n\n")
+
+
+class VttWriter(_StreamWriter):
+    extension = ".vtt"
+
+    def write_header(self):
+        self._file.write("WEBVTT\n\n")
+
+    def _write(self, seg):
+        self._file.write(f"{format_timestamp(seg.start, '.')} --> {format_timestamp(seg.end, '.')}\n"
+                         f"{seg.text.strip()}\n\n")
+
+
+class JsonlWriter(_StreamWriter):
+    """每行一个片段，含词级时间戳：{"start", "end", "text", "words": [[start, end, word, prob], ...]}"""
+    extension = ".jsonl"
+
+    def _write(self, seg):
+        record = {"start": round(seg.start, 3), "end": round(seg.end, 3), "text": seg.text}
+        if getattr(seg, "words", None):
+            record["words"] = [[round(w[0], 3), round(w[1], 3), w[2], round(w[3], 4)] for w in seg.words]
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+class WordsWriter(_StreamWriter):
+    """
+    紧凑的词级时间戳文件（供 transcript_index 建立全文索引）
+    首行 "# " + JSON 元数据（来源、语言、时长），之后每行一个词：开始毫秒\t结束毫秒\t置信度%\t词
+    没有词级时间戳的片段整段写为一行，置信度留空
+    """
+    extension = ".words.tsv"
+
+    def write_header(self):
+        self._file.write("# " + json.dumps(self.metadata, ensure_ascii=False) + "\n")
+
+    def _write(self, seg):
+        words = getattr(seg, "words", None) or [(seg.start, seg.end, seg.text, None)]
+        lines = []
+        for start, end, word, probability in words:
+            word = " ".join(word.split())
+            if word:
+                prob = "" if probability is None else round(probability * 100)
+                lines.append(f"{round(start * 1000)}\t{round(end * 1000)}\t{prob}\t{word}\n")
+        self._file.write("".join(lines))
+
+
+WRITERS = {
+    "txt": TxtWriter,
+    "srt": SrtWriter,
+    "vtt": VttWriter,
+    "jsonl": JsonlWriter,
+    "words": WordsWriter,
+}
+
+
+class TranscriptWriterSet:
+    """同时写入多种格式"""
+
+    # 每写入多少个片段刷新一次缓冲区，崩溃时 .part 中最多丢失这么多片段
+    FLUSH_EVERY = 20
+
+    def __init__(self, output_dir, base_name, formats, metadata=None):
+        os.makedirs(output_dir, exist_ok=True)
+        base_path = os.path.join(output_dir, base_name)
+        self.writers = []
+        try:
+            for fmt in formats:
+                self.writers.append(WRITERS[fmt](base_path, metadata))
+        except Exception:
+            self.abort()
+            raise
+        self.count = 0
+
+    def write(self, seg):
+        for writer in self.writers:
+            writer.write(seg)
+        self.count += 1
+        if self.count % self.FLUSH_EVERY == 0:
+            for writer in self.writers:
+                writer.flush()
+
+    def finalize(self):
+        """全部写完后原子替换为最终文件，返回文件路径列表"""
+        return [writer.finalize() for writer in self.writers]
+
+    def close(self):
+        for writer in self.writers:
+            writer.close()
+
+    def abort(self):
+        for writer in self.writers:
+            writer.abort()
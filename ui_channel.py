@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+界面事件通道 - 工作线程只向队列投递事件，由 Tk 主线程按固定帧率批量取出执行
+日志合并为每帧一次插入且行数有上限；同一 key 的状态更新每帧只执行最后一次
+"""
+
+import queue
+import traceback
+from datetime import datetime
+
+
+class UIChannel:
+    def __init__(self, root, log_widget, frame_ms=50, max_log_lines=2000, max_events_per_frame=5000):
+        self.root = root
+        self.log_widget = log_widget
+        self.frame_ms = frame_ms
+        self.max_log_lines = max_log_lines
+        self.max_events_per_frame = max_events_per_frame
+        self._queue = queue.SimpleQueue()
+        self._log_lines = 0
+        self._running = False
+
+    # --- 任意线程调用 ---
+    def log(self, line):
+        self._queue.put(("log", line))
+
+    def call(self, fn, *args):
+        """按投递顺序执行（按钮状态等不能丢弃的操作）"""
+        self._queue.put(("call", fn, args))
+
+    def update(self, key, fn, *args):
+        """可合并的状态更新（进度、速度等），同一帧内只执行最后一次"""
+        self._queue.put(("update", key, fn, args))
+
+    # --- 主线程 ---
+    def start(self):
+        if not self._running:
+            self._running = True
+            self.root.after(self.frame_ms, self._drain)
+
+    def stop(self):
+        self._running = False
+
+    def _drain(self):
+        lines, calls, updates = [], [], {}
+        for _ in range(self.max_events_per_frame):
+            try:
+                event = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if event[0] == "log":
+                lines.append(event[1])
+            elif event[0] == "call":
+                calls.append(event[1:])
+            else:
+                updates[event[1]] = event[2:]
+
+        try:
+            if lines:
+                self._append_log(lines)
+            # 每个回调单独捕获异常：一个回调出错不能让同一帧中后续的调用与更新丢失
+            errors = []
+            for fn, args in calls + list(updates.values()):
+                error = self._invoke(fn, args)
+                if error:
+                    errors.append(error)
+            if errors:
+                self._append_log(errors)
+        finally:
+            if self._running:
+                self.root.after(self.frame_ms, self._drain)
+
+    @staticmethod
+    def _invoke(fn, args):
+        """执行回调，出错时返回一行错误日志"""
+        try:
+            fn(*args)
+        except Exception as e:
+            traceback.print_exc()
+            name = getattr(fn, "__qualname__", repr(fn))
+            return f"[{datetime.now().strftime('%H:%M:%S')}] ❌ 界面更新失败（{name}）: {e}"
+        return None
+
+    def _append_log(self, lines):
+        dropped = len(lines) - (self.max_log_lines - 1)
+        if dropped > 0:
+            lines = [f"...（省略 {dropped} 行）"] + lines[dropped:]
+        widget = self.log_widget
+        widget.config(state='normal')
+        widget.insert('end', "\n".join(lines) + "\n")
+        self._log_lines += len(lines)
+        excess = self._log_lines - self.max_log_lines
+        if excess > 0:
+            widget.delete('1.0', f'{excess + 1}.0')
+            self._log_lines -= excess
+        widget.config(state='disabled')
+        widget.see('end')
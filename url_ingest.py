@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+链接展开与下载归档
+- 播放列表 / 频道 / 合集通过 yt-dlp 的 flat 提取展开为单个视频链接（只取列表，不解析每个视频）
+- 按 提取器+视频ID 去重
+- 下载过的音频保存在缓存目录的归档中，之后的运行直接复用，不再重复下载
+- 进程内同时进行的下载数量有上限
+"""
+
+import os
+import re
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+
+from transcriber_engine import default_log, is_url
+from transcript_cache import InUse, cache_root, evict_lru
+
+DEFAULT_DOWNLOAD_CONCURRENCY = 2
+DEFAULT_ARCHIVE_MAX_BYTES = 5 * 1024**3
+# 频道 → 标签页 → 视频 这类嵌套最多展开的层数
+MAX_EXPAND_DEPTH = 3
+# flat 结果中指向另一个列表（而非单个视频）的提取器名特征
+_PLAYLIST_IE_HINTS = ("tab", "playlist", "channel", "series", "collection", "space", "favorites", "list")
+
+
+def _flat_extract(url, cookie_file=""):
+    import yt_dlp
+    ydl_opts = {'quiet': True, 'no_warnings': True, 'skip_download': True, 'extract_flat': 'in_playlist'}
+    if cookie_file and os.path.isfile(cookie_file):
+        ydl_opts['cookiefile'] = cookie_file
+    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        return ydl.extract_info(url, download=False)
+
+
+def _is_nested_list(entry):
+    ie_key = (entry.get("ie_key") or "").lower()
+    return entry.get("_type") in ("playlist", "multi_video") or \
+        (entry.get("_type") == "url" and any(hint in ie_key for hint in _PLAYLIST_IE_HINTS))
+
+
+def _iter_videos(info, cookie_file, depth=0):
+    if info.get("_type") not in ("playlist", "multi_video"):
+        yield info
+        return
+    for entry in info.get("entries") or []:
+        if not entry:
+            continue
+        if _is_nested_list(entry) and depth < MAX_EXPAND_DEPTH:
+            nested = entry if entry.get("entries") is not None else _flat_extract(entry["url"], cookie_file)
+            yield from _iter_videos(nested, cookie_file, depth + 1)
+        else:
+            yield entry
+
+
+def expand_url(url, cookie_file=""):
+    """
+    展开一个链接，返回 [(视频链接, 指纹), ...]
+    单个视频返回其自身；播放列表/频道返回其中的全部视频（不解析格式，每个列表页只需一次请求）
+    """
+    from transcript_cache import url_fingerprint
+    videos = []
+    for entry in _iter_videos(_flat_extract(url, cookie_file), cookie_file):
+        video_url = entry.get("webpage_url") or entry.get("url") or url
+        if not is_url(video_url):
+            continue
+        extractor = entry.get("extractor_key") or entry.get("ie_key") or "generic"
+        fingerprint = url_fingerprint(extractor, entry["id"]) if entry.get("id") else None
+        videos.append((video_url, fingerprint))
+    return videos
+
+
+def expand_sources(sources, cookie_file="", concurrency=DEFAULT_DOWNLOAD_CONCURRENCY, log=None):
+    """
+    并发展开 sources 中的全部链接（本地文件原样保留），保持顺序并按视频ID去重
+    返回 (展开后的 sources, {链接: 指纹})；指纹可交给引擎，省去之后再次获取视频ID
+    """
+    log = log or default_log
+    urls = [s for s in sources if is_url(s)]
+    expanded = {}
+
+    def expand(url):
+        try:
+            return expand_url(url, cookie_file)
+        except Exception as e:
+            log(f"展开链接失败，按单个视频处理: {url} ({e})", "WARNING")
+            return [(url, None)]
+
+    if urls:
+        with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(urls))),
+                                thread_name_prefix="expand") as pool:
+            expanded = dict(zip(urls, pool.map(expand, urls)))
+
+    result, fingerprints, seen, duplicates = [], {}, set(), 0
+    for source in sources:
+        for video_url, fingerprint in expanded.get(source, [(source, None)]):
+            key = fingerprint or (video_url if is_url(video_url) else os.path.abspath(video_url))
+            if key in seen:
+                duplicates += 1
+                continue
+            seen.add(key)
+            result.append(video_url)
+            if fingerprint:
+                fingerprints[video_url] = fingerprint
+    if urls and (len(result) != len(sources) or duplicates):
+        log(f"🔗 展开 {len(urls)} 个链接 → 共 {len(result)} 个任务（去除重复 {duplicates} 个）", "INFO")
+    return result, fingerprints
+
+
+# --- 下载并发上限 ---
+_download_limit = DEFAULT_DOWNLOAD_CONCURRENCY
+_download_slots = threading.BoundedSemaphore(DEFAULT_DOWNLOAD_CONCURRENCY)
+
+
+def set_download_concurrency(limit, slots=None):
+    """
+    设置同时下载数量的上限（应在开始下载前调用）
+    slots 为多个进程共享的信号量（如 Manager().BoundedSemaphore(limit)），省略时只在本进程内限制
+    """
+    global _download_limit, _download_slots
+    _download_limit = max(1, limit)
+    _download_slots = slots or threading.BoundedSemaphore(_download_limit)
+
+
+def download_concurrency():
+    return _download_limit
+
+
+@contextmanager
+def download_slot(token=None):
+    """占用一个下载名额；等待期间 token 取消时抛出 Cancelled"""
+    slots = _download_slots
+    while not slots.acquire(timeout=0.2):
+        if token is not None:
+            token.check()
+    try:
+        yield
+    finally:
+        slots.release()
+
+
+# --- 下载归档 ---
+class DownloadArchive:
+    """按视频指纹保存下载过的原始音频，总大小超出上限时按最近使用时间淘汰；正在使用的条目（pinned）不会被淘汰"""
+
+    def __init__(self, root=None, max_bytes=DEFAULT_ARCHIVE_MAX_BYTES):
+        self.root = Path(root) if root else cache_root() / "downloads"
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._in_use = InUse()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    @staticmethod
+    def _name(fingerprint):
+        return re.sub(r"[^\w-]", "_", fingerprint.split(":", 1)[-1])[:120]
+
+    @contextmanager
+    def pinned(self, fingerprint):
+        """
+        在 with 块内该视频的归档文件不会被淘汰（可以在下载之前获取）
+        使用中的条目同样计入容量上限：释放后若总大小仍超出上限，立即补做淘汰
+        """
+        with self._in_use.hold(self._name(fingerprint)):
+            yield
+        self.evict()
+
+    def get(self, fingerprint):
+        """已归档时返回本地文件路径，否则返回 None"""
+        name = self._name(fingerprint)
+        for path in self.root.glob(f"{name}.*"):
+            if path.suffix not in (".part", ".tmp") and path.stem == name:
+                try:
+                    os.utime(path)
+                except OSError:
+                    continue
+                with self._lock:
+                    self.stats["hits"] += 1
+                return str(path)
+        with self._lock:
+            self.stats["misses"] += 1
+        return None
+
+    def put(self, fingerprint, path):
+        """把下载好的文件移入归档，返回归档中的路径"""
+        target = self.root / (self._name(fingerprint) + Path(path).suffix)
+        partial = target.with_name(f"{target.name}.{os.getpid()}.{threading.get_ident()}.part")
+        shutil.move(path, partial)
+        os.replace(partial, target)
+        with self._in_use.hold(self._name(fingerprint)):
+            self.evict()
+        return str(target)
+
+    def evict(self):
+        with self._lock:
+            entries = []
+            for path in self.root.iterdir():
+                if path.suffix == ".part":
+                    continue
+                try:
+                    st = path.stat()
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path.stem, [path]))
+            self.stats["evictions"] += evict_lru(entries, self.max_bytes, self._in_use)
+
+    def describe(self):
+        s = self.stats
+        return f"下载归档: 复用 {s['hits']} | 新下载 {s['misses']} | 淘汰 {s['evictions']}"
+
+
+_archive = None
+_archive_lock = threading.Lock()
+
+
+def get_download_archive(root=None, max_bytes=None):
+    """进程级单例；首次调用时可指定目录与容量上限"""
+    global _archive
+    with _archive_lock:
+        if _archive is None:
+            _archive = DownloadArchive(root, max_bytes or DEFAULT_ARCHIVE_MAX_BYTES)
+        return _archive
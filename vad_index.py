@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+语音索引 - 解码后对整段 PCM 做一次向量化的能量 VAD，得到语音区间
+- 转录前即可报告语音占比；完全静音的文件直接跳过
+- 静音区域从送入模型的音频中剔除，片段时间再映射回原始时间轴
+- 长音频分块直接使用这些区间作为切分点，不再单独运行 Silero VAD
+索引按输入身份保存在缓存目录中，再次处理同一文件时在解码前就能读到
+"""
+
+import bisect
+import hashlib
+import json
+import os
+
+from audio_ingest import SAMPLE_RATE
+from transcriber_engine import TranscriptSegment, to_transcript_segment
+
+# 算法或参数变化时递增，使旧索引与旧缓存结果失效
+VAD_VERSION = 1
+FRAME_MS = 30
+# 阈值 = 噪声底（第 10 百分位能量）+ MARGIN_DB，并限制在 [MIN_DB, MAX_DB] 内：
+# 比 MAX_DB 更响的帧一律视为语音，避免音乐/持续讲话的文件被整体判为静音
+MARGIN_DB = 12.0
+MIN_DB = -55.0
+MAX_DB = -35.0
+MIN_SPEECH_S = 0.25
+# 短于此长度的停顿保留在语音中（句间停顿对识别有帮助）
+MIN_SILENCE_S = 1.0
+SPEECH_PAD_S = 0.3
+# 语音占比高于此值时剔除静音的收益很小，不做拼接
+MAX_COMPACT_RATIO = 0.9
+# 逐段计算帧能量，临时内存与音频总长无关
+BLOCK_FRAMES = 20000
+
+
+def _runs(mask):
+    """布尔数组中连续 True 的 (起点, 终点) 数组"""
+    import numpy as np
+    padded = np.concatenate(([False], mask, [False]))
+    edges = np.flatnonzero(padded[1:] != padded[:-1])
+    return edges[0::2], edges[1::2]
+
+
+def _merge_gaps(starts, ends, min_gap):
+    """合并间隔小于 min_gap 的相邻区间"""
+    import numpy as np
+    if len(starts) < 2:
+        return starts, ends
+    keep = (starts[1:] - ends[:-1]) >= min_gap
+    return np.concatenate((starts[:1], starts[1:][keep])), np.concatenate((ends[:-1][keep], ends[-1:]))
+
+
+def _frame_db(audio, frame, count):
+    """逐帧平均能量（dBFS）；audio 可以是 ndarray，也可以是 audio_store.AudioView"""
+    import numpy as np
+    db = np.empty(count, dtype=np.float32)
+    for first in range(0, count, BLOCK_FRAMES):
+        last = min(count, first + BLOCK_FRAMES)
+        frames = np.asarray(audio[first * frame:last * frame], dtype=np.float32).reshape(last - first, frame)
+        # einsum 不产生平方后的临时数组
+        power = np.einsum('ij,ij->i', frames, frames) / frame
+        db[first:last] = 10 * np.log10(power + 1e-10)
+    return db
+
+
+def detect_speech_energy(audio, sample_rate=SAMPLE_RATE):
+    """返回语音区间 [(start_sample, end_sample), ...]，格式与 long_form.detect_speech 相同"""
+    import numpy as np
+    frame = sample_rate * FRAME_MS // 1000
+    count = len(audio) // frame
+    if count == 0:
+        return []
+    db = _frame_db(audio, frame, count)
+    threshold = min(max(np.percentile(db, 10) + MARGIN_DB, MIN_DB), MAX_DB)
+
+    starts, ends = _runs(db > threshold)
+    frames_per_s = 1000 / FRAME_MS
+    starts, ends = _merge_gaps(starts, ends, int(MIN_SILENCE_S * frames_per_s))
+    long_enough = (ends - starts) >= int(MIN_SPEECH_S * frames_per_s)
+    starts, ends = starts[long_enough], ends[long_enough]
+    if not len(starts):
+        return []
+    pad = int(SPEECH_PAD_S * frames_per_s)
+    starts, ends = _merge_gaps(np.maximum(starts - pad, 0), np.minimum(ends + pad, count), 1)
+    return [(int(s) * frame, min(int(e) * frame, len(audio))) for s, e in zip(starts, ends)]
+
+
+class SpeechIndex:
+    def __init__(self, regions, total_samples, sample_rate=SAMPLE_RATE):
+        self.regions = [tuple(r) for r in regions]
+        self.total_samples = total_samples
+        self.sample_rate = sample_rate
+
+    @property
+    def speech_samples(self):
+        return sum(end - start for start, end in self.regions)
+
+    @property
+    def speech_ratio(self):
+        return self.speech_samples / self.total_samples if self.total_samples else 0.0
+
+    def describe(self):
+        return (f"语音占比 {self.speech_ratio:.0%}（{len(self.regions)} 段，"
+                f"{self.speech_samples / self.sample_rate:.1f}s / {self.total_samples / self.sample_rate:.1f}s）")
+
+    def compact(self, audio):
+        """
+        剔除静音，返回 (只含语音的音频, SpeechMap)；不值得剔除时返回 (原音频, None)
+        SpeechMap.regions 为拼接后音频中的语音区间，可直接用于分块
+        """
+        import numpy as np
+        if not self.regions or self.speech_ratio > MAX_COMPACT_RATIO:
+            return audio, None
+        return np.concatenate([audio[start:end] for start, end in self.regions]), SpeechMap(self.regions)
+
+    def to_dict(self):
+        return {"version": VAD_VERSION, "sample_rate": self.sample_rate,
+                "total_samples": self.total_samples, "regions": self.regions}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["regions"], data["total_samples"], data["sample_rate"])
+
+
+class SpeechMap:
+    """拼接后音频的时间 → 原始音频的时间"""
+
+    def __init__(self, regions, sample_rate=SAMPLE_RATE):
+        self.sample_rate = sample_rate
+        self.original_starts = [start for start, _ in regions]
+        self.compact_starts = []
+        self.regions = []
+        position = 0
+        for start, end in regions:
+            self.compact_starts.append(position)
+            self.regions.append((position, position + end - start))
+            position += end - start
+
+    def to_original(self, seconds, is_end=False):
+        sample = seconds * self.sample_rate
+        # 恰好落在拼接处的结束时间归属前一段
+        search = bisect.bisect_left if is_end else bisect.bisect_right
+        i = max(0, search(self.compact_starts, sample) - 1)
+        return (self.original_starts[i] + sample - self.compact_starts[i]) / self.sample_rate
+
+    def restore(self, seg, offset=0.0):
+        """转为 TranscriptSegment 并映射回原始时间轴（再平移 offset）"""
+        seg = to_transcript_segment(seg)
+        words = None
+        if seg.words:
+            words = [(self.to_original(s) + offset, self.to_original(e, True) + offset, w, p)
+                     for s, e, w, p in seg.words]
+        return TranscriptSegment(self.to_original(seg.start) + offset,
+                                 self.to_original(seg.end, True) + offset, seg.text, words)
+
+
+def build_index(audio, sample_rate=SAMPLE_RATE):
+    return SpeechIndex(detect_speech_energy(audio, sample_rate), len(audio), sample_rate)
+
+
+def _index_path(key):
+    from transcript_cache import cache_root
+    digest = hashlib.sha256(f"{VAD_VERSION}:{key}".encode('utf-8')).hexdigest()
+    return cache_root() / "vad" / digest[:2] / f"{digest}.json"
+
+
+def load_index(key):
+    """读取已保存的索引（key 为输入身份，如 url:... / file:...），不存在时返回 None"""
+    try:
+        with open(_index_path(key), 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if data.get("version") != VAD_VERSION:
+        return None
+    return SpeechIndex.from_dict(data)
+
+
+def save_index(key, index):
+    path = _index_path(key)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(index.to_dict(), f, separators=(",", ":"))
+        os.replace(tmp, path)
+    except OSError:
+        pass
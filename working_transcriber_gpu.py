@@ -7,14 +7,17 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, scrolledtext
 import threading
-import time
 import os
 import sys
+from importlib.util import find_spec
 from pathlib import Path
 from datetime import datetime
-import torch
-import tempfile
-import shutil
+
+from cancellation import CancelToken
+from metrics import MetricsCollector, describe as describe_metrics
+from model_cache import get_model_cache
+from transcriber_engine import TranscribeOptions, TranscriptionEngine, get_gpu_info, preload_heavy_modules
+from ui_channel import UIChannel
 
 
 class GPUTranscriber:
@@ -24,10 +27,11 @@ class GPUTranscriber:
         self.window.geometry("850x700")
         
         self.is_running = False
+        self.cancel_token = None
         
         # GPU状态
-        self.has_gpu = torch.cuda.is_available()
-        self.gpu_info = self.get_gpu_info()
+        self.gpu_info = get_gpu_info()
+        self.has_gpu = self.gpu_info is not None
         
         # 初始化变量
         self.url_var = tk.StringVar()
@@ -37,27 +41,26 @@ class GPUTranscriber:
         self.model_var = tk.StringVar(value="small")
         self.language_var = tk.StringVar(value="auto")
         self.vad_filter = tk.BooleanVar(value=True)
+        self.long_form = tk.BooleanVar(value=False)
         self.save_srt = tk.BooleanVar(value=True)
         self.save_txt = tk.BooleanVar(value=True)
+        self.save_vtt = tk.BooleanVar(value=False)
+        self.save_jsonl = tk.BooleanVar(value=False)
+        self.word_index = tk.BooleanVar(value=False)
         self.compute_mode = tk.StringVar(value="auto")
         self.batch_size = tk.StringVar(value="auto")
         
+        # 多任务队列（首次使用时创建）
+        self.job_queue = None
+        self.queue_tree = None
+        # 本次会话中已完成任务的结果摘要（含各阶段耗时），用于性能报告
+        self.job_summaries = []
+        
+        # 已保存的自动调优结果（硬件变化后失效）
+        self.tuned_profile = None
+        
         self.setup_ui()
-    
-    def get_gpu_info(self):
-        """获取GPU信息"""
-        if not self.has_gpu:
-            return None
-        try:
-            gpu_name = torch.cuda.get_device_name(0)
-            vram_gb = torch.cuda.get_device_properties(0).total_memory / 1024**3
-            return {
-                "name": gpu_name,
-                "vram": vram_gb,
-                "cores": torch.cuda.get_device_properties(0).multi_processor_count
-            }
-        except:
-            return None
+        self.load_tuned_profile()
     
     def setup_ui(self):
         """设置用户界面"""
@@ -128,6 +131,7 @@ class GPUTranscriber:
         lang_combo.grid(row=1, column=1, padx=5, pady=5, sticky='w')
         
         ttk.Checkbutton(frame, text="启用 VAD（静音检测）", variable=self.vad_filter).grid(row=2, column=0, columnspan=2, sticky='w', pady=5)
+        ttk.Checkbutton(frame, text="长音频分块并行转录", variable=self.long_form).grid(row=3, column=0, columnspan=2, sticky='w')
     
     def setup_output_section(self, parent):
         frame = ttk.LabelFrame(parent, text="📤 输出设置", padding=10)
@@ -140,13 +144,16 @@ class GPUTranscriber:
         
         ttk.Checkbutton(frame, text="保存 .srt 字幕文件", variable=self.save_srt).pack(anchor='w', pady=2)
         ttk.Checkbutton(frame, text="保存 .txt 文本文件", variable=self.save_txt).pack(anchor='w', pady=2)
+        ttk.Checkbutton(frame, text="保存 .vtt 字幕文件", variable=self.save_vtt).pack(anchor='w', pady=2)
+        ttk.Checkbutton(frame, text="保存 .jsonl（含词级时间戳）", variable=self.save_jsonl).pack(anchor='w', pady=2)
+        ttk.Checkbutton(frame, text="词级时间戳 + 全文索引（略慢）", variable=self.word_index).pack(anchor='w', pady=2)
     
     def setup_gpu_control(self, parent):
         frame = ttk.LabelFrame(parent, text="🎮 GPU加速控制", padding=10)
         frame.pack(fill='x', pady=(0, 15))
         
         if self.has_gpu and self.gpu_info:
-            info_text = f"✅ {self.gpu_info['name']}\nVRAM: {self.gpu_info['vram']:.1f}GB | 核心: {self.gpu_info['cores']}"
+            info_text = f"✅ {self.gpu_info['name']}\nVRAM: {self.gpu_info['vram']:.1f}GB | 核心: {self.gpu_info['cores'] or '--'}"
             status_color = "green"
         else:
             info_text = "❌ 未检测到NVIDIA GPU\n使用CPU模式"
@@ -191,6 +198,13 @@ class GPUTranscriber:
             tk.Label(temp_frame, textvariable=self.gpu_temp_var, font=("Microsoft YaHei", 9)).pack(side='left')
             self.vram_var = tk.StringVar(value="VRAM: --/-- GB")
             tk.Label(temp_frame, textvariable=self.vram_var, font=("Microsoft YaHei", 9)).pack(side='right')
+        
+        self.metrics_var = tk.StringVar(value="音频 -- 秒/秒 | 片段 --/秒 | CPU --% | 内存 --MB")
+        tk.Label(frame, textvariable=self.metrics_var, font=("Microsoft YaHei", 9)).pack(anchor='w')
+        self.batch_var = tk.StringVar(value="批处理: -- | 吞吐: -- 音频秒/秒")
+        tk.Label(frame, textvariable=self.batch_var, font=("Microsoft YaHei", 9)).pack(anchor='w')
+        self.cache_var = tk.StringVar(value="模型缓存: 命中 0 | 未命中 0 | 加载 --s")
+        tk.Label(frame, textvariable=self.cache_var, font=("Microsoft YaHei", 9)).pack(anchor='w')
     
     def setup_progress_section(self, parent):
         frame = ttk.LabelFrame(parent, text="⏳ 转录进度", padding=10)
@@ -205,13 +219,15 @@ class GPUTranscriber:
         frame.pack(fill='both', expand=True)
         self.log_text = scrolledtext.ScrolledText(frame, height=8, state='disabled', font=("Consolas", 9))
         self.log_text.pack(fill='both', expand=True)
+        # 所有线程的日志与界面更新都经由事件通道，由主线程每 50ms 批量处理
+        self.ui = UIChannel(self.window, self.log_text, frame_ms=50, max_log_lines=2000)
+        self.ui.start()
     
     def setup_control_buttons(self):
         button_frame = tk.Frame(self.window)
         button_frame.pack(fill='x', padx=20, pady=(0, 20))
         
-        if self.has_gpu:
-            ttk.Button(button_frame, text="⚡ GPU优化设置", command=self.open_gpu_settings).pack(side='left', padx=5)
+        ttk.Button(button_frame, text="⚡ 自动调优", command=self.open_gpu_settings).pack(side='left', padx=5)
         
         self.start_btn = ttk.Button(button_frame, text="🚀 开始转录 (GPU加速)", command=self.start_transcription)
         self.start_btn.pack(side='left', padx=5)
@@ -219,6 +235,13 @@ class GPUTranscriber:
         self.stop_btn = ttk.Button(button_frame, text="⏹️ 停止", command=self.stop_transcription, state='disabled')
         self.stop_btn.pack(side='left', padx=5)
         
+        self.pause_btn = ttk.Button(button_frame, text="⏸️ 暂停", command=self.toggle_pause, state='disabled')
+        self.pause_btn.pack(side='left', padx=5)
+        
+        ttk.Button(button_frame, text="📋 任务队列", command=self.open_queue_window).pack(side='left', padx=5)
+        
+        ttk.Button(button_frame, text="🎯 区间重转", command=self.open_region_dialog).pack(side='left', padx=5)
+        
         ttk.Button(button_frame, text="📂 打开输出目录", command=self.open_output_dir).pack(side='right', padx=5)
         ttk.Button(button_frame, text="📊 性能报告", command=self.generate_performance_report).pack(side='right', padx=5)
     
@@ -252,66 +275,33 @@ class GPUTranscriber:
             messagebox.showinfo("提示", "输出目录不存在")
 
     def log(self, message, level="INFO"):
+        """可在任意线程调用"""
         timestamp = datetime.now().strftime("%H:%M:%S")
-        self.log_text.config(state='normal')
-        self.log_text.insert('end', f"[{timestamp}] {message}\n")
-        self.log_text.config(state='disabled')
-        self.log_text.see('end')
+        self.ui.log(f"[{timestamp}] {message}")
 
     # --- 核心功能 ---
-    def download_audio_from_url(self, url, temp_dir):
-        try:
-            import yt_dlp
-            ydl_opts = {
-                'outtmpl': os.path.join(temp_dir, 'audio.%(ext)s'),
-                'format': 'bestaudio/best',
-                'postprocessors': [{
-                    'key': 'FFmpegExtractAudio',
-                    'preferredcodec': 'mp3',
-                    'preferredquality': '192',
-                }],
-                'quiet': True,
-                'no_warnings': True,
-                'noprogress': True,
-            }
-            cookie_file = self.cookie_path.get().strip()
-            if cookie_file and os.path.isfile(cookie_file):
-                ydl_opts['cookiefile'] = cookie_file
-            
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                info = ydl.extract_info(url, download=True)
-                return os.path.splitext(ydl.prepare_filename(info))[0] + ".mp3"
-        except Exception as e:
-            self.log(f"下载失败: {str(e)}", "ERROR")
-            return None
-
-    def load_model(self):
-        try:
-            from faster_whisper import WhisperModel
-            model_size = self.model_var.get()
-            self.log(f"加载 {model_size} 模型...")
-            
-            if self.compute_mode.get() == "cpu" or not self.has_gpu:
-                device = "cpu"
-                compute_type = "float32"
-                self.log("使用CPU模式", "INFO")
-            else:
-                device = "cuda"
-                compute_mode = self.compute_mode.get()
-                if compute_mode == "auto":
-                    compute_type = "float16" if self.gpu_info['vram'] >= 4 else "int8"
-                elif compute_mode == "float16":
-                    compute_type = "float16"
-                elif compute_mode == "int8":
-                    compute_type = "int8"
-                else:
-                    compute_type = "float32"
-                self.log(f"使用GPU加速 ({compute_type}精度)", "SUCCESS")
-            
-            return WhisperModel(model_size, device=device, compute_type=compute_type)
-        except Exception as e:
-            self.log(f"❌ 模型加载失败: {e}", "ERROR")
-            return None
+    def build_options(self):
+        """将界面设置转换为引擎配置；自动模式下使用调优得到的精度与线程配置"""
+        options = TranscribeOptions(
+            model_size=self.model_var.get(),
+            compute_mode=self.compute_mode.get(),
+            language=self.language_var.get(),
+            vad_filter=self.vad_filter.get(),
+            output_dir=self.output_dir.get(),
+            save_srt=self.save_srt.get(),
+            save_txt=self.save_txt.get(),
+            save_vtt=self.save_vtt.get(),
+            save_jsonl=self.save_jsonl.get(),
+            word_index=self.word_index.get(),
+            cookie_file=self.cookie_path.get(),
+            long_form=self.long_form.get(),
+            chunk_workers=max(2, (os.cpu_count() or 2) // 4),
+            batch_size=0 if self.batch_size.get() == "auto" else int(self.batch_size.get()),
+        )
+        if self.tuned_profile and options.compute_mode == "auto":
+            from autotune import apply_profile
+            apply_profile(options, self.tuned_profile, include_model=False)
+        return options
 
     def start_transcription(self):
         if self.is_running:
@@ -323,129 +313,389 @@ class GPUTranscriber:
             return
         
         self.is_running = True
+        self.cancel_token = CancelToken()
         self.start_btn.config(state='disabled')
         self.stop_btn.config(state='normal')
+        self.pause_btn.config(state='normal', text="⏸️ 暂停")
         self.progress['value'] = 0
         self.progress_label.set("准备中...")
         
-        thread = threading.Thread(target=self.transcribe_worker, args=(url, local_file))
+        # 界面变量只在主线程读取
+        thread = threading.Thread(target=self.transcribe_worker, args=(url, local_file, self.build_options()))
         thread.daemon = True
         thread.start()
 
     def stop_transcription(self):
-        self.is_running = False
+        # 立即中止下载/解码子进程，转录在当前片段结束后停止
+        if self.cancel_token:
+            self.cancel_token.cancel()
         self.log("用户请求停止...", "WARNING")
 
-    def transcribe_worker(self, url, local_file):
-        temp_dir = None
-        input_file = None
+    def toggle_pause(self):
+        """暂停后模型仍保留在内存中，继续时从当前位置接着转录"""
+        token = self.cancel_token
+        if not token or token.cancelled:
+            return
+        if token.paused:
+            token.resume()
+            self.pause_btn.config(text="⏸️ 暂停")
+            self.log("▶️ 继续转录", "INFO")
+        else:
+            token.pause()
+            self.pause_btn.config(text="▶️ 继续")
+            self.log("⏸️ 已暂停（当前片段完成后生效）", "INFO")
+
+    def transcribe_worker(self, url, local_file, options):
+        metrics_file = os.path.join(options.output_dir, f"metrics_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl")
+        self.metrics = MetricsCollector(interval=1.0, export_path=metrics_file)
+        self.metrics.subscribe(lambda sample: self.ui.update("metrics", self.update_metrics, sample))
+        self.metrics.start()
         try:
-            if url:
-                temp_dir = tempfile.mkdtemp()
-                self.log("正在下载音频...", "INFO")
-                input_file = self.download_audio_from_url(url, temp_dir)
-                if not input_file or not os.path.exists(input_file):
-                    raise Exception("音频下载失败")
-            else:
-                input_file = local_file
-            
-            model = self.load_model()
-            if not model:
-                raise Exception("模型加载失败")
-            
-            self.log("开始转录...", "INFO")
-            segments, info = model.transcribe(
-                input_file,
-                beam_size=5,
-                language=None if self.language_var.get() == "auto" else self.language_var.get(),
-                vad_filter=self.vad_filter.get(),
-                task="transcribe"
+            engine = TranscriptionEngine(options, log=self.log)
+            result = engine.transcribe_source(
+                url or local_file,
+                should_stop=self.cancel_token,
+                on_segment=self._on_segment,
             )
-            
-            results = []
-            for segment in segments:
-                if not self.is_running:
-                    break
-                results.append(segment)
-                self.log(f"[{segment.start:.1f}s] {segment.text}", "RESULT")
-                self.window.after(0, lambda s=segment: self.progress_label.set(f"已转录: {s.end:.1f}秒"))
-            
-            if self.is_running:
-                self.save_transcript(results)
+            self.job_summaries.append(result.summary())
+            if result.status == "done":
                 self.log("✅ 转录完成！", "SUCCESS")
-            else:
-                self.log("⏹️ 转录已停止", "WARNING")
-                
-        except Exception as e:
-            self.log(f"❌ 转录出错: {e}", "ERROR")
+                self.ui.call(self.batch_var.set,
+                             f"批处理: {result.batch_size} | 吞吐: {result.throughput:.1f} 音频秒/秒")
         finally:
+            self.metrics.stop()
+            self.log(f"📈 性能时间序列已保存: {metrics_file}", "INFO")
             self.is_running = False
-            self.window.after(0, lambda: self.start_btn.config(state='normal'))
-            self.window.after(0, lambda: self.stop_btn.config(state='disabled'))
-            if temp_dir and os.path.exists(temp_dir):
-                shutil.rmtree(temp_dir, ignore_errors=True)
-
-    def save_transcript(self, segments):
-        output_dir = self.output_dir.get()
-        os.makedirs(output_dir, exist_ok=True)
-        base_name = f"transcript_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-        
-        if self.save_txt.get():
-            txt_path = os.path.join(output_dir, base_name + ".txt")
-            with open(txt_path, 'w', encoding='utf-8') as f:
-                for seg in segments:
-                    f.write(seg.text + "\n")
-        
-        if self.save_srt.get():
-            srt_path = os.path.join(output_dir, base_name + ".srt")
-            with open(srt_path, 'w', encoding='utf-8') as f:
-                for i, seg in enumerate(segments, 1):
-                    f.write(f"{i}\n")
-                    f.write(f"{self._format_time(seg.start)} --> {self._format_time(seg.end)}\n")
-                    f.write(f"{seg.text}\n\n")
-        
-        self.log(f"💾 已保存到: {output_dir}", "SUCCESS")
-
-    def _format_time(self, seconds):
-        h = int(seconds // 3600)
-        m = int((seconds % 3600) // 60)
-        s = int(seconds % 60)
-        ms = int((seconds - int(seconds)) * 1000)
-        return f"{h:02d}:{m:02d}:{s:02d},{ms:03d}"
+            self.ui.call(self.update_cache_stats)
+            self.ui.call(self.start_btn.config, {'state': 'normal'})
+            self.ui.call(self.stop_btn.config, {'state': 'disabled'})
+            self.ui.call(self.pause_btn.config, {'state': 'disabled', 'text': "⏸️ 暂停"})
+
+    def update_metrics(self, sample):
+        """在主线程中刷新性能监控面板"""
+        self.fps_var.set(f"实时速度: {sample['chars_per_second']:.1f} 字/秒")
+        self.metrics_var.set(describe_metrics(sample))
+        if "gpu_percent" in sample:
+            self.gpu_usage_var.set(f"GPU: {sample['gpu_percent']}%")
+        if self.has_gpu:
+            if "gpu_temp_c" in sample:
+                self.gpu_temp_var.set(f"温度: {sample['gpu_temp_c']}°C")
+            if "vram_used_gb" in sample:
+                self.vram_var.set(f"VRAM: {sample['vram_used_gb']:.1f}/{sample['vram_total_gb']:.1f} GB")
+
+    def update_cache_stats(self):
+        from transcript_cache import get_transcript_cache
+        self.cache_var.set(f"{get_model_cache().describe()}\n{get_transcript_cache().describe()}")
+
+    def warm_up_model(self):
+        """后台预热当前选择的模型"""
+        options = self.build_options()
+        
+        def worker():
+            TranscriptionEngine(options, log=self.log).warm_up()
+            self.ui.call(self.update_cache_stats)
+        threading.Thread(target=worker, daemon=True).start()
+
+    def _on_segment(self, segment, info):
+        self.metrics.record_segment(segment, key=id(info))
+        self.log(f"[{segment.start:.1f}s] {segment.text}", "RESULT")
+        self.ui.update("progress", self._show_progress, segment.end, info.duration)
+
+    def _show_progress(self, position, duration):
+        if duration:
+            percent = min(100.0, position / duration * 100)
+            self.progress['value'] = percent
+            self.progress_label.set(f"已转录: {position:.1f}/{duration:.1f}秒（{percent:.0f}%）")
+        else:
+            self.progress_label.set(f"已转录: {position:.1f}秒")
+
+    # --- 任务队列 ---
+    JOB_STATUS_TEXT = {
+        "queued": "排队中", "running": "转录中", "done": "完成",
+        "failed": "失败", "cancelled": "已取消",
+    }
+
+    def open_queue_window(self):
+        if self.queue_tree is not None and self.queue_tree.winfo_exists():
+            self.queue_tree.winfo_toplevel().lift()
+            return
+        win = tk.Toplevel(self.window)
+        win.title("任务队列")
+        win.geometry("700x400")
+        
+        columns = ("id", "source", "status", "progress")
+        tree = ttk.Treeview(win, columns=columns, show='headings')
+        for col, text, width in [("id", "ID", 50), ("source", "来源", 400), ("status", "状态", 90), ("progress", "进度", 80)]:
+            tree.heading(col, text=text)
+            tree.column(col, width=width, anchor='w')
+        tree.pack(fill='both', expand=True, padx=10, pady=10)
+        self.queue_tree = tree
+        
+        btn_frame = tk.Frame(win)
+        btn_frame.pack(fill='x', padx=10, pady=(0, 10))
+        ttk.Button(btn_frame, text="添加文件", command=self.queue_add_files).pack(side='left', padx=5)
+        ttk.Button(btn_frame, text="添加链接", command=self.queue_add_url).pack(side='left', padx=5)
+        ttk.Button(btn_frame, text="取消选中", command=self.queue_cancel_selected).pack(side='left', padx=5)
+        ttk.Button(btn_frame, text="重试选中", command=self.queue_retry_selected).pack(side='left', padx=5)
+        
+        if self.job_queue:
+            for job in self.job_queue.jobs.values():
+                self._refresh_job_row(job)
+
+    @staticmethod
+    def _parse_time(text):
+        """秒数或 mm:ss / hh:mm:ss"""
+        seconds = 0.0
+        for part in text.strip().split(":"):
+            seconds = seconds * 60 + float(part)
+        return seconds
+
+    def open_region_dialog(self):
+        """从音频存储中只读取某个区间：试听或重新转录（不重新解码整个文件）"""
+        source = self.url_var.get().strip() or self.file_path.get().strip()
+        if not source:
+            messagebox.showwarning("输入错误", "请先提供视频链接或选择本地文件")
+            return
+        win = tk.Toplevel(self.window)
+        win.title("区间重转")
+        win.geometry("420x160")
+        
+        form = tk.Frame(win)
+        form.pack(fill='x', padx=20, pady=15)
+        start_var, end_var = tk.StringVar(value="0:00"), tk.StringVar(value="0:30")
+        tk.Label(form, text="起点:", font=("Microsoft YaHei", 9)).pack(side='left')
+        ttk.Entry(form, textvariable=start_var, width=10).pack(side='left', padx=5)
+        tk.Label(form, text="终点:", font=("Microsoft YaHei", 9)).pack(side='left')
+        ttk.Entry(form, textvariable=end_var, width=10).pack(side='left', padx=5)
+        
+        def run(action):
+            try:
+                start, end = self._parse_time(start_var.get()), self._parse_time(end_var.get())
+            except ValueError:
+                messagebox.showwarning("输入错误", "时间格式为 秒数 或 mm:ss", parent=win)
+                return
+            if end <= start:
+                messagebox.showwarning("输入错误", "终点必须晚于起点", parent=win)
+                return
+            threading.Thread(target=self._region_thread, args=(action, source, start, end, self.build_options()),
+                             daemon=True).start()
+        
+        btn_frame = tk.Frame(win)
+        btn_frame.pack(pady=10)
+        ttk.Button(btn_frame, text="🔊 试听", command=lambda: run("preview")).pack(side='left', padx=5)
+        ttk.Button(btn_frame, text="🔁 重新转录", command=lambda: run("transcribe")).pack(side='left', padx=5)
+        ttk.Button(btn_frame, text="关闭", command=win.destroy).pack(side='left', padx=5)
+
+    def _region_thread(self, action, source, start, end, options):
+        try:
+            engine = TranscriptionEngine(options, log=self.log)
+            if action == "preview":
+                path = engine.preview_region(source, start, end)
+                os.startfile(path) if sys.platform == "win32" else os.system(f'open "{path}"')
+                return
+            self.log(f"🎯 重新转录 {start:.1f}s - {end:.1f}s ...", "INFO")
+            for seg in engine.transcribe_region(source, start, end):
+                self.log(f"[{seg.start:.1f}s] {seg.text.strip()}", "RESULT")
+        except Exception as e:
+            self.log(f"❌ 区间处理失败: {e}", "ERROR")
+
+    def _ensure_queue(self):
+        if self.job_queue is None:
+            from job_queue import JobQueue
+            self.job_queue = JobQueue(self.build_options(), log=self.log,
+                                      on_update=lambda job: self.ui.update(("job", job.job_id), self._refresh_job_row, job))
+        return self.job_queue
+
+    def queue_add_files(self):
+        paths = filedialog.askopenfilenames(
+            title="选择视频文件",
+            filetypes=[("视频", "*.mp4 *.mkv *.avi *.mov *.flv *.webm"), ("所有文件", "*.*")]
+        )
+        if paths:
+            self._ensure_queue().submit_many(list(paths))
+
+    def queue_add_url(self):
+        urls = [u for u in self.url_var.get().split() if u]
+        if not urls:
+            messagebox.showwarning("输入错误", "请先在主界面填写视频链接（多个链接用空格分隔）")
+            return
+        queue = self._ensure_queue()
+        self.url_var.set("")
+        cookie_file = self.cookie_path.get().strip()
+
+        def expand_and_submit():
+            # 播放列表/频道在后台展开（需要联网），展开后逐个加入队列
+            from url_ingest import expand_sources
+            sources, _ = expand_sources(urls, cookie_file, log=self.log)
+            queue.submit_many(sources)
+
+        threading.Thread(target=expand_and_submit, daemon=True).start()
+
+    def _selected_job_ids(self):
+        if self.queue_tree is None:
+            return []
+        return [int(item) for item in self.queue_tree.selection()]
+
+    def queue_cancel_selected(self):
+        for job_id in self._selected_job_ids():
+            self.job_queue.cancel(job_id)
+
+    def queue_retry_selected(self):
+        for job_id in self._selected_job_ids():
+            self.job_queue.retry(job_id)
+
+    def _refresh_job_row(self, job):
+        if self.queue_tree is None or not self.queue_tree.winfo_exists():
+            return
+        values = (job.job_id, job.source, self.JOB_STATUS_TEXT.get(job.status, job.status), f"{job.progress:.0f}%")
+        item = str(job.job_id)
+        if self.queue_tree.exists(item):
+            self.queue_tree.item(item, values=values)
+        else:
+            self.queue_tree.insert('', 'end', iid=item, values=values)
 
     # --- GPU相关（简化版）---
     def run_gpu_benchmark(self):
-        if not self.has_gpu:
-            messagebox.showinfo("提示", "未检测到GPU，无法运行性能测试")
+        if self.is_running:
+            messagebox.showinfo("提示", "请等待当前转录结束后再运行性能测试")
             return
-        thread = threading.Thread(target=self._benchmark_thread)
+        device = "cuda" if self.has_gpu and self.compute_mode.get() != "cpu" else "cpu"
+        thread = threading.Thread(target=self._benchmark_thread,
+                                  args=(self.model_var.get(), device, self.output_dir.get()))
         thread.daemon = True
         thread.start()
 
-    def _benchmark_thread(self):
-        self.log("🧪 GPU性能测试暂未实现（跳过）", "INFO")
+    def _benchmark_thread(self, model_size, device, output_dir):
+        """快速扫描当前模型的精度与 beam_size（30 秒合成音频），结果保存为 JSON"""
+        try:
+            import benchmark
+            compute_types = ["float16", "int8_float16"] if device == "cuda" else ["float32", "int8"]
+            self.log(f"🧪 开始性能测试: {model_size} / {device} / {', '.join(compute_types)}", "INFO")
+            clips = benchmark.load_clips((30,))
+            results = benchmark.run_sweep(
+                [model_size], compute_types, [1, 5], [os.cpu_count() or 4], [1], clips,
+                device=device, log=self.log,
+            )
+            if not results:
+                self.log("❌ 性能测试没有得到结果", "ERROR")
+                return
+            os.makedirs(output_dir, exist_ok=True)
+            path = os.path.join(output_dir, f"benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+            best = benchmark.save_report(path, results, clips, benchmark.machine_info())["best"]
+            self.log(f"🏆 最快配置: {best['compute_type']} beam={best['beam_size']} → RTF {best['rtf']:.3f}"
+                     f"（{best['speed']:.1f}x 实时）", "SUCCESS")
+            self.log(f"💾 测试结果已保存到: {path}", "SUCCESS")
+            mode = {"float16": "float16", "int8_float16": "int8"}.get(best["compute_type"]) if device == "cuda" else None
+            if mode:
+                self.ui.call(self.compute_mode.set, mode)
+        except Exception as e:
+            self.log(f"❌ 性能测试失败: {e}", "ERROR")
+
+    def load_tuned_profile(self):
+        """启动时在后台读取已保存的调优结果，读取到后应用到界面"""
+        def worker():
+            from autotune import load_profile
+            profile = load_profile()
+            if profile:
+                self.ui.call(self._apply_tuned_profile, profile)
+        threading.Thread(target=worker, daemon=True).start()
+
+    def _apply_tuned_profile(self, profile):
+        from autotune import describe
+        self.tuned_profile = profile
+        self.model_var.set(profile["model_size"])
+        self.batch_size.set(str(profile["batch_size"]))
+        self.compute_mode.set("auto")
+        self.log(f"⚡ 使用自动调优配置: {describe(profile)}", "INFO")
 
     def open_gpu_settings(self):
+        """自动调优：显示硬件探测结果，校准后应用并保存配置"""
+        from autotune import DEFAULT_TARGET_RTF, describe, probe_machine
         settings = tk.Toplevel(self.window)
-        settings.title("GPU优化设置")
-        settings.geometry("500x300")
-        advice = """
-根据你的GPU配置，推荐设置：
-1. VRAM ≥ 8GB: float16 + medium
-2. VRAM 4-8GB: float16 + small  
-3. VRAM 2-4GB: int8 + tiny/small
-4. VRAM < 2GB: CPU 模式
-        """
-        tk.Label(settings, text=advice, justify='left', font=("Microsoft YaHei", 10)).pack(pady=20)
-        ttk.Button(settings, text="关闭", command=settings.destroy).pack()
+        settings.title("自动调优")
+        settings.geometry("520x360")
+        
+        machine = probe_machine()
+        flags = machine["cpu_flags"]
+        lines = [
+            f"CPU: {machine['processor']}",
+            f"核心: {machine['physical_cores']} 物理 / {machine['logical_cores']} 逻辑"
+            f" | AVX2 {'✓' if flags['avx2'] else '✗'} | AVX-512 {'✓' if flags['avx512'] else '✗'}"
+            f" | VNNI {'✓' if flags['vnni'] else '✗'}",
+            f"内存: {machine['ram_gb']} GB",
+            f"GPU: {machine['gpu']} ({machine['vram_gb']} GB)" if machine["gpu"] else "GPU: 无（使用 CPU int8）",
+            "",
+            f"当前配置: {describe(self.tuned_profile)}" if self.tuned_profile else "当前配置: 尚未调优",
+        ]
+        tk.Label(settings, text="\n".join(lines), justify='left', font=("Microsoft YaHei", 10)).pack(anchor='w', padx=20, pady=15)
+        
+        target_frame = tk.Frame(settings)
+        target_frame.pack(fill='x', padx=20)
+        tk.Label(target_frame, text="目标实时率（用时/音频时长）:", font=("Microsoft YaHei", 9)).pack(side='left')
+        target_var = tk.StringVar(value=str(self.tuned_profile["target_rtf"] if self.tuned_profile else DEFAULT_TARGET_RTF))
+        ttk.Entry(target_frame, textvariable=target_var, width=8).pack(side='left', padx=5)
+        
+        def start():
+            if self.is_running:
+                messagebox.showinfo("提示", "请等待当前转录结束后再进行调优", parent=settings)
+                return
+            try:
+                target = float(target_var.get())
+            except ValueError:
+                messagebox.showwarning("输入错误", "目标实时率必须是数字", parent=settings)
+                return
+            settings.destroy()
+            threading.Thread(target=self._autotune_thread, args=(target,), daemon=True).start()
+        
+        btn_frame = tk.Frame(settings)
+        btn_frame.pack(pady=20)
+        ttk.Button(btn_frame, text="🧪 开始校准", command=start).pack(side='left', padx=5)
+        ttk.Button(btn_frame, text="关闭", command=settings.destroy).pack(side='left', padx=5)
+
+    def _autotune_thread(self, target_rtf):
+        try:
+            from autotune import calibrate, save_profile
+            self.log(f"⚡ 开始自动调优（目标 RTF ≤ {target_rtf}），需要几分钟...", "INFO")
+            # 已选择本地文件时用它校准，比合成音频更接近真实负载
+            profile = calibrate(target_rtf, log=self.log, sample=self.file_path.get().strip() or None)
+            path = save_profile(profile)
+            self.log(f"💾 调优配置已保存: {path}", "SUCCESS")
+            self.ui.call(self._apply_tuned_profile, profile)
+        except Exception as e:
+            self.log(f"❌ 自动调优失败: {e}", "ERROR")
 
     def generate_performance_report(self):
-        self.log("📊 性能报告功能暂未实现", "INFO")
+        """汇总本次会话的所有任务，生成 JSON + HTML 性能报告并在浏览器中打开"""
+        summaries = list(self.job_summaries)
+        if self.job_queue:
+            summaries += [job.result for job in self.job_queue.jobs.values() if job.result]
+        if not summaries:
+            self.log("📊 还没有已完成的任务，无法生成性能报告", "WARNING")
+            return
+        
+        options = self.build_options()
+        
+        def worker():
+            import webbrowser
+            from profiling import batch_report, save_report
+            path = os.path.join(options.output_dir, f"performance_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+            try:
+                json_path, html_path = save_report(batch_report(summaries, options), path)
+            except Exception as e:
+                self.log(f"❌ 性能报告生成失败: {e}", "ERROR")
+                return
+            self.log(f"📊 性能报告已保存: {json_path}", "SUCCESS")
+            webbrowser.open(Path(html_path).as_uri())
+        # 采集硬件信息可能较慢，放到后台线程
+        threading.Thread(target=worker, daemon=True).start()
 
     def run(self):
         style = ttk.Style()
         style.configure("TButton", font=("Microsoft YaHei", 9))
         self.window.mainloop()
+        self.ui.stop()
+        if self.job_queue:
+            self.job_queue.shutdown()
 
 
 def main():
@@ -453,19 +703,16 @@ def main():
     print("视频转录工具 - GPU加速版")
     print("="*50)
     
-    if torch.cuda.is_available():
-        print(f"✅ 检测到GPU: {torch.cuda.get_device_name(0)}")
-        print(f"   VRAM: {torch.cuda.get_device_properties(0).total_memory / 1024**3:.1f}GB")
+    gpu = get_gpu_info()
+    if gpu:
+        print(f"✅ 检测到GPU: {gpu['name']}")
+        print(f"   VRAM: {gpu['vram']:.1f}GB")
     else:
         print("⚠️  未检测到NVIDIA GPU，将使用CPU模式")
     
+    # 只检查是否已安装，不在启动时导入
     required = ['faster_whisper', 'yt_dlp']
-    missing = []
-    for module in required:
-        try:
-            __import__(module)
-        except ImportError:
-            missing.append(module)
+    missing = [module for module in required if find_spec(module) is None]
     
     if missing:
         print("\n❌ 缺少必要依赖，请运行：")
@@ -475,6 +722,11 @@ def main():
         return
     
     app = GPUTranscriber()
+    if "--warmup" in sys.argv:
+        app.warm_up_model()
+    else:
+        # 界面显示后再在后台导入 faster_whisper 等重量级模块
+        app.window.after(200, preload_heavy_modules)
     app.run()
 
 